@@ -0,0 +1,153 @@
+# backtest.py
+import logging
+import numpy as np
+import pandas as pd
+from typing import Optional, Tuple
+from models import DatabaseManager, OrderBlock, KlineData
+from utils.helpers import (build_sparse_table, range_query,
+                           first_index_at_or_above, first_index_at_or_below)
+
+class BlockBacktester:
+    """
+    Проверка целевых цен ордер-блоков на истории свечей.
+    Вход - по закрытию свечи имбаланса, цель - price_target блока,
+    окно проверки - horizon_bars свечей после имбаланса.
+    """
+
+    def __init__(self, db_manager, horizon_bars: int = 500):
+        self.db_manager = db_manager
+        self.horizon_bars = horizon_bars
+        self.logger = logging.getLogger(__name__)
+
+    def run(self, symbol: Optional[str] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Бэктест всех сохраненных блоков.
+        Возвращает результаты по каждому блоку и сводку по символу, таймфрейму и направлению
+        """
+        blocks = self._load_blocks(symbol)
+        if blocks.empty:
+            return pd.DataFrame(), pd.DataFrame()
+
+        results = []
+        for (block_symbol, timeframe), group in blocks.groupby(['symbol', 'timeframe'], sort=False):
+            try:
+                candles = self._load_candles(block_symbol, timeframe, group['timestamp'].min())
+                if candles.empty:
+                    continue
+                results.append(self.evaluate(group, candles))
+            except Exception as e:
+                self.logger.error(f"Ошибка бэктеста {block_symbol} ({timeframe}): {e}")
+
+        if not results:
+            return pd.DataFrame(), pd.DataFrame()
+
+        results = pd.concat(results, ignore_index=True)
+        summary = self.summarize(results)
+        self.logger.info(f"Бэктест: {len(results)} блоков, доля достижения цели "
+                         f"{results['hit'].mean() * 100:.1f}%")
+        return results, summary
+
+    def evaluate(self, blocks: pd.DataFrame, candles: pd.DataFrame) -> pd.DataFrame:
+        """
+        Векторизованная оценка блоков одного символа и таймфрейма.
+        Экстремумы на окнах считаются через sparse table без циклов по блокам
+        """
+        times = candles['timestamp'].to_numpy(dtype='datetime64[ns]')
+        high = candles['high'].to_numpy(dtype=float)
+        low = candles['low'].to_numpy(dtype=float)
+        n = len(candles)
+
+        block_pos = np.searchsorted(times, blocks['timestamp'].to_numpy(dtype='datetime64[ns]'), side='left')
+        starts = np.minimum(block_pos + 1, n)
+        window_ends = np.minimum(starts + self.horizon_bars, n)
+
+        entry = blocks['imbalance_close'].to_numpy(dtype=float)
+        target = blocks['price_target'].to_numpy(dtype=float)
+        is_bullish = blocks['direction'].str.upper().eq('BULLISH').to_numpy()
+
+        max_high = build_sparse_table(high, np.maximum)
+        min_low = build_sparse_table(low, np.minimum)
+
+        hit_pos = np.where(
+            is_bullish,
+            first_index_at_or_above(max_high, starts, target),
+            first_index_at_or_below(min_low, starts, target)
+        )
+        hit = hit_pos < window_ends
+
+        # Просадка считается до достижения цели (включая свечу достижения) или до конца окна
+        adverse_ends = np.where(hit, hit_pos + 1, window_ends)
+        worst_low = range_query(min_low, starts, adverse_ends, np.minimum)
+        worst_high = range_query(max_high, starts, adverse_ends, np.maximum)
+        adverse = np.where(is_bullish, entry - worst_low, worst_high - entry)
+        mae_pct = np.clip(adverse, 0, None) / entry * 100
+
+        return pd.DataFrame({
+            'id': blocks['id'].to_numpy(),
+            'symbol': blocks['symbol'].to_numpy(),
+            'timeframe': blocks['timeframe'].to_numpy(),
+            'direction': blocks['direction'].to_numpy(),
+            'timestamp': blocks['timestamp'].to_numpy(),
+            'hit': hit,
+            'bars_to_target': np.where(hit, hit_pos - block_pos, np.nan),
+            'mae_pct': mae_pct,
+            'bars_available': window_ends - starts
+        })
+
+    def summarize(self, results: pd.DataFrame) -> pd.DataFrame:
+        """Сводка по символу, таймфрейму и направлению"""
+        grouped = results.groupby(['symbol', 'timeframe', 'direction'])
+        summary = grouped.agg(
+            blocks=('id', 'count'),
+            hit_rate=('hit', 'mean'),
+            median_bars_to_target=('bars_to_target', 'median'),
+            mean_bars_to_target=('bars_to_target', 'mean'),
+            mean_mae_pct=('mae_pct', 'mean'),
+            p90_mae_pct=('mae_pct', lambda x: x.quantile(0.9))
+        )
+        summary['hit_rate'] *= 100
+        return summary.reset_index()
+
+    def _load_blocks(self, symbol: Optional[str] = None) -> pd.DataFrame:
+        """Блоки с рассчитанной целью"""
+        session = self.db_manager.get_session()
+        try:
+            query = session.query(
+                OrderBlock.id, OrderBlock.symbol, OrderBlock.timeframe, OrderBlock.timestamp,
+                OrderBlock.imbalance_close, OrderBlock.direction, OrderBlock.price_target
+            ).filter(OrderBlock.price_target != None, OrderBlock.imbalance_close != None)
+
+            if symbol:
+                query = query.filter(OrderBlock.symbol == symbol)
+
+            return pd.read_sql(query.statement, self.db_manager.engine, parse_dates=['timestamp'])
+        finally:
+            session.close()
+
+    def _load_candles(self, symbol: str, timeframe: str, since) -> pd.DataFrame:
+        """Свечи символа начиная с самого раннего блока"""
+        session = self.db_manager.get_session()
+        try:
+            query = session.query(
+                KlineData.timestamp, KlineData.high, KlineData.low
+            ).filter(
+                KlineData.symbol == symbol,
+                KlineData.timeframe == timeframe,
+                KlineData.timestamp >= since
+            ).order_by(KlineData.timestamp)
+
+            return pd.read_sql(query.statement, self.db_manager.engine, parse_dates=['timestamp'])
+        finally:
+            session.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    db_manager = DatabaseManager()
+    db_manager.init_database()
+
+    results, summary = BlockBacktester(db_manager).run()
+    if summary.empty:
+        print("Нет блоков для бэктеста")
+    else:
+        print(summary.to_string(index=False))
@@ -0,0 +1,172 @@
+# block_lifecycle.py
+import logging
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from typing import Optional
+from models import OrderBlock, KlineData
+from order_block_detector import OrderBlockDetector
+from utils.helpers import build_sparse_table, first_index_at_or_above, first_index_at_or_below
+
+class BlockLifecycleTracker:
+    """
+    Отслеживание жизненного цикла ордер-блоков по истории свечей:
+    возврат цены в зону (mitigation), пробой зоны закрытием (invalidation)
+    и достижение целевой цены.
+    """
+
+    # Свечи после имбаланса, на которых детектор проверяет подтверждение
+    CONFIRMATION_BARS = OrderBlockDetector.CONFIRMATION_BARS
+
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+        self.logger = logging.getLogger(__name__)
+
+    def update_all(self, symbol: Optional[str] = None) -> list:
+        """
+        Пересчет состояния всех незавершенных ордер-блоков и запись результатов одним пакетом.
+        Возвращает список новых состояний блоков
+        """
+        blocks = self._load_open_blocks(symbol)
+        if blocks.empty:
+            return []
+
+        updates = []
+        for (block_symbol, timeframe), group in blocks.groupby(['symbol', 'timeframe'], sort=False):
+            try:
+                candles = self._load_candles(block_symbol, timeframe, group['timestamp'].min())
+                if candles.empty:
+                    continue
+
+                result = self.evaluate(group, candles)
+                updates.extend(self._to_mappings(result))
+            except Exception as e:
+                self.logger.error(f"Ошибка расчета жизненного цикла {block_symbol} ({timeframe}): {e}")
+
+        self._write_updates(updates)
+        return updates
+
+    def evaluate(self, blocks: pd.DataFrame, candles: pd.DataFrame) -> pd.DataFrame:
+        """
+        Векторизованный расчет событий для блоков одного символа и таймфрейма.
+        candles - свечи, отсортированные по времени (колонки timestamp, high, low, close)
+        """
+        times = candles['timestamp'].to_numpy(dtype='datetime64[ns]')
+        high = candles['high'].to_numpy(dtype=float)
+        low = candles['low'].to_numpy(dtype=float)
+        close = candles['close'].to_numpy(dtype=float)
+        n = len(candles)
+
+        block_pos = np.searchsorted(times, blocks['timestamp'].to_numpy(dtype='datetime64[ns]'), side='left')
+        # Возврат в зону ищем только после окна подтверждения
+        zone_starts = block_pos + 1 + self.CONFIRMATION_BARS
+        target_starts = block_pos + 1
+
+        zone_high = blocks['imbalance_high'].to_numpy(dtype=float)
+        zone_low = blocks['imbalance_low'].to_numpy(dtype=float)
+        target = blocks['price_target'].to_numpy(dtype=float)
+        is_bullish = blocks['direction'].str.upper().eq('BULLISH').to_numpy()
+
+        max_high = build_sparse_table(high, np.maximum)
+        min_low = build_sparse_table(low, np.minimum)
+        max_close = build_sparse_table(close, np.maximum)
+        min_close = build_sparse_table(close, np.minimum)
+
+        # Бычий блок: цена возвращается сверху, медвежий - снизу
+        mitigated = np.where(
+            is_bullish,
+            first_index_at_or_below(min_low, zone_starts, zone_high),
+            first_index_at_or_above(max_high, zone_starts, zone_low)
+        )
+        # Пробой зоны закрытием свечи за ее противоположной границей
+        invalidated = np.where(
+            is_bullish,
+            first_index_at_or_below(min_close, zone_starts, zone_low),
+            first_index_at_or_above(max_close, zone_starts, zone_high)
+        )
+        target_hit = np.where(
+            is_bullish,
+            first_index_at_or_above(max_high, target_starts, target),
+            first_index_at_or_below(min_low, target_starts, target)
+        )
+
+        result = pd.DataFrame({'id': blocks['id'].to_numpy()})
+        result['mitigated_at'] = self._index_to_time(mitigated, times, n)
+        result['invalidated_at'] = self._index_to_time(invalidated, times, n)
+        result['target_hit_at'] = self._index_to_time(target_hit, times, n)
+        result['status'] = np.select(
+            [invalidated < n, mitigated < n],
+            ['INVALIDATED', 'MITIGATED'],
+            default='ACTIVE'
+        )
+        return result
+
+    def _index_to_time(self, positions: np.ndarray, times: np.ndarray, n: int) -> np.ndarray:
+        """Перевод индексов свечей во время, NaT если событие не наступило"""
+        if n == 0:
+            return np.full(len(positions), np.datetime64('NaT'), dtype='datetime64[ns]')
+        found = positions < n
+        return np.where(found, times[np.minimum(positions, n - 1)], np.datetime64('NaT'))
+
+    def _load_open_blocks(self, symbol: Optional[str] = None) -> pd.DataFrame:
+        """Блоки, для которых еще могут наступить события"""
+        session = self.db_manager.get_session()
+        try:
+            query = session.query(
+                OrderBlock.id, OrderBlock.symbol, OrderBlock.timeframe, OrderBlock.timestamp,
+                OrderBlock.imbalance_high, OrderBlock.imbalance_low,
+                OrderBlock.direction, OrderBlock.price_target
+            ).filter((OrderBlock.invalidated_at == None) | (OrderBlock.target_hit_at == None))
+
+            if symbol:
+                query = query.filter(OrderBlock.symbol == symbol)
+
+            return pd.read_sql(query.statement, self.db_manager.engine, parse_dates=['timestamp'])
+        finally:
+            session.close()
+
+    def _load_candles(self, symbol: str, timeframe: str, since: datetime) -> pd.DataFrame:
+        """Свечи символа начиная с самого раннего блока"""
+        session = self.db_manager.get_session()
+        try:
+            query = session.query(
+                KlineData.timestamp, KlineData.high, KlineData.low, KlineData.close
+            ).filter(
+                KlineData.symbol == symbol,
+                KlineData.timeframe == timeframe,
+                KlineData.timestamp >= since
+            ).order_by(KlineData.timestamp)
+
+            return pd.read_sql(query.statement, self.db_manager.engine, parse_dates=['timestamp'])
+        finally:
+            session.close()
+
+    def _to_mappings(self, result: pd.DataFrame) -> list:
+        """Преобразование результата в словари для bulk_update_mappings"""
+        mappings = []
+        for row in result.itertuples(index=False):
+            mappings.append({
+                'id': int(row.id),
+                'status': row.status,
+                'mitigated_at': None if pd.isna(row.mitigated_at) else row.mitigated_at.to_pydatetime(),
+                'invalidated_at': None if pd.isna(row.invalidated_at) else row.invalidated_at.to_pydatetime(),
+                'target_hit_at': None if pd.isna(row.target_hit_at) else row.target_hit_at.to_pydatetime()
+            })
+        return mappings
+
+    def _write_updates(self, updates: list):
+        """Пакетная запись состояний блоков"""
+        if not updates:
+            return
+
+        session = self.db_manager.get_session()
+        try:
+            session.bulk_update_mappings(OrderBlock, updates)
+            session.commit()
+            self.logger.info(f"Обновлен жизненный цикл {len(updates)} ордер-блоков")
+        except Exception as e:
+            session.rollback()
+            self.logger.error(f"Ошибка записи жизненного цикла ордер-блоков: {e}")
+            raise
+        finally:
+            session.close()
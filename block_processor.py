@@ -1,39 +1,315 @@
 # block_processor.py
 import logging
-from datetime import datetime
-from database_manager import DataManager
+import os
+import socket
+import threading
+import time
+from contextlib import nullcontext
+import pandas as pd
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from config import Config
+from core.data_manager import DataManager
 from order_block_detector import OrderBlockDetector
-from models import OrderBlock
+from block_lifecycle import BlockLifecycleTracker
+from zone_index import ZoneProximityMonitor
+from confluence import ConfluenceAnalyzer
+from parallel_scan import create_pool, detect_parallel
+from scan_jobs import ScanJobManager
+from chart_snapshots import ChartSnapshotStore
+from snapshot_publisher import SnapshotPublisher
+from models import OrderBlock, KlineData, ProcessingState
 
 class BlockProcessor:
+    # Число последних свечей для полного пересчета ряда
+    HISTORY_LIMIT = 1000
+    # Тип задания для распределенного поиска несколькими воркерами
+    DISTRIBUTED_JOB = 'find_blocks_distributed'
+    
     def __init__(self, db_path="data/smat.db"):
         self.data_manager = DataManager(db_path)
         self.detector = OrderBlockDetector()
+        self.lifecycle = BlockLifecycleTracker(self.data_manager.db_manager)
+        self.zone_monitor = ZoneProximityMonitor()
+        # Индекс зон заполняется из БД перед первой проверкой цен (check_prices),
+        # дальше поддерживается при сохранении блоков и пересчете их статусов
+        self._zone_index_loaded = False
+        self.confluence = ConfluenceAnalyzer(self.data_manager.db_manager)
+        self.jobs = ScanJobManager(self.data_manager.db_manager)
+        self.snapshots = ChartSnapshotStore(self.data_manager.db_manager)
+        self.publisher = SnapshotPublisher(db_path)
         self.logger = logging.getLogger(__name__)
     
-    def find_blocks_all_symbols(self, timeframes=None):
+    def find_blocks_all_symbols(self, timeframes=None, workers=None, incremental=True):
         """
         Поиск ордер-блоков по всем символам и таймфреймам
+        Поиск выполняется как сохраняемое задание: результаты каждого ряда
+        записываются сразу, прерванное задание продолжается при следующем запуске.
+        workers > 1 включает параллельный поиск в пуле процессов,
+        incremental - обработку только рядов, где появились новые свечи.
+        Возвращает прогресс задания
         """
         if timeframes is None:
             timeframes = ['5', '15', '60', '240', 'D']
+        if workers is None:
+            workers = Config.PROCESS_WORKERS
         
         symbols = self.data_manager.get_available_symbols()
-        self.logger.info(f"Начинаем поиск ордер-блоков для {len(symbols)} символов")
+        plan = self.plan_series(symbols, timeframes, incremental)
+        job_id = self.jobs.start_or_resume(
+            'find_blocks',
+            {'timeframes': timeframes, 'incremental': incremental},
+            [(item['symbol'], item['timeframe']) for item in plan],
+            create=bool(plan),
+            ranges=[(item['watermark'], item['latest_timestamp']) for item in plan]
+        )
+        if job_id is None:
+            self.logger.info("Новых свечей нет, поиск ордер-блоков не требуется")
+            return {}
         
-        all_blocks = []
+        pending = self.jobs.pending_items(job_id)
+        self.logger.info(f"Начинаем поиск ордер-блоков: {len(pending)} рядов для {len(symbols)} символов")
         
-        for symbol in symbols:
+        batch_size = workers * 4 if workers > 1 else 1
+        # Один пул процессов на все задание: запуск пула на каждую пачку дороже самого поиска
+        with create_pool(workers) if workers > 1 else nullcontext() as pool:
+            for offset in range(0, len(pending), batch_size):
+                self._process_job_batch(pending[offset:offset + batch_size], workers, incremental, pool)
+        
+        self.jobs.finish_job(job_id)
+        self.update_lifecycle()
+        self.update_confluence()
+        self.publish_snapshot()
+        
+        progress = self.jobs.get_progress(job_id)
+        self.logger.info(f"Задание #{job_id} завершено: {progress['done']} рядов, "
+                         f"ошибок {progress['failed']}, найдено {progress['results']} блоков")
+        return progress
+    
+    def get_scan_progress(self, job_id=None):
+        """
+        Прогресс задания поиска (по умолчанию - последнего)
+        """
+        return self.jobs.get_progress(job_id, kind='find_blocks')
+    
+    def enqueue_distributed_scan(self, timeframes=None, incremental=True):
+        """
+        Постановка задания поиска в очередь для воркеров (scan_worker.py).
+        Воркеры - процессы на этой же машине, работающие с тем же файлом БД:
+        режим WAL использует общую память и не работает на сетевых файловых системах.
+        Каждый элемент - диапазон свечей ряда (после водяного знака и до последней
+        свечи на момент постановки), воркер обрабатывает ровно этот диапазон.
+        Возвращает id задания или None, если обрабатывать нечего
+        """
+        if timeframes is None:
+            timeframes = ['5', '15', '60', '240', 'D']
+        
+        symbols = self.data_manager.get_available_symbols()
+        plan = self.plan_series(symbols, timeframes, incremental)
+        return self.jobs.start_or_resume(
+            self.DISTRIBUTED_JOB,
+            {'timeframes': timeframes, 'incremental': incremental},
+            [(item['symbol'], item['timeframe']) for item in plan],
+            create=bool(plan),
+            ranges=[(item['watermark'], item['latest_timestamp']) for item in plan]
+        )
+    
+    def run_scan_worker(self, job_id, owner=None, batch_size=4, lease_seconds=120, incremental=True):
+        """
+        Цикл воркера: аренда элементов, обработка, фиксация результата.
+        Пока пачка обрабатывается, аренда продлевается в фоне.
+        Завершается, когда свободных элементов не осталось
+        """
+        owner = owner or f"{socket.gethostname()}:{os.getpid()}"
+        processed = 0
+        
+        while True:
+            batch = self.jobs.claim_items(job_id, owner, batch_size, lease_seconds)
+            if not batch:
+                break
+            
+            stop = threading.Event()
+            heartbeat = threading.Thread(
+                target=self._lease_heartbeat,
+                args=(batch[0]['lease_token'], lease_seconds, stop),
+                daemon=True
+            )
+            heartbeat.start()
+            try:
+                self._process_job_batch(batch, 1, incremental)
+            finally:
+                stop.set()
+                heartbeat.join()
+            processed += len(batch)
+        
+        self.logger.info(f"Воркер {owner}: обработано {processed} элементов задания #{job_id}")
+        return processed
+    
+    def wait_for_distributed_scan(self, job_id, poll_interval=2.0, help_workers=True):
+        """
+        Ожидание завершения распределенного задания координатором.
+        При help_workers координатор сам забирает свободные элементы,
+        в том числе с истекшей арендой, так что задание завершится даже без живых воркеров
+        """
+        while True:
+            progress = self.jobs.get_progress(job_id)
+            if progress['pending'] == 0 and progress['leased'] == 0:
+                break
+            
+            if not help_workers or self.run_scan_worker(job_id) == 0:
+                time.sleep(poll_interval)
+        
+        self.jobs.finish_job(job_id)
+        self.update_lifecycle()
+        self.update_confluence()
+        self.publish_snapshot()
+        return self.jobs.get_progress(job_id)
+    
+    def _lease_heartbeat(self, lease_token, lease_seconds, stop):
+        while not stop.wait(lease_seconds / 3):
+            self.jobs.heartbeat(lease_token, lease_seconds)
+    
+    def _process_job_batch(self, job_items: list, workers: int, incremental: bool, pool=None):
+        """
+        Обработка пачки элементов задания с фиксацией каждого элемента.
+        pool - пул процессов задания для параллельного поиска
+        """
+        plan = self.plan_ranges([job_item for job_item in job_items if job_item.get('range_end') is not None])
+        
+        # Элементы без диапазона (задания, созданные до хранения диапазонов) планируются заново
+        unranged = [job_item for job_item in job_items if job_item.get('range_end') is None]
+        if unranged:
+            symbols = sorted({job_item['symbol'] for job_item in unranged})
+            timeframes = sorted({job_item['timeframe'] for job_item in unranged})
+            wanted = {(job_item['symbol'], job_item['timeframe']) for job_item in unranged}
+            plan.update({(item['symbol'], item['timeframe']): item
+                         for item in self.plan_series(symbols, timeframes, incremental)
+                         if (item['symbol'], item['timeframe']) in wanted})
+        
+        if workers > 1:
+            found = self._find_blocks_parallel(list(plan.values()), workers, pool)
+        else:
+            found = []
+            for item in plan.values():
+                found.extend(self.detect_series(item))
+        
+        blocks_by_series = {}
+        for block in found:
+            blocks_by_series.setdefault((block['symbol'], block['timeframe']), []).append(block)
+        
+        for job_item in job_items:
+            key = (job_item['symbol'], job_item['timeframe'])
+            item = plan.get(key)
+            blocks = blocks_by_series.get(key, [])
             try:
-                blocks = self.find_blocks_for_symbol(symbol, timeframes)
-                all_blocks.extend(blocks)
-                self.logger.info(f"Символ {symbol}: найдено {len(blocks)} блоков")
+                # Ряд уже обработан (например, до прерывания) - фиксировать нечего
+                if item is not None:
+                    self.commit_series([item], blocks, finalize=False)
+                self.jobs.complete_item(job_item['id'], len(blocks), lease_token=job_item.get('lease_token'))
             except Exception as e:
-                self.logger.error(f"Ошибка обработки символа {symbol}: {e}")
+                self.logger.error(f"Ошибка сохранения {key[0]} ({key[1]}): {e}")
+                self.jobs.complete_item(job_item['id'], error=str(e), lease_token=job_item.get('lease_token'))
+    
+    def plan_series(self, symbols: list, timeframes: list, incremental=True) -> list:
+        """
+        Список рядов (symbol, timeframe) для обработки. Ряд пропускается, если
+        после водяного знака нет новых свечей и параметры детектора не менялись
+        """
+        latest = self._latest_candle_times(symbols, timeframes)
+        states = self._load_processing_state(symbols, timeframes) if incremental else {}
+        params_hash = self.detector.params_hash()
+        
+        plan = []
+        for symbol in symbols:
+            for timeframe in timeframes:
+                last_timestamp = latest.get((symbol, timeframe))
+                if last_timestamp is None:
+                    continue
+                
+                watermark = None
+                state = states.get((symbol, timeframe))
+                if state and state['params_hash'] == params_hash:
+                    if state['last_candle_timestamp'] >= last_timestamp:
+                        continue
+                    watermark = state['last_candle_timestamp']
+                
+                plan.append({
+                    'symbol': symbol,
+                    'timeframe': timeframe,
+                    'watermark': watermark,
+                    'latest_timestamp': last_timestamp,
+                    'replace_from': None,
+                    'last_candle_timestamp': None
+                })
+        return plan
+    
+    def plan_ranges(self, job_items: list) -> dict:
+        """
+        План обработки элементов задания ровно по их диапазонам:
+        от range_start (водяной знак, None - вся история) до range_end включительно.
+        Элемент пропускается, если водяной знак ряда уже дошел до range_end
+        (диапазон обработан, например, до истечения аренды прежнего воркера).
+        Возвращает {(symbol, timeframe): элемент плана}
+        """
+        states = self._load_processing_state(sorted({job_item['symbol'] for job_item in job_items}),
+                                             sorted({job_item['timeframe'] for job_item in job_items}))
+        params_hash = self.detector.params_hash()
         
-        # Сохраняем найденные блоки в БД
-        self._save_blocks_to_db(all_blocks)
-        return all_blocks
+        plan = {}
+        for job_item in job_items:
+            key = (job_item['symbol'], job_item['timeframe'])
+            state = states.get(key)
+            watermark = job_item['range_start']
+            if state and state['params_hash'] == params_hash:
+                if state['last_candle_timestamp'] >= job_item['range_end']:
+                    continue
+            elif watermark is not None:
+                # Параметры детектора изменились после постановки - окно пересчета
+                # от старого водяного знака неверно, ряд пересчитывается целиком до range_end
+                watermark = None
+            
+            plan[key] = {
+                'symbol': key[0],
+                'timeframe': key[1],
+                'watermark': watermark,
+                'latest_timestamp': job_item['range_end'],
+                'replace_from': None,
+                'last_candle_timestamp': None
+            }
+        return plan
+    
+    def detect_series(self, item: dict) -> list:
+        """
+        Поиск блоков в одном ряду. Возвращает только блоки из окна пересчета,
+        остальные уже сохранены при прошлой обработке
+        """
+        symbol, timeframe = item['symbol'], item['timeframe']
+        try:
+            df = self._load_series(item)
+            if df.empty:
+                return []
+            
+            blocks = self.detector.find_order_blocks(df, timeframe)
+            for block in blocks:
+                block['symbol'] = symbol
+            return self._filter_replaced(item, blocks)
+        except Exception as e:
+            self.logger.error(f"Ошибка обработки {symbol} ({timeframe}): {e}")
+            return []
+    
+    def commit_series(self, plan: list, blocks: list, finalize=True):
+        """
+        Сохранение блоков обработанных рядов и сдвиг водяных знаков.
+        Возвращает (сохраненные блоки, id замененных блоков)
+        """
+        replace_ranges = [(item['symbol'], item['timeframe'], item['replace_from'])
+                          for item in plan if item['replace_from'] is not None]
+        # Фрагменты графика пересобираются по всем обработанным рядам:
+        # новые свечи могли дополнить окна уже сохраненных блоков
+        saved = self.save_blocks(blocks, replace_ranges, finalize,
+                                 series=[(item['symbol'], item['timeframe']) for item in plan])
+        self._save_processing_state([item for item in plan if item['last_candle_timestamp'] is not None])
+        return saved
     
     def find_blocks_for_symbol(self, symbol: str, timeframes: list):
         """
@@ -61,7 +337,158 @@ class BlockProcessor:
         
         return blocks
     
-    def _save_blocks_to_db(self, blocks: list):
+    def save_blocks(self, blocks: list, replace_ranges=None, finalize=True, series=None):
+        """
+        Сохранение найденных блоков в БД и пересчет их состояний
+        replace_ranges - список (symbol, timeframe, timestamp), блоки ряда
+        начиная с timestamp заменяются новыми.
+        series - ряды, фрагменты графика которых нужно обновить помимо рядов блоков.
+        Возвращает (сохраненные блоки с id, id замененных блоков)
+        """
+        saved = self._save_blocks_to_db(blocks, replace_ranges)
+        touched = set(series or []) | {(block['symbol'], block['timeframe']) for block in blocks}
+        self.update_snapshots(touched)
+        if finalize:
+            self.update_lifecycle()
+            self.update_confluence()
+            self.publish_snapshot()
+        return saved
+    
+    def _find_blocks_parallel(self, plan: list, workers: int, pool=None):
+        """
+        Параллельный поиск: свечи читаются из БД в основном процессе
+        и передаются воркерам через общую память. pool - уже запущенный пул процессов
+        """
+        frames = []
+        items = {}
+        for item in plan:
+            try:
+                df = self._load_series(item)
+                frames.append((item['symbol'], item['timeframe'], df))
+                items[(item['symbol'], item['timeframe'])] = item
+            except Exception as e:
+                self.logger.error(f"Ошибка загрузки {item['symbol']} ({item['timeframe']}): {e}")
+        
+        blocks = detect_parallel(frames, workers, pool)
+        return [block for block in blocks
+                if self._filter_replaced(items[(block['symbol'], block['timeframe'])], [block])]
+    
+    def _load_series(self, item: dict) -> pd.DataFrame:
+        """
+        Загрузка свечей ряда до latest_timestamp плана включительно: свечи,
+        пришедшие после планирования, относятся к следующему диапазону.
+        При наличии водяного знака читается только хвост
+        с запасом на окно скользящих средних и окно подтверждения
+        """
+        until = item.get('latest_timestamp')
+        if item['watermark'] is None:
+            df = self.data_manager.get_klines_df(item['symbol'], item['timeframe'],
+                                                 limit=self.HISTORY_LIMIT, until=until)
+            watermark_pos = 0
+        else:
+            overlap_bars = (self.detector.LOOKBACK_PERIOD + self.detector.CONTEXT_BARS
+                            + self.detector.CONFIRMATION_BARS)
+            minutes = Config.INTERVAL_MINUTES.get(item['timeframe'], 1)
+            since = item['watermark'] - timedelta(minutes=overlap_bars * minutes)
+            df = self._read_klines_since(item['symbol'], item['timeframe'], since, until)
+            watermark_pos = int(df.index.searchsorted(pd.Timestamp(item['watermark'])))
+        
+        if df.empty:
+            return df
+        
+        # Блоки у водяного знака были оценены по неполному окну подтверждения - пересчитываем их
+        first_valid = max(self.detector.LOOKBACK_PERIOD - 1, self.detector.CONTEXT_BARS)
+        start = max(first_valid, watermark_pos - self.detector.CONFIRMATION_BARS + 1)
+        item['replace_from'] = df.index[start].to_pydatetime() if start < len(df) else None
+        item['last_candle_timestamp'] = df.index[-1].to_pydatetime()
+        return df
+    
+    def _filter_replaced(self, item: dict, blocks: list) -> list:
+        """Блоки, попадающие в окно пересчета ряда"""
+        if item['replace_from'] is None:
+            return []
+        return [block for block in blocks if block['timestamp'] >= item['replace_from']]
+    
+    def _read_klines_since(self, symbol: str, timeframe: str, since, until=None) -> pd.DataFrame:
+        """Свечи ряда начиная с указанного времени (и до until включительно)"""
+        session = self.data_manager.db_manager.get_session()
+        try:
+            query = session.query(
+                KlineData.timestamp, KlineData.open, KlineData.high,
+                KlineData.low, KlineData.close, KlineData.volume
+            ).filter(
+                KlineData.symbol == symbol,
+                KlineData.timeframe == timeframe,
+                KlineData.timestamp >= since
+            )
+            if until is not None:
+                query = query.filter(KlineData.timestamp <= until)
+            query = query.order_by(KlineData.timestamp)
+            
+            return pd.read_sql(query.statement, self.data_manager.db_manager.engine,
+                               index_col='timestamp', parse_dates=['timestamp'])
+        finally:
+            session.close()
+    
+    def _latest_candle_times(self, symbols: list, timeframes: list) -> dict:
+        """Время последней свечи по каждому ряду одним запросом"""
+        session = self.data_manager.db_manager.get_session()
+        try:
+            rows = session.query(
+                KlineData.symbol, KlineData.timeframe, func.max(KlineData.timestamp)
+            ).filter(
+                KlineData.symbol.in_(symbols),
+                KlineData.timeframe.in_(timeframes)
+            ).group_by(KlineData.symbol, KlineData.timeframe).all()
+            return {(symbol, timeframe): last for symbol, timeframe, last in rows}
+        finally:
+            session.close()
+    
+    def _load_processing_state(self, symbols: list, timeframes: list) -> dict:
+        """
+        Водяные знаки рядов указанных символов и таймфреймов (по уникальному
+        индексу - конвейер планирует каждый ряд отдельно, вся таблица не читается)
+        """
+        session = self.data_manager.db_manager.get_session()
+        try:
+            query = session.query(ProcessingState).filter(
+                ProcessingState.symbol.in_(symbols),
+                ProcessingState.timeframe.in_(timeframes)
+            )
+            return {(state.symbol, state.timeframe): {
+                        'last_candle_timestamp': state.last_candle_timestamp,
+                        'params_hash': state.params_hash
+                    } for state in query}
+        finally:
+            session.close()
+    
+    def _save_processing_state(self, items: list):
+        """Сдвиг водяных знаков после сохранения блоков"""
+        if not items:
+            return
+        
+        params_hash = self.detector.params_hash()
+        session = self.data_manager.db_manager.get_session()
+        try:
+            existing = {(state.symbol, state.timeframe): state
+                        for state in session.query(ProcessingState).all()}
+            for item in items:
+                state = existing.get((item['symbol'], item['timeframe']))
+                if state is None:
+                    state = ProcessingState(symbol=item['symbol'], timeframe=item['timeframe'])
+                    session.add(state)
+                state.last_candle_timestamp = item['last_candle_timestamp']
+                state.params_hash = params_hash
+            
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            self.logger.error(f"Ошибка сохранения состояния обработки: {e}")
+            raise
+        finally:
+            session.close()
+    
+    def _save_blocks_to_db(self, blocks: list, replace_ranges=None):
         """
         Сохранение найденных ордер-блоков в базу данных
         """
@@ -70,13 +497,32 @@ class BlockProcessor:
             # Очищаем старые неподтвержденные блоки
             session.query(OrderBlock).filter(OrderBlock.is_confirmed == False).delete()
             
+            # Удаляем блоки из окон пересчета - они будут записаны заново
+            replaced_ids = []
+            for symbol, timeframe, replace_from in replace_ranges or []:
+                ids = [row.id for row in session.query(OrderBlock.id).filter(
+                    OrderBlock.symbol == symbol,
+                    OrderBlock.timeframe == timeframe,
+                    OrderBlock.timestamp >= replace_from
+                )]
+                if ids:
+                    session.query(OrderBlock).filter(OrderBlock.id.in_(ids)).delete(synchronize_session=False)
+                    replaced_ids.extend(ids)
+            
             # Добавляем новые блоки
+            saved = []
             for block_data in blocks:
                 block = OrderBlock(**block_data)
                 session.add(block)
+                saved.append(block)
             
+            session.flush()
+            saved_dicts = [block.to_dict() for block in saved]
             session.commit()
+            self.zone_monitor.retire_blocks(replaced_ids)
+            self.zone_monitor.add_blocks(saved_dicts)
             self.logger.info(f"Сохранено {len(blocks)} ордер-блоков в БД")
+            return saved_dicts, replaced_ids
             
         except Exception as e:
             session.rollback()
@@ -85,7 +531,90 @@ class BlockProcessor:
         finally:
             session.close()
     
-    def get_confirmed_blocks(self, symbol=None, timeframe=None):
+    def update_lifecycle(self, symbol=None):
+        """
+        Обновление статусов блоков: возврат в зону, пробой, достижение цели
+        """
+        try:
+            updates = self.lifecycle.update_all(symbol)
+        except Exception as e:
+            self.logger.error(f"Ошибка обновления жизненного цикла блоков: {e}")
+            return 0
+        
+        # Отработанные зоны больше не участвуют в ценовых оповещениях
+        retired = [update['id'] for update in updates if update['status'] != 'ACTIVE']
+        self.zone_monitor.retire_blocks(retired)
+        return len(updates)
+    
+    def update_snapshots(self, series):
+        """
+        Сборка фрагментов графика подтвержденных блоков рядов (symbol, timeframe)
+        """
+        try:
+            return self.snapshots.update_series(series)
+        except Exception as e:
+            self.logger.error(f"Ошибка обновления фрагментов графика: {e}")
+            return 0
+    
+    def get_chart_snapshot(self, block_id):
+        """
+        Фрагмент графика блока для отображения (None, если фрагмента нет)
+        """
+        return self.snapshots.get(block_id)
+    
+    def publish_snapshot(self):
+        """
+        Публикация снимка блоков для интерфейса: интерфейс переключается
+        на него целиком и не видит промежуточных состояний пересборки
+        """
+        try:
+            return self.publisher.publish()
+        except Exception as e:
+            self.logger.error(f"Ошибка публикации снимка БД: {e}")
+            return None
+    
+    def update_confluence(self, symbol=None):
+        """
+        Пересчет совпадений зон между таймфреймами
+        """
+        try:
+            return self.confluence.update_all(symbol)
+        except Exception as e:
+            self.logger.error(f"Ошибка расчета совпадений таймфреймов: {e}")
+            return 0
+    
+    def load_zone_index(self):
+        """
+        Заполнение индекса зон активными подтвержденными блоками из БД
+        """
+        blocks = self.get_confirmed_blocks(active_only=True)
+        self.zone_monitor.rebuild(blocks)
+        self._zone_index_loaded = True
+        self.logger.info(f"В индекс зон загружено {len(self.zone_monitor)} блоков")
+        return len(self.zone_monitor)
+    
+    def check_prices(self, prices: dict) -> list:
+        """
+        Проверка текущих цен {symbol: price} по индексу зон: события TOUCH/APPROACH
+        передаются подписчикам zone_monitor.add_callback и возвращаются списком
+        """
+        if not self._zone_index_loaded:
+            self.load_zone_index()
+        
+        events = []
+        for symbol, price in prices.items():
+            if price and symbol in self.zone_monitor.trees:
+                events.extend(self.zone_monitor.on_price(symbol, price))
+        return events
+    
+    def poll_prices(self, bybit_api) -> list:
+        """
+        Проверка зон по последним ценам всех пар: один запрос tickers
+        """
+        tickers = bybit_api.get_tickers()
+        return self.check_prices({ticker['symbol']: ticker['last_price'] for ticker in tickers})
+    
+    def get_confirmed_blocks(self, symbol=None, timeframe=None, active_only=False, rank_by_confluence=False):
         """
         Получение подтвержденных ордер-блоков из БД
         """
@@ -93,12 +622,19 @@ class BlockProcessor:
         try:
             query = session.query(OrderBlock).filter(OrderBlock.is_confirmed == True)
             
+            if active_only:
+                query = query.filter(OrderBlock.status == 'ACTIVE')
             if symbol:
                 query = query.filter(OrderBlock.symbol == symbol)
             if timeframe:
                 query = query.filter(OrderBlock.timeframe == timeframe)
             
-            blocks = query.order_by(OrderBlock.timestamp.desc()).all()
+            if rank_by_confluence:
+                query = query.order_by(OrderBlock.confluence_score.desc(), OrderBlock.timestamp.desc())
+            else:
+                query = query.order_by(OrderBlock.timestamp.desc())
+            
+            blocks = query.all()
             return [block.to_dict() for block in blocks]
             
         except Exception as e:
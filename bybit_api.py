@@ -4,13 +4,19 @@ import pandas as pd
 from datetime import datetime, timedelta
 import time
 import logging
+import threading
 from typing import List, Dict, Optional
+from config import Config
 
 class BybitAPI:
     def __init__(self, config=None):
         self.base_url = "https://api.bybit.com"
         self.config = config or {}
         self.logger = logging.getLogger(__name__)
+        # Лимит запросов общий для всех потоков, использующих этот клиент
+        self.min_request_interval = 1.0 / Config.MAX_REQUESTS_PER_SECOND
+        self._next_request_at = 0.0
+        self._rate_lock = threading.Lock()
         
     def get_kline_data(self, symbol: str, interval: str, 
                       start_time: Optional[int] = None, 
@@ -33,7 +39,8 @@ class BybitAPI:
             if end_time:
                 params['end'] = end_time
             
-            response = requests.get(self.base_url + endpoint, params=params)
+            self._throttle()
+            response = requests.get(self.base_url + endpoint, params=params, timeout=Config.REQUEST_TIMEOUT)
             data = response.json()
             
             if data['retCode'] != 0:
@@ -80,8 +87,6 @@ class BybitAPI:
             all_klines.extend(klines)
             current_start = klines[-1]['timestamp'] + timedelta(minutes=self._interval_to_minutes(interval))
             
-            time.sleep(0.1)  # Rate limiting
-            
         return all_klines
     
     def get_symbols_info(self) -> List[str]:
@@ -92,7 +97,8 @@ class BybitAPI:
             endpoint = "/v5/market/instruments-info"
             params = {'category': 'spot'}
             
-            response = requests.get(self.base_url + endpoint, params=params)
+            self._throttle()
+            response = requests.get(self.base_url + endpoint, params=params, timeout=Config.REQUEST_TIMEOUT)
             data = response.json()
             
             if data['retCode'] != 0:
@@ -108,11 +114,43 @@ class BybitAPI:
             self.logger.error(f"Error fetching symbols info: {e}")
             return []
     
+    def get_tickers(self, category: str = 'spot') -> List[Dict]:
+        """
+        Получить 24-часовую статистику по всем символам одним запросом
+        """
+        try:
+            endpoint = "/v5/market/tickers"
+            params = {'category': category}
+            
+            self._throttle()
+            response = requests.get(self.base_url + endpoint, params=params, timeout=Config.REQUEST_TIMEOUT)
+            data = response.json()
+            
+            if data['retCode'] != 0:
+                self.logger.error(f"Bybit API error: {data['retMsg']}")
+                return []
+            
+            return [{
+                'symbol': item['symbol'],
+                'last_price': float(item.get('lastPrice') or 0),
+                'volume_24h': float(item.get('volume24h') or 0),
+                'turnover_24h': float(item.get('turnover24h') or 0)
+            } for item in data['result']['list']]
+            
+        except Exception as e:
+            self.logger.error(f"Error fetching tickers: {e}")
+            return []
+    
+    def _throttle(self):
+        """Ожидание очередного слота запроса (rate limiting)"""
+        with self._rate_lock:
+            now = time.monotonic()
+            wait = self._next_request_at - now
+            self._next_request_at = max(now, self._next_request_at) + self.min_request_interval
+        
+        if wait > 0:
+            time.sleep(wait)
+    
     def _interval_to_minutes(self, interval: str) -> int:
         """Конвертировать интервал в минуты"""
-        interval_map = {
-            '1': 1, '3': 3, '5': 5, '15': 15, '30': 30,
-            '60': 60, '120': 120, '240': 240, '360': 360,
-            'D': 1440, 'W': 10080, 'M': 43200
-        }
-        return interval_map.get(interval, 1)
+        return Config.INTERVAL_MINUTES.get(interval, 1)
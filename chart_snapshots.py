@@ -0,0 +1,153 @@
+# chart_snapshots.py
+import json
+import logging
+import numpy as np
+from datetime import timedelta
+from typing import Dict, Iterable, Optional
+from sqlalchemy import or_
+from config import Config
+from models import ChartSnapshot, KlineData, OrderBlock
+from utils.helpers import pack_candles, unpack_candles
+
+class ChartSnapshotStore:
+    """
+    Фрагменты графика подтвержденных блоков в промежуточной БД.
+    Для каждого блока сохраняется окно из bars_before свечей до свечи блока
+    и bars_after после нее, так что показ блока - чтение одной строки
+    без запроса к таблице свечей. Окно, которому пока не хватает свечей
+    после блока, пересобирается при следующей обработке ряда.
+    """
+
+    # Запас по времени на пропуски в данных при чтении свечей вокруг блоков
+    GAP_MARGIN = 2
+
+    def __init__(self, db_manager, bars_before: Optional[int] = None, bars_after: Optional[int] = None):
+        self.db_manager = db_manager
+        self.bars_before = Config.CHART_BARS_BEFORE if bars_before is None else bars_before
+        self.bars_after = Config.CHART_BARS_AFTER if bars_after is None else bars_after
+        self.logger = logging.getLogger(__name__)
+
+    def update_series(self, series: Iterable[tuple]) -> int:
+        """
+        Сборка недостающих и незаполненных фрагментов для рядов (symbol, timeframe)
+        и удаление фрагментов удаленных или неподтвержденных блоков.
+        Возвращает число записанных фрагментов
+        """
+        session = self.db_manager.get_session()
+        try:
+            self._delete_stale(session)
+            written = 0
+            for symbol, timeframe in sorted(set(series)):
+                written += self._update_one(session, symbol, timeframe)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            self.logger.error(f"Ошибка сохранения фрагментов графика: {e}")
+            raise
+        finally:
+            session.close()
+
+        if written:
+            self.logger.info(f"Сохранено {written} фрагментов графика")
+        return written
+
+    def get(self, block_id: int) -> Optional[Dict]:
+        """Фрагмент блока: {'block', 'meta', 'candles'} или None, если фрагмента нет"""
+        session = self.db_manager.get_session()
+        try:
+            row = session.query(ChartSnapshot, OrderBlock).join(
+                OrderBlock, OrderBlock.id == ChartSnapshot.block_id
+            ).filter(ChartSnapshot.block_id == block_id).first()
+            if row is None:
+                return None
+            snapshot, block = row
+            return {
+                'block': block.to_dict(),
+                'meta': json.loads(snapshot.meta or '{}'),
+                'candles': unpack_candles(snapshot.data)
+            }
+        finally:
+            session.close()
+
+    def _delete_stale(self, session):
+        """Фрагменты блоков, которые удалены или перестали быть подтвержденными"""
+        confirmed_ids = session.query(OrderBlock.id).filter(OrderBlock.is_confirmed == True)
+        session.query(ChartSnapshot).filter(
+            ~ChartSnapshot.block_id.in_(confirmed_ids)
+        ).delete(synchronize_session=False)
+
+    def _update_one(self, session, symbol: str, timeframe: str) -> int:
+        rows = session.query(OrderBlock, ChartSnapshot).outerjoin(
+            ChartSnapshot, ChartSnapshot.block_id == OrderBlock.id
+        ).filter(
+            OrderBlock.symbol == symbol,
+            OrderBlock.timeframe == timeframe,
+            OrderBlock.is_confirmed == True,
+            or_(ChartSnapshot.id == None, ChartSnapshot.is_complete == False)
+        ).all()
+        if not rows:
+            return 0
+
+        # Свечи читаются по индексу (symbol, timeframe, timestamp) одним запросом
+        # на группу блоков с пересекающимися окнами, а не всей историей ряда
+        interval = timedelta(minutes=Config.INTERVAL_MINUTES.get(timeframe, 1))
+        before = interval * self.bars_before * self.GAP_MARGIN
+        after = interval * self.bars_after * self.GAP_MARGIN
+        ranges = []
+        for timestamp in sorted(block.timestamp for block, _ in rows):
+            if ranges and timestamp - before <= ranges[-1][1]:
+                ranges[-1][1] = timestamp + after
+            else:
+                ranges.append([timestamp - before, timestamp + after])
+
+        candles = []
+        bounds = []
+        for since, until in ranges:
+            bounds.append(len(candles))
+            candles.extend(session.query(
+                KlineData.timestamp, KlineData.open, KlineData.high,
+                KlineData.low, KlineData.close, KlineData.volume
+            ).filter(
+                KlineData.symbol == symbol,
+                KlineData.timeframe == timeframe,
+                KlineData.timestamp >= since,
+                KlineData.timestamp <= until
+            ).order_by(KlineData.timestamp).all())
+        if not candles:
+            return 0
+
+        times = np.array([candle[0] for candle in candles], dtype='datetime64[s]')
+        values = np.array([candle[1:] for candle in candles], dtype=float)
+        bounds = np.array(bounds + [len(candles)])
+
+        written = 0
+        for block, snapshot in rows:
+            position = int(np.searchsorted(times, np.datetime64(block.timestamp, 's')))
+            if position >= len(times) or times[position] != np.datetime64(block.timestamp, 's'):
+                self.logger.warning(f"Нет свечи блока #{block.id} {symbol} ({timeframe}), фрагмент не создан")
+                continue
+
+            # Окно не выходит за пределы прочитанного диапазона своей группы
+            segment = int(np.searchsorted(bounds, position, side='right')) - 1
+            start = max(int(bounds[segment]), position - self.bars_before)
+            end = min(int(bounds[segment + 1]), position + self.bars_after + 1)
+            window = values[start:end]
+            meta = {
+                'block_index': position - start,
+                'bars_before': position - start,
+                'bars_after': end - position - 1,
+                'first_timestamp': str(times[start]),
+                'last_timestamp': str(times[end - 1]),
+                'price_low': float(np.nanmin(window[:, 2])),
+                'price_high': float(np.nanmax(window[:, 1]))
+            }
+
+            if snapshot is None:
+                snapshot = ChartSnapshot(block_id=block.id, symbol=symbol, timeframe=timeframe)
+                session.add(snapshot)
+            snapshot.candle_count = end - start
+            snapshot.is_complete = meta['bars_after'] >= self.bars_after
+            snapshot.data = pack_candles(times[start:end], *window.T)
+            snapshot.meta = json.dumps(meta)
+            written += 1
+        return written
@@ -0,0 +1,164 @@
+# collection_scheduler.py
+import heapq
+import logging
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from config import Config
+from data_collector import DataCollector
+
+# Недельные свечи Bybit открываются в понедельник 00:00 UTC, эпоха началась в четверг
+WEEK_OFFSET_SECONDS = 4 * 86400
+
+class CollectionScheduler:
+    """
+    Сбор данных по закрытию свечей. Для каждого таймфрейма известны границы
+    закрытия в UTC, сразу после границы загружаются только что закрытые свечи.
+    Запросы по символам разносятся по окну spread_seconds со случайным сдвигом,
+    а между границами запросы не выполняются: новой закрытой свечи там быть не может.
+    Нижние уровни ликвидности обновляются не чаще своего интервала (см. UniverseManager).
+    """
+
+    def __init__(self, collector: Optional[DataCollector] = None, db_path="data/smat.db",
+                 timeframes: Optional[List[str]] = None, close_delay: float = 3.0,
+                 spread_seconds: float = 60.0, days_back: int = 1, workers: Optional[int] = None,
+                 on_collected: Optional[Callable] = None):
+        self.collector = collector or DataCollector(db_path)
+        self.timeframes = list(timeframes or Config.COLLECT_TIMEFRAMES)
+        for timeframe in self.timeframes:
+            self.period_seconds(timeframe)
+        # Биржа публикует закрытую свечу с небольшой задержкой после границы
+        self.close_delay = close_delay
+        self.spread_seconds = spread_seconds
+        self.days_back = days_back
+        self.workers = workers
+        # on_collected(boundary, report) вызывается после каждой пачки загрузок
+        self.on_collected = on_collected
+        self.stats = {'batches': 0, 'pairs': 0, 'stored': 0, 'failed': 0}
+        self._tasks = []
+        self._sequence = 0
+        self._next_boundary: Dict[str, float] = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self.logger = logging.getLogger(__name__)
+
+    @staticmethod
+    def period_seconds(timeframe: str) -> int:
+        """Длительность свечи в секундах (месячные свечи не поддерживаются - переменная длина)"""
+        if timeframe == 'M' or timeframe not in Config.INTERVAL_MINUTES:
+            raise ValueError(f"Таймфрейм {timeframe} не поддерживается планировщиком")
+        return Config.INTERVAL_MINUTES[timeframe] * 60
+
+    @classmethod
+    def next_close(cls, timeframe: str, now: float) -> float:
+        """Ближайшая граница закрытия свечи строго после now (секунды UTC)"""
+        period = cls.period_seconds(timeframe)
+        offset = WEEK_OFFSET_SECONDS if timeframe == 'W' else 0
+        return offset + (int((now - offset) // period) + 1) * period
+
+    def start(self):
+        """Запуск планировщика в фоновом потоке"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+        self.logger.info(f"Планировщик сбора запущен для таймфреймов {self.timeframes}")
+
+    def stop(self):
+        """Остановка планировщика"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def run(self):
+        """
+        Основной цикл. При запуске догружаются свечи, закрытые на последней
+        границе каждого таймфрейма, дальше - по мере закрытия новых
+        """
+        now = time.time()
+        for timeframe in self.timeframes:
+            upcoming = self.next_close(timeframe, now)
+            self._next_boundary[timeframe] = upcoming - self.period_seconds(timeframe)
+
+        while not self._stop.is_set():
+            now = time.time()
+            for timeframe in self.timeframes:
+                boundary = self._next_boundary[timeframe]
+                if boundary <= now:
+                    self._schedule_boundary(timeframe, boundary)
+                    self._next_boundary[timeframe] = self.next_close(timeframe, boundary)
+
+            due = []
+            while self._tasks and self._tasks[0][0] <= now:
+                due.append(heapq.heappop(self._tasks))
+            if due:
+                self._run_due(due)
+                continue
+
+            wake_at = min(self._next_boundary.values())
+            if self._tasks:
+                wake_at = min(wake_at, self._tasks[0][0])
+            self._stop.wait(max(0.0, wake_at - time.time()))
+
+    def _schedule_boundary(self, timeframe: str, boundary: float):
+        """Постановка загрузок символов после закрытия свечи таймфрейма"""
+        try:
+            universe = self.collector.universe
+            universe.refresh_if_stale()
+            # Время границы задает, у каких уровней подошел интервал обновления
+            symbols = universe.symbols_due(timeframe, boundary) if universe.get_active_symbols() else \
+                self.collector.data_manager.get_available_symbols()
+        except Exception as e:
+            self.logger.error(f"Ошибка получения списка символов: {e}")
+            return
+
+        spread = min(self.spread_seconds, self.period_seconds(timeframe) * 0.2)
+        for symbol in symbols:
+            due_at = boundary + self.close_delay + random.uniform(0, spread)
+            self._sequence += 1
+            heapq.heappush(self._tasks, (due_at, self._sequence, boundary, symbol, timeframe))
+
+    def _run_due(self, due: list):
+        """Загрузка наступивших задач, сгруппированных по границе закрытия"""
+        by_boundary = {}
+        for _, _, boundary, symbol, timeframe in due:
+            by_boundary.setdefault(boundary, []).append((symbol, timeframe))
+
+        for boundary, pairs in sorted(by_boundary.items()):
+            try:
+                report = self.collector.collect_pairs(
+                    pairs, self.days_back, self.workers,
+                    end_time=datetime.fromtimestamp(boundary)
+                )
+            except Exception as e:
+                self.logger.error(f"Ошибка сбора на границе {datetime.utcfromtimestamp(boundary)}: {e}")
+                continue
+
+            self.stats['batches'] += 1
+            self.stats['pairs'] += report['total']
+            self.stats['stored'] += report['stored']
+            self.stats['failed'] += report['failed']
+            if self.on_collected:
+                self.on_collected(boundary, report)
+
+
+if __name__ == "__main__":
+    from block_processor import BlockProcessor
+
+    logging.basicConfig(level=logging.INFO)
+    logger = logging.getLogger(__name__)
+    processor = BlockProcessor()
+    processor.zone_monitor.add_callback(
+        lambda event: logger.info(f"Зона {event['block']['id']} {event['symbol']} ({event['block']['timeframe']}): "
+                                  f"{event['type']} по цене {event['price']}, {event['distance_pct']:.2f}%"))
+    # После каждой пачки загрузок цены всех пар проверяются по индексу зон
+    scheduler = CollectionScheduler(
+        on_collected=lambda boundary, report: processor.poll_prices(scheduler.collector.bybit_api))
+    try:
+        scheduler.run()
+    except KeyboardInterrupt:
+        pass
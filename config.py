@@ -22,10 +22,52 @@ class Config:
     REQUEST_TIMEOUT = int(os.getenv('REQUEST_TIMEOUT', '30'))
     MAX_RETRIES = int(os.getenv('MAX_RETRIES', '3'))
     RATE_LIMIT_DELAY = float(os.getenv('RATE_LIMIT_DELAY', '0.2'))
+    # Общий лимит запросов к бирже для всех потоков загрузки
+    MAX_REQUESTS_PER_SECOND = float(os.getenv('MAX_REQUESTS_PER_SECOND', '20'))
+    DOWNLOAD_WORKERS = int(os.getenv('DOWNLOAD_WORKERS', '8'))
+    
+    # Число процессов для поиска ордер-блоков (1 - последовательный режим)
+    PROCESS_WORKERS = int(os.getenv('PROCESS_WORKERS', '1'))
     
     # Supported intervals
     SUPPORTED_INTERVALS = ['1', '3', '5', '15', '30', '60', '120', '240', '360', '720', 'D', 'W', 'M']
     
+    # Уровни ликвидности: (число символов по убыванию оборота за 24ч,
+    # минут между обновлениями; 0 - на каждой границе свечи). Интервал не зависит
+    # от таймфрейма: свечи длиннее интервала обновляются на каждой границе.
+    # Символы ниже последнего уровня неактивны
+    UNIVERSE_TIERS = [(50, 0), (150, 15), (300, 60)]
+    MIN_TURNOVER_24H = float(os.getenv('MIN_TURNOVER_24H', '100000'))
+    UNIVERSE_REFRESH_MINUTES = int(os.getenv('UNIVERSE_REFRESH_MINUTES', '60'))
+    
+    # Таймфреймы, которые обновляет сборщик данных
+    COLLECT_TIMEFRAMES = os.getenv('COLLECT_TIMEFRAMES', '5,15,60,240,D').split(',')
+    
+    # Окно фрагмента графика блока: свечей до и после свечи блока
+    CHART_BARS_BEFORE = int(os.getenv('CHART_BARS_BEFORE', '100'))
+    CHART_BARS_AFTER = int(os.getenv('CHART_BARS_AFTER', '100'))
+    
+    # Локальный HTTP-сервис чтения блоков (query_server.py)
+    QUERY_SERVER_HOST = os.getenv('QUERY_SERVER_HOST', '127.0.0.1')
+    QUERY_SERVER_PORT = int(os.getenv('QUERY_SERVER_PORT', '8765'))
+    
+    # Цвета темной темы интерфейса (gui/styles.py)
+    COLORS = {
+        'background': '#1A202C',
+        'panel': '#2D3748',
+        'border': '#4A5568',
+        'primary': '#3182CE',
+        'text': '#E2E8F0',
+        'text_secondary': '#A0AEC0',
+    }
+    
+    # Длительность интервалов в минутах
+    INTERVAL_MINUTES = {
+        '1': 1, '3': 3, '5': 5, '15': 15, '30': 30,
+        '60': 60, '120': 120, '240': 240, '360': 360, '720': 720,
+        'D': 1440, 'W': 10080, 'M': 43200
+    }
+    
     @classmethod
     def validate(cls):
         """Проверка обязательных настроек"""
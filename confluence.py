@@ -0,0 +1,107 @@
+# confluence.py
+import heapq
+import logging
+import pandas as pd
+from typing import Optional
+from config import Config
+from models import OrderBlock
+from zone_index import IntervalTree
+
+class ConfluenceAnalyzer:
+    """
+    Поиск совпадений ордер-блоков разных таймфреймов одного символа.
+    Блок младшего таймфрейма считается вложенным в блок старшего, если их
+    ценовые зоны пересекаются, направления совпадают и младший блок
+    сформировался, пока зона старшего еще не была пробита.
+    """
+
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+        self.logger = logging.getLogger(__name__)
+
+    def update_all(self, symbol: Optional[str] = None) -> int:
+        """
+        Пересчет оценки совпадений для всех блоков и пакетная запись в БД
+        """
+        blocks = self._load_blocks(symbol)
+        if blocks.empty:
+            return 0
+
+        scores = self.compute_scores(blocks)
+        updates = [{'id': int(block_id), 'confluence_score': int(score)}
+                   for block_id, score in scores.items()]
+
+        session = self.db_manager.get_session()
+        try:
+            session.bulk_update_mappings(OrderBlock, updates)
+            session.commit()
+            self.logger.info(f"Обновлена оценка совпадений для {len(updates)} ордер-блоков")
+            return len(updates)
+        except Exception as e:
+            session.rollback()
+            self.logger.error(f"Ошибка записи оценки совпадений: {e}")
+            raise
+        finally:
+            session.close()
+
+    def compute_scores(self, blocks: pd.DataFrame) -> pd.Series:
+        """
+        Оценка совпадений - число других таймфреймов, с блоками которых
+        связан данный блок (в любую сторону: старший содержит или младший вложен)
+        """
+        linked = {int(block_id): set() for block_id in blocks['id']}
+
+        for _, group in blocks.groupby(['symbol', 'direction'], sort=False):
+            for lower, higher in self._sweep(group):
+                linked[lower['id']].add(higher['timeframe'])
+                linked[higher['id']].add(lower['timeframe'])
+
+        return pd.Series({block_id: len(timeframes) for block_id, timeframes in linked.items()},
+                         dtype='int64')
+
+    def _sweep(self, group: pd.DataFrame):
+        """
+        Проход по времени: активные зоны хранятся в дереве интервалов по цене,
+        зона удаляется после пробоя. Каждый новый блок сравнивается только
+        с пересекающимися по цене активными зонами старших таймфреймов.
+        """
+        group = group.assign(
+            minutes=group['timeframe'].map(Config.INTERVAL_MINUTES).fillna(1),
+            end=group['invalidated_at'].fillna(pd.Timestamp.max)
+        )
+        # При одинаковом времени старшие таймфреймы добавляются первыми
+        group = group.sort_values(['timestamp', 'minutes'], ascending=[True, False])
+
+        tree = IntervalTree()
+        expiry = []
+
+        for row in group.itertuples(index=False):
+            while expiry and expiry[0][0] < row.timestamp:
+                _, expired_id = heapq.heappop(expiry)
+                tree.remove(expired_id)
+
+            block = {'id': int(row.id), 'timeframe': row.timeframe, 'minutes': row.minutes}
+            for active in tree.overlap(row.imbalance_low, row.imbalance_high):
+                if active['minutes'] > block['minutes']:
+                    yield block, active
+
+            tree.insert(block['id'], row.imbalance_low, row.imbalance_high, block)
+            heapq.heappush(expiry, (row.end, block['id']))
+
+    def _load_blocks(self, symbol: Optional[str] = None) -> pd.DataFrame:
+        """Блоки с ценовыми зонами для расчета совпадений"""
+        session = self.db_manager.get_session()
+        try:
+            query = session.query(
+                OrderBlock.id, OrderBlock.symbol, OrderBlock.timeframe, OrderBlock.timestamp,
+                OrderBlock.imbalance_high, OrderBlock.imbalance_low,
+                OrderBlock.direction, OrderBlock.invalidated_at
+            ).filter(OrderBlock.imbalance_low != None, OrderBlock.imbalance_high != None)
+
+            if symbol:
+                query = query.filter(OrderBlock.symbol == symbol)
+
+            return pd.read_sql(query.statement, self.db_manager.engine,
+                               parse_dates=['timestamp', 'invalidated_at'])
+        finally:
+            session.close()
@@ -0,0 +1,152 @@
+# core/data_manager.py
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import pandas as pd
+from sqlalchemy import func
+
+from models import DatabaseManager, KlineData, Symbol
+
+class DataManager:
+    """
+    Доступ обработки к свечам и символам поверх models.DatabaseManager.
+    Сессия SQLAlchemy открывается на каждый вызов, поэтому методы можно
+    вызывать из разных потоков (запись SQLite - по одному писателю)
+    """
+
+    QUOTE_CURRENCY = 'USDT'
+
+    def __init__(self, db_path="data/smat.db"):
+        self.db_manager = DatabaseManager(db_path)
+        self.db_manager.init_database()
+        self.logger = logging.getLogger(__name__)
+
+    def get_klines_df(self, symbol: str, timeframe: str, limit: int = 1000,
+                      until: Optional[datetime] = None) -> pd.DataFrame:
+        """
+        Последние limit свечей ряда (с until - открытых не позже until)
+        в хронологическом порядке, индекс - timestamp, колонки open/high/low/close/volume
+        """
+        session = self.db_manager.get_session()
+        try:
+            query = session.query(
+                KlineData.timestamp, KlineData.open, KlineData.high,
+                KlineData.low, KlineData.close, KlineData.volume
+            ).filter(
+                KlineData.symbol == symbol,
+                KlineData.timeframe == timeframe
+            )
+            if until is not None:
+                query = query.filter(KlineData.timestamp <= until)
+            query = query.order_by(KlineData.timestamp.desc()).limit(limit)
+
+            df = pd.read_sql(query.statement, self.db_manager.engine,
+                             index_col='timestamp', parse_dates=['timestamp'])
+            return df.sort_index()
+        finally:
+            session.close()
+
+    def store_klines(self, symbol: str, timeframe: str, klines: List[Dict]) -> int:
+        """
+        Сохранение свечей в формате BybitAPI.get_kline_data. Свечи, которые
+        уже есть в БД (то же время открытия), пропускаются.
+        Возвращает число сохраненных свечей
+        """
+        if not klines:
+            return 0
+
+        session = self.db_manager.get_session()
+        try:
+            timestamps = [kline['timestamp'] for kline in klines]
+            existing = {row.timestamp for row in session.query(KlineData.timestamp).filter(
+                KlineData.symbol == symbol,
+                KlineData.timeframe == timeframe,
+                KlineData.timestamp >= min(timestamps),
+                KlineData.timestamp <= max(timestamps)
+            )}
+
+            rows = []
+            for kline in klines:
+                if kline['timestamp'] in existing:
+                    continue
+                existing.add(kline['timestamp'])
+                rows.append({
+                    'symbol': symbol,
+                    'timeframe': timeframe,
+                    'timestamp': kline['timestamp'],
+                    'open': kline['open'],
+                    'high': kline['high'],
+                    'low': kline['low'],
+                    'close': kline['close'],
+                    'volume': kline.get('volume'),
+                    'turnover': kline.get('turnover')
+                })
+
+            if rows:
+                session.bulk_insert_mappings(KlineData, rows)
+            session.commit()
+            return len(rows)
+        except Exception as e:
+            session.rollback()
+            self.logger.error(f"Ошибка сохранения свечей {symbol} ({timeframe}): {e}")
+            raise
+        finally:
+            session.close()
+
+    def get_last_timestamp(self, symbol: str, timeframe: str) -> Optional[datetime]:
+        """Время последней сохраненной свечи ряда или None, если свечей нет"""
+        session = self.db_manager.get_session()
+        try:
+            return session.query(func.max(KlineData.timestamp)).filter(
+                KlineData.symbol == symbol,
+                KlineData.timeframe == timeframe
+            ).scalar()
+        finally:
+            session.close()
+
+    def get_available_symbols(self) -> List[str]:
+        """
+        Активные символы из справочника и символы, по которым уже есть свечи
+        (справочник может быть еще не заполнен)
+        """
+        session = self.db_manager.get_session()
+        try:
+            symbols = {row.symbol for row in session.query(Symbol.symbol).filter(Symbol.is_active == True)}
+            symbols.update(row.symbol for row in session.query(KlineData.symbol).distinct())
+            return sorted(symbols)
+        finally:
+            session.close()
+
+    def update_symbols_from_bybit(self, bybit_api) -> int:
+        """
+        Обновление справочника символов по списку торговых пар биржи:
+        новые пары добавляются, снятые с торгов помечаются неактивными.
+        Возвращает число активных символов
+        """
+        listed = bybit_api.get_symbols_info()
+        if not listed:
+            self.logger.warning("Биржа не вернула список символов, справочник не изменен")
+            return 0
+
+        session = self.db_manager.get_session()
+        try:
+            listed = set(listed)
+            known = {symbol.symbol: symbol for symbol in session.query(Symbol).all()}
+            for name, symbol in known.items():
+                symbol.is_active = name in listed
+            for name in sorted(listed - known.keys()):
+                base = name[:-len(self.QUOTE_CURRENCY)] if name.endswith(self.QUOTE_CURRENCY) else name
+                session.add(Symbol(symbol=name, base_currency=base,
+                                   quote_currency=self.QUOTE_CURRENCY, is_active=True))
+
+            session.commit()
+            self.logger.info(f"Справочник символов обновлен: {len(listed)} активных, "
+                             f"{len(listed - known.keys())} новых")
+            return len(listed)
+        except Exception as e:
+            session.rollback()
+            self.logger.error(f"Ошибка обновления символов: {e}")
+            raise
+        finally:
+            session.close()
@@ -1,25 +1,56 @@
 # data_collector.py
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
-from database_manager import DataManager
+from config import Config
+from core.data_manager import DataManager
 from bybit_api import BybitAPI
+from scan_jobs import ScanJobManager
+from universe_manager import UniverseManager
 
 class DataCollector:
     def __init__(self, db_path="data/smat.db"):
         self.data_manager = DataManager(db_path)
         self.bybit_api = BybitAPI()
+        self.jobs = ScanJobManager(self.data_manager.db_manager)
+        self.universe = UniverseManager(self.data_manager.db_manager, self.bybit_api)
         self.logger = logging.getLogger(__name__)
     
     def initialize_symbols(self):
         """Инициализировать список символов"""
         self.logger.info("Инициализация списка символов...")
         self.data_manager.update_symbols_from_bybit(self.bybit_api)
+        self.universe.refresh()
+    
+    def get_active_symbols(self):
+        """Символы рабочего набора по ликвидности (все доступные, если ранжирования не было)"""
+        return self.universe.get_active_symbols() or self.data_manager.get_available_symbols()
     
     def collect_historical_data(self, symbol, timeframe, days_back=30):
-        """Собрать исторические данные за указанный период"""
+        """Собрать исторические данные за указанный период, возвращает число сохраненных свечей"""
+        klines = self.fetch_new_klines(symbol, timeframe, days_back)
+        if klines is None:
+            return 0
+        
+        if klines:
+            stored_count = self.data_manager.store_klines(symbol, timeframe, klines)
+            self.logger.info(f"Сохранено {stored_count} свечей для {symbol}")
+            return stored_count
+        
+        self.logger.warning(f"Не удалось получить данные для {symbol}")
+        return 0
+    
+    def fetch_new_klines(self, symbol, timeframe, days_back=30, end_time=None):
+        """
+        Загрузить с биржи свечи, которых еще нет в БД (без сохранения).
+        С end_time загружаются только свечи, закрытые к этому моменту.
+        Возвращает None, если данные уже актуальны
+        """
         self.logger.info(f"Сбор исторических данных для {symbol} ({timeframe}) за {days_back} дней")
         
-        end_time = datetime.now()
+        closed_only = end_time is not None
+        end_time = end_time or datetime.now()
         start_time = end_time - timedelta(days=days_back)
         
         # Проверяем последние доступные данные
@@ -27,28 +58,133 @@ class DataCollector:
         if last_timestamp:
             start_time = max(start_time, last_timestamp + timedelta(minutes=1))
         
-        if start_time >= end_time:
+        if closed_only:
+            # Последняя закрытая к end_time свеча открылась на интервал раньше
+            latest_closed = end_time - timedelta(minutes=Config.INTERVAL_MINUTES.get(timeframe, 1))
+            up_to_date = start_time > latest_closed
+        else:
+            up_to_date = start_time >= end_time
+        
+        if up_to_date:
             self.logger.info(f"Данные для {symbol} уже актуальны")
-            return
+            return None
         
         klines = self.bybit_api.get_multiple_klines(symbol, timeframe, start_time, end_time)
+        if closed_only:
+            klines = [kline for kline in klines if kline['timestamp'] < end_time]
+        return klines
+    
+    def collect_multiple_symbols(self, symbols, timeframes=None, days_back=30, workers=None):
+        """
+        Собрать данные для нескольких символов по всем таймфреймам параллельно.
+        Возвращает сводку: число успешных и неудачных пар, сохраненных свечей и ошибки
+        """
+        if timeframes is None:
+            timeframes = Config.COLLECT_TIMEFRAMES
+        elif isinstance(timeframes, str):
+            timeframes = [timeframes]
         
-        if klines:
-            stored_count = self.data_manager.store_klines(symbol, timeframe, klines)
-            self.logger.info(f"Сохранено {stored_count} свечей для {symbol}")
+        pairs = [(symbol, timeframe) for symbol in symbols for timeframe in timeframes]
+        return self.collect_pairs(pairs, days_back, workers)
+    
+    def update_all_data(self, timeframes=None, days_back=1, workers=None):
+        """
+        Обновить все данные для активных символов по всем таймфреймам
+        Обновление выполняется как сохраняемое задание и после прерывания
+        продолжается с первой необработанной пары (symbol, timeframe)
+        """
+        if timeframes is None:
+            timeframes = Config.COLLECT_TIMEFRAMES
+        elif isinstance(timeframes, str):
+            timeframes = [timeframes]
+        
+        symbols = self.get_active_symbols()
+        job_id = self.jobs.start_or_resume(
+            'update_data',
+            {'timeframes': list(timeframes), 'days_back': days_back},
+            [(symbol, timeframe) for symbol in symbols for timeframe in timeframes]
+        )
+        pending = self.jobs.pending_items(job_id)
+        self.logger.info(f"Обновление данных: {len(pending)} пар для {len(symbols)} символов")
+        
+        def on_done(index, stored_count, error):
+            self.jobs.complete_item(pending[index]['id'], stored_count, error)
+        
+        self.collect_pairs([(item['symbol'], item['timeframe']) for item in pending],
+                           days_back, workers, on_done)
+        
+        self.jobs.finish_job(job_id)
+        return self.jobs.get_progress(job_id)
+    
+    def collect_pairs(self, pairs, days_back=1, workers=None, on_done=None, end_time=None):
+        """
+        Загрузка пар (symbol, timeframe) в пуле потоков.
+        Запросы ко всем парам идут одновременно, общий темп задает лимит запросов BybitAPI.
+        Сохранение выполняется в вызывающем потоке (один писатель SQLite) и для
+        каждого символа строго в порядке входного списка: результат пары ждет,
+        пока не будут сохранены предыдущие пары того же символа.
+        on_done(index, stored_count, error) вызывается после сохранения каждой пары,
+        end_time ограничивает загрузку свечами, закрытыми к этому моменту
+        """
+        workers = workers or Config.DOWNLOAD_WORKERS
+        started = time.time()
+        report = {'total': len(pairs), 'succeeded': 0, 'failed': 0, 'stored': 0, 'errors': {}}
+        
+        symbol_order = {}
+        for index, (symbol, _) in enumerate(pairs):
+            symbol_order.setdefault(symbol, []).append(index)
+        next_position = dict.fromkeys(symbol_order, 0)
+        ready = {}
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(self.fetch_new_klines, symbol, timeframe, days_back, end_time): index
+                for index, (symbol, timeframe) in enumerate(pairs)
+            }
+            
+            for future in as_completed(futures):
+                index = futures[future]
+                ready[index] = future
+                symbol = pairs[index][0]
+                order = symbol_order[symbol]
+                
+                while next_position[symbol] < len(order) and order[next_position[symbol]] in ready:
+                    ready_index = order[next_position[symbol]]
+                    self._store_pair(pairs[ready_index], ready.pop(ready_index), ready_index, report, on_done)
+                    next_position[symbol] += 1
+        
+        elapsed = time.time() - started
+        self.logger.info(f"Сбор данных: {report['succeeded']} из {report['total']} пар за {elapsed:.1f} с, "
+                         f"сохранено {report['stored']} свечей, ошибок {report['failed']}")
+        report['elapsed'] = elapsed
+        return report
+    
+    def _store_pair(self, pair, future, index, report, on_done):
+        """Сохранение результата загрузки одной пары"""
+        symbol, timeframe = pair
+        stored_count = 0
+        error = None
+        try:
+            klines = future.result()
+            if klines:
+                stored_count = self.data_manager.store_klines(symbol, timeframe, klines)
+            elif klines is not None:
+                error = "Биржа не вернула свечей"
+                self.logger.warning(f"Не удалось получить данные для {symbol} ({timeframe})")
+        except Exception as e:
+            error = str(e)
+            self.logger.error(f"Ошибка сбора данных для {symbol} ({timeframe}): {e}")
+        
+        if error:
+            report['failed'] += 1
+            report['errors'][pair] = error
         else:
-            self.logger.warning(f"Не удалось получить данные для {symbol}")
-    
-    def collect_multiple_symbols(self, symbols, timeframe, days_back=30):
-        """Собрать данные для нескольких символов"""
-        for symbol in symbols:
-            try:
-                self.collect_historical_data(symbol, timeframe, days_back)
-            except Exception as e:
-                self.logger.error(f"Ошибка сбора данных для {symbol}: {e}")
-    
-    def update_all_data(self, timeframe='15', days_back=1):
-        """Обновить все данные для активных символов"""
-        symbols = self.data_manager.get_available_symbols()
-        self.logger.info(f"Обновление данных для {len(symbols)} символов")
-        self.collect_multiple_symbols(symbols, timeframe, days_back)
\ No newline at end of file
+            report['succeeded'] += 1
+            report['stored'] += stored_count
+        
+        if on_done:
+            on_done(index, stored_count, error)
+    
+    def get_update_progress(self, job_id=None):
+        """Прогресс задания обновления данных (по умолчанию - последнего)"""
+        return self.jobs.get_progress(job_id, kind='update_data')
\ No newline at end of file
@@ -1,16 +1,32 @@
 # data_processor.py
 import time
+import queue
 import threading
 import random
 from datetime import datetime
 from database import db
 from config import Config
+from event_bus import event_bus, CandleClosed, BlocksChanged, ConfirmationChanged
+
+_STOP = object()
 
 class DataProcessor:
-    def __init__(self):
+    """
+    Фоновый обработчик. Поток спит до следующего получения данных или до
+    события CandleClosed в шине, результаты публикуются событиями
+    BlocksChanged и ConfirmationChanged вместо опроса базы подписчиками.
+    """
+
+    # Минимальное движение цены от уровня блока для подтверждения, %
+    # (как MIN_CONFIRMATION_STRENGTH в OrderBlockDetector)
+    CONFIRMATION_MOVE_PCT = 5
+
+    def __init__(self, bus=event_bus):
         self.running = False
         self.thread = None
-        self.last_processing_time = 0
+        self.bus = bus
+        self._inbox = queue.Queue()
+        self.bus.subscribe(CandleClosed, self._on_candle_closed)
 
     def start_processing(self):
         """Запуск обработки данных в отдельном потоке"""
@@ -26,34 +42,51 @@ class DataProcessor:
     def stop_processing(self):
         """Остановка обработки данных"""
         self.running = False
+        self._inbox.put(_STOP)
         if self.thread:
             self.thread.join()
         print("DataProcessor: Фоновый обработчик остановлен.")
 
     def _processing_loop(self):
-        """Основной цикл обработки данных"""
+        """
+        Основной цикл обработки данных. Между событиями поток заблокирован
+        на очереди, так что в простое не расходует процессор
+        """
         # Первоначальное заполнение базы тестовыми данными
         if not self._has_data():
             print("DataProcessor: База пуста. Заполняю тестовыми данными...")
             db.populate_test_data()
+            self.bus.publish(BlocksChanged(added=db.get_order_blocks()))
+
+        # Блоки, подтвержденные свечами, пришедшими пока обработчик не работал
+        self._update_confirmations()
 
+        next_fetch = time.monotonic()
         while self.running:
             try:
-                current_time = time.time()
-                
-                # Имитация периодической работы (раз в 10 секунд)
-                if current_time - self.last_processing_time >= Config.REFRESH_INTERVAL:
-                    self._process_new_data()      # Имитация получения новых свечей
-                    self._process_order_blocks()  # Поиск и добавление новых блоков
-                    self._update_confirmations()  # Обновление статусов подтверждения
-                    self.last_processing_time = current_time
-                
-                time.sleep(1)  # Короткая пауза для снижения нагрузки
-                
+                event = self._inbox.get(timeout=max(0.0, next_fetch - time.monotonic()))
+            except queue.Empty:
+                event = None
+
+            if event is _STOP:
+                break
+
+            try:
+                if event is None:
+                    # Имитация периодического получения данных
+                    self._process_new_data()
+                    next_fetch = time.monotonic() + Config.REFRESH_INTERVAL
+                else:
+                    self._process_order_blocks(event)  # Поиск новых блоков по закрытой свече
+                    self._update_confirmations(event)  # Подтверждение блоков этого ряда
             except Exception as e:
                 print(f"Ошибка в цикле обработки: {e}")
                 time.sleep(5)
 
+    def _on_candle_closed(self, event):
+        """Передача события в поток обработчика"""
+        self._inbox.put(event)
+
     def _has_data(self):
         """Проверяет, есть ли в базе данные"""
         blocks = db.get_order_blocks(limit=1)
@@ -86,13 +119,14 @@ class DataProcessor:
                 
                 db.add_candle_data(symbol, timeframe, new_candle)
                 print(f"DataProcessor: Добавлена новая свеча {symbol} {timeframe}")
+                self.bus.publish(CandleClosed(symbol, timeframe, new_candle))
 
-    def _process_order_blocks(self):
-        """Поиск и добавление новых ордер-блоков (имитация)"""
+    def _process_order_blocks(self, event):
+        """Поиск и добавление новых ордер-блоков по закрытой свече (имитация)"""
         # С вероятностью 20% находим новый блок
         if random.random() < 0.2:
-            symbol = random.choice(Config.SYMBOLS)
-            timeframe = random.choice(Config.TIMEFRAMES)
+            symbol = event.symbol
+            timeframe = event.timeframe
             block_type = random.choice(['bullish', 'bearish'])
             
             # Используем реальные данные из базы для реалистичности
@@ -108,24 +142,26 @@ class DataProcessor:
                 close_time = open_time + random.randint(1800000, 3600000)
                 
                 # Добавляем новый блок (пока не подтвержденный)
-                db.add_order_block(symbol, timeframe, block_type, price_level,
-                                 open_time, close_time, confirmed=False)
+                block_id = db.add_order_block(symbol, timeframe, block_type, price_level,
+                                              open_time, close_time, confirmed=False)
                 
                 print(f"DataProcessor: Найден новый ордер-блок {symbol} {timeframe} {block_type}")
+                if block_id is not None:
+                    self.bus.publish(BlocksChanged(added=db.get_order_blocks_by_ids([block_id])))
 
-    def _update_confirmations(self):
-        """Обновление статусов подтверждения ордер-блоков (имитация)"""
-        # Получаем все неподтвержденные блоки
-        all_blocks = db.get_order_blocks(limit=100)
-        unconfirmed_blocks = [b for b in all_blocks if not b['confirmed']]
-        
-        # С вероятностью 25% подтверждаем случайный блок
-        if unconfirmed_blocks and random.random() < 0.25:
-            block_to_confirm = random.choice(unconfirmed_blocks)
-            success = db.update_order_block_confirmation(block_to_confirm['id'], True)
-            
-            if success:
-                print(f"DataProcessor: Ордер-блок {block_to_confirm['symbol']} подтвержден")
+    def _update_confirmations(self, event=None):
+        """
+        Подтверждение ожидающих блоков по свечам, пришедшим после их закрытия.
+        По событию свечи проверяются блоки ее ряда, без события - все ожидающие блоки
+        """
+        if event is None:
+            confirmed_ids = db.confirm_pending_blocks(self.CONFIRMATION_MOVE_PCT)
+        else:
+            confirmed_ids = db.confirm_pending_blocks(self.CONFIRMATION_MOVE_PCT, event.symbol, event.timeframe)
+
+        if confirmed_ids:
+            print(f"DataProcessor: Подтверждено ордер-блоков: {len(confirmed_ids)}")
+            self.bus.publish(ConfirmationChanged({block_id: True for block_id in confirmed_ids}))
 
     def get_order_blocks(self):
         """Получение списка ордер-блоков из базы данных"""
@@ -133,7 +169,10 @@ class DataProcessor:
 
     def update_order_block_confirmation(self, block_id, confirmed):
         """Обновление статуса подтверждения ордер-блока"""
-        return db.update_order_block_confirmation(block_id, confirmed)
+        success = db.update_order_block_confirmation(block_id, confirmed)
+        if success:
+            self.bus.publish(ConfirmationChanged({block_id: confirmed}))
+        return success
 
 # Глобальный экземпляр обработчика данных
 data_processor = DataProcessor()
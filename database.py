@@ -1,6 +1,7 @@
 # database.py
 import sqlite3
 import random
+import numpy as np
 import time
 from datetime import datetime
 from config import Config
@@ -46,6 +47,12 @@ class Database:
         )
         ''')
 
+        # Частичный индекс по неподтвержденным блокам для движка подтверждения
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS ix_order_blocks_pending
+        ON order_blocks (symbol, timeframe) WHERE confirmed = 0
+        ''')
+
         conn.commit()
         conn.close()
 
@@ -69,7 +76,7 @@ class Database:
             conn.close()
 
     def add_order_block(self, symbol, timeframe, block_type, price_level, open_time, close_time, confirmed=False):
-        """Добавление найденного ордер-блока"""
+        """Добавление найденного ордер-блока, возвращает id нового блока"""
         conn = sqlite3.connect(self.db_name)
         cursor = conn.cursor()
         try:
@@ -79,8 +86,10 @@ class Database:
             VALUES (?, ?, ?, ?, ?, ?, ?)
             ''', (symbol, timeframe, block_type, price_level, open_time, close_time, confirmed))
             conn.commit()
+            return cursor.lastrowid
         except Exception as e:
             print(f"Ошибка при добавлении ордер-блока: {e}")
+            return None
         finally:
             conn.close()
 
@@ -96,27 +105,48 @@ class Database:
             ORDER BY created_at DESC
             LIMIT ?
             ''', (limit,))
-            
-            blocks = []
-            for row in cursor.fetchall():
-                blocks.append({
-                    'id': row[0],
-                    'symbol': row[1],
-                    'timeframe': row[2],
-                    'block_type': row[3],
-                    'price_level': row[4],
-                    'open_time': row[5],
-                    'close_time': row[6],
-                    'confirmed': bool(row[7]),
-                    'created_at': row[8]
-                })
-            return blocks
+            return [self._block_from_row(row) for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"Ошибка при получении ордер-блоков: {e}")
+            return []
+        finally:
+            conn.close()
+
+    def get_order_blocks_by_ids(self, block_ids):
+        """Получение ордер-блоков по списку id"""
+        if not block_ids:
+            return []
+        conn = sqlite3.connect(self.db_name)
+        cursor = conn.cursor()
+        try:
+            placeholders = ','.join('?' * len(block_ids))
+            cursor.execute(f'''
+            SELECT id, symbol, timeframe, block_type, price_level,
+                   open_time, close_time, confirmed, created_at
+            FROM order_blocks
+            WHERE id IN ({placeholders})
+            ''', list(block_ids))
+            return [self._block_from_row(row) for row in cursor.fetchall()]
         except Exception as e:
             print(f"Ошибка при получении ордер-блоков: {e}")
             return []
         finally:
             conn.close()
 
+    @staticmethod
+    def _block_from_row(row):
+        return {
+            'id': row[0],
+            'symbol': row[1],
+            'timeframe': row[2],
+            'block_type': row[3],
+            'price_level': row[4],
+            'open_time': row[5],
+            'close_time': row[6],
+            'confirmed': bool(row[7]),
+            'created_at': row[8]
+        }
+
     def get_latest_candle_time(self, symbol, timeframe):
         """Получение времени последней свечи для пары и таймфрейма"""
         conn = sqlite3.connect(self.db_name)
@@ -180,6 +210,75 @@ class Database:
         finally:
             conn.close()
 
+    def confirm_pending_blocks(self, min_move_pct, symbol=None, timeframe=None):
+        """
+        Подтверждение всех ожидающих блоков за один проход: блок подтвержден,
+        если после его закрытия цена закрытия ушла от уровня блока в его
+        направлении не меньше чем на min_move_pct процентов.
+        Для каждого ряда свечи читаются один раз, максимум и минимум закрытий
+        после каждой свечи считаются накоплением с конца, а проверка блока - это
+        бинарный поиск его времени закрытия, поэтому время не зависит от числа блоков.
+        Возвращает id подтвержденных блоков
+        """
+        series_filter = ''
+        params = ()
+        if symbol is not None and timeframe is not None:
+            series_filter = 'AND symbol = ? AND timeframe = ?'
+            params = (symbol, timeframe)
+
+        conn = sqlite3.connect(self.db_name)
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f'''
+            SELECT id, symbol, timeframe, block_type, price_level, close_time
+            FROM order_blocks
+            WHERE confirmed = 0 {series_filter}
+            ''', params)
+            pending = {}
+            for row in cursor.fetchall():
+                pending.setdefault((row[1], row[2]), []).append(row)
+
+            block_ids = []
+            for (series_symbol, series_timeframe), blocks in pending.items():
+                cursor.execute('''
+                SELECT open_time, close FROM candle_data
+                WHERE symbol = ? AND timeframe = ?
+                ORDER BY open_time
+                ''', (series_symbol, series_timeframe))
+                candles = np.array(cursor.fetchall(), dtype=float).reshape(-1, 2)
+                if not len(candles):
+                    continue
+
+                closes = candles[:, 1]
+                max_after = np.maximum.accumulate(closes[::-1])[::-1]
+                min_after = np.minimum.accumulate(closes[::-1])[::-1]
+
+                ids = np.array([block[0] for block in blocks])
+                is_bullish = np.array([block[3] == 'bullish' for block in blocks])
+                levels = np.array([block[4] for block in blocks], dtype=float)
+                positions = np.searchsorted(candles[:, 0], [block[5] for block in blocks], side='left')
+                has_candles = positions < len(closes)
+                positions = np.minimum(positions, len(closes) - 1)
+
+                confirmed = has_candles & np.where(
+                    is_bullish,
+                    max_after[positions] >= levels * (1 + min_move_pct / 100),
+                    min_after[positions] <= levels * (1 - min_move_pct / 100)
+                )
+                block_ids.extend(int(block_id) for block_id in ids[confirmed])
+
+            cursor.executemany('''
+            UPDATE order_blocks SET confirmed = 1 WHERE id = ? AND confirmed = 0
+            ''', [(block_id,) for block_id in block_ids])
+            conn.commit()
+            return block_ids
+        except Exception as e:
+            conn.rollback()
+            print(f"Ошибка при подтверждении ордер-блоков: {e}")
+            return []
+        finally:
+            conn.close()
+
     def populate_test_data(self):
         """Заполнение базы тестовыми данными"""
         symbols = Config.SYMBOLS
@@ -1,80 +1,355 @@
 import sqlite3
 import os
-from datetime import datetime
+import json
+import threading
+from datetime import date, datetime
 from typing import List, Optional, Tuple, Dict, Any
+from urllib.parse import quote
+from snapshot_publisher import POINTER_NAME, SnapshotPublisher, current_snapshot, snapshot_dir
+
+# Индексы для фильтров и постраничного вывода списка блоков (порядок - timestamp DESC)
+ORDER_BLOCK_INDEXES = {
+    'ix_order_blocks_timestamp': '(timestamp)',
+    'ix_order_blocks_symbol_timestamp': '(symbol, timestamp)',
+    'ix_order_blocks_timeframe_timestamp': '(timeframe, timestamp)',
+}
 
 class DatabaseManager:
-    def __init__(self, db_path: str = "data/smat.db"):
+    """
+    Чтение блоков для интерфейса. Если процессор публикует снимки БД
+    (snapshot_publisher), запросы идут к текущему снимку: он открывается как
+    неизменяемый, без блокировок, и при публикации нового поколения следующий
+    запрос просто открывает новый файл. Пока снимков нет, читается сама БД.
+    read_only - БД только читается (mode=ro): файл не создается, индексы не добавляются
+    """
+
+    def __init__(self, db_path: str = "data/smat.db", read_only: bool = False):
         self.db_path = db_path
+        self.read_only = read_only
         self.connection = None
         self.cursor = None
+        # Текущий файл для чтения и общее соединение чтения к нему
+        self._pointer_path = os.path.join(snapshot_dir(db_path), POINTER_NAME)
+        self._pointer_stamp = None
+        self._source = db_path
+        self._read_connection = None
+        self._read_source = None
+        self._read_lock = threading.Lock()
+        # Кэш списков уникальных значений, сбрасывается при изменении БД.
+        # Свое соединение под блокировкой: списки можно запрашивать из фонового потока
+        self._distinct_cache = {}
+        self._distinct_version = None
+        self._distinct_connection = None
+        self._distinct_source = None
+        self._distinct_lock = threading.Lock()
         self.init_database()
     
     def init_database(self):
         """Инициализация базы данных и создание таблиц если их нет"""
         try:
+            if self.read_only:
+                self.connection = self._connect(self.db_path)
+                self.cursor = self.connection.cursor()
+                return
+            
             # Создаем директорию если её нет
             os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
             
             self.connection = sqlite3.connect(self.db_path)
             self.cursor = self.connection.cursor()
+            self._ensure_indexes()
             
         except sqlite3.Error as e:
             print(f"Ошибка инициализации базы данных: {e}")
             raise
 
+    def _ensure_indexes(self):
+        """Индексы для фильтров (таблицы может еще не быть - тогда индексы создаст models.py)"""
+        self.cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'order_blocks'")
+        if self.cursor.fetchone() is None:
+            return
+        for name, columns in ORDER_BLOCK_INDEXES.items():
+            self.cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON order_blocks {columns}")
+        self.connection.commit()
+
+    def _current_source(self) -> str:
+        """Файл для чтения: текущий опубликованный снимок или сама БД, пока снимков нет"""
+        try:
+            stamp = os.stat(self._pointer_path).st_mtime_ns
+        except FileNotFoundError:
+            return self.db_path
+        # Указатель перечитывается только после его замены
+        if stamp != self._pointer_stamp:
+            self._source = current_snapshot(self.db_path) or self.db_path
+            self._pointer_stamp = stamp
+        return self._source
+
+    def _connect(self, source: str, **kwargs) -> sqlite3.Connection:
+        """
+        Соединение с файлом чтения. Снимок не меняется после публикации - immutable без блокировок,
+        сама БД в режиме read_only открывается только для чтения.
+        mode=ro и у снимка: отсутствующий файл не создается пустым, а дает ошибку открытия
+        """
+        if source == self.db_path and not self.read_only:
+            return sqlite3.connect(source, **kwargs)
+        path = os.path.abspath(source).replace(os.sep, '/')
+        if not path.startswith('/'):
+            path = '/' + path
+        mode = 'mode=ro' if source == self.db_path else 'mode=ro&immutable=1'
+        return sqlite3.connect(f"file:{quote(path, safe='/:')}?{mode}", uri=True, **kwargs)
+
+    def _open_current(self, **kwargs) -> Tuple[sqlite3.Connection, str]:
+        """
+        Соединение с текущим файлом чтения: (соединение, файл).
+        Прочитанное по указателю поколение могло быть уже удалено (две публикации подряд) -
+        тогда указатель перечитывается один раз, а если не открывается и новый снимок,
+        читается сама БД
+        """
+        source = self._current_source()
+        for attempt in range(2):
+            try:
+                return self._connect(source, **kwargs), source
+            except sqlite3.OperationalError:
+                if source == self.db_path:
+                    raise
+            if attempt == 0:
+                self._pointer_stamp = None
+                source = self._current_source()
+        return self._connect(self.db_path, **kwargs), self.db_path
+
+    def _read(self, query: str, params=()) -> List[Tuple]:
+        """
+        Запрос через общее соединение чтения, которое переоткрывается при публикации
+        нового снимка. Под блокировкой - можно вызывать из любого потока
+        """
+        with self._read_lock:
+            source = self._current_source()
+            if source != self._read_source:
+                if self._read_connection is not None:
+                    self._read_connection.close()
+                self._read_connection, self._read_source = None, None
+                self._read_connection, self._read_source = self._open_current(check_same_thread=False)
+            return self._read_connection.execute(query, params).fetchall()
+
+    def data_generation(self) -> str:
+        """
+        Метка версии данных для кэширования ответов: имя опубликованного снимка,
+        а пока снимков нет - время изменения и размер файлов БД
+        """
+        source = self._current_source()
+        if source != self.db_path:
+            return os.path.splitext(os.path.basename(source))[0]
+        stamps = []
+        for path in (self.db_path, self.db_path + '-wal'):
+            if os.path.exists(path):
+                stat = os.stat(path)
+                # Пустой WAL создает первое же соединение чтения - данных в нем нет,
+                # и версия от его появления меняться не должна
+                if path != self.db_path and stat.st_size == 0:
+                    continue
+                stamps.append(f"{stat.st_mtime_ns:x}.{stat.st_size:x}")
+        return '-'.join(stamps)
+
     # МЕТОДЫ ДЛЯ GUI
     
-    def get_unique_symbols(self) -> List[str]:
+    # strict - не перехватывать ошибки чтения: вызывающий код (сервис запросов)
+    # должен отличать ошибку БД от пустого результата
+    
+    def get_unique_symbols(self, strict: bool = False) -> List[str]:
         """Получение уникальных символов из БД"""
-        try:
-            self.cursor.execute("SELECT DISTINCT symbol FROM order_blocks ORDER BY symbol")
-            return [row[0] for row in self.cursor.fetchall()]
-        except sqlite3.Error as e:
-            print(f"Error getting unique symbols: {e}")
-            return []
+        return self._distinct_values('symbol', indexed=True, strict=strict)
 
-    def get_unique_timeframes(self) -> List[str]:
+    def get_unique_timeframes(self, strict: bool = False) -> List[str]:
         """Получение уникальных таймфреймов из БД"""
-        try:
-            self.cursor.execute("SELECT DISTINCT timeframe FROM order_blocks ORDER BY timeframe")
-            return [row[0] for row in self.cursor.fetchall()]
-        except sqlite3.Error as e:
-            print(f"Error getting unique timeframes: {e}")
-            return []
+        return self._distinct_values('timeframe', indexed=True, strict=strict)
+
+    def get_unique_directions(self, strict: bool = False) -> List[str]:
+        """Получение уникальных направлений блоков из БД"""
+        return self._distinct_values('direction', strict=strict)
+
+    def _distinct_values(self, column: str, indexed: bool = False, strict: bool = False) -> List[str]:
+        """
+        Уникальные значения колонки order_blocks с кэшем до следующего изменения БД
+        (публикации снимка или, при чтении самой БД, смены PRAGMA data_version
+        после записи из любого другого соединения).
+        По индексированной колонке значения перебираются скачками по индексу,
+        а не сканированием всей таблицы
+        """
+        with self._distinct_lock:
+            try:
+                source = self._current_source()
+                if source != self._distinct_source:
+                    if self._distinct_connection is not None:
+                        self._distinct_connection.close()
+                    self._distinct_connection, self._distinct_source = None, None
+                    self._distinct_connection, self._distinct_source = self._open_current(check_same_thread=False)
+                connection = self._distinct_connection
+                version = (self._distinct_source, connection.execute("PRAGMA data_version").fetchone()[0])
+                if version != self._distinct_version:
+                    self._distinct_cache = {}
+                    self._distinct_version = version
+                if column not in self._distinct_cache:
+                    if indexed:
+                        query = f"""
+                        WITH RECURSIVE distinct_values(value) AS (
+                            SELECT MIN({column}) FROM order_blocks
+                            UNION ALL
+                            SELECT (SELECT MIN({column}) FROM order_blocks WHERE {column} > value)
+                            FROM distinct_values WHERE value IS NOT NULL
+                        )
+                        SELECT value FROM distinct_values WHERE value IS NOT NULL
+                        """
+                    else:
+                        query = (f"SELECT DISTINCT {column} FROM order_blocks "
+                                 f"WHERE {column} IS NOT NULL ORDER BY {column}")
+                    self._distinct_cache[column] = [row[0] for row in connection.execute(query)]
+                return list(self._distinct_cache[column])
+            except sqlite3.Error as e:
+                if strict:
+                    raise
+                print(f"Error getting unique {column} values: {e}")
+                return []
 
     def get_order_blocks(self, symbol: Optional[str] = None, timeframe: Optional[str] = None) -> List[Tuple]:
         """Получение ордер-блоков с фильтрацией - ИСПРАВЛЕННАЯ ВЕРСИЯ"""
         try:
-            # Используем реальные названия колонок из вашей таблицы
-            query = """
-            SELECT id, symbol, timeframe, direction, confirmation_strength, 
-                   imbalance_high, is_confirmed, timestamp 
-            FROM order_blocks 
-            WHERE 1=1
-            """
-            params = []
-            
-            if symbol:
-                query += " AND symbol = ?"
-                params.append(symbol)
-            
-            if timeframe:
-                query += " AND timeframe = ?"
-                params.append(timeframe)
-                
-            query += " ORDER BY timestamp DESC"
-            
-            print(f"Executing query: {query}")
-            self.cursor.execute(query, params)
-            blocks = self.cursor.fetchall()
-            print(f"Found {len(blocks)} blocks in database")
-            return blocks
+            query, params = self._order_blocks_query({'symbol': symbol, 'timeframe': timeframe})
+            return self._read(query, params)
             
         except sqlite3.Error as e:
             print(f"Error getting order blocks: {e}")
             return []
 
+    def get_order_blocks_page(self, filters: Optional[Dict[str, Any]] = None, limit: int = 200,
+                              after: Optional[Tuple] = None) -> Tuple[List[Tuple], Optional[Tuple]]:
+        """
+        Страница ордер-блоков по фильтрам (см. _order_blocks_query) в порядке timestamp DESC.
+        after - курсор (timestamp, id) последней строки предыдущей страницы: следующая
+        страница читается по индексу с этого места, а не через OFFSET.
+        Возвращает (строки, курсор следующей страницы или None).
+        Использует собственное соединение, поэтому вызывается из любого потока
+        """
+        query, params = self._order_blocks_query(filters, after, limit + 1)
+        connection, _ = self._open_current()
+        try:
+            rows = connection.execute(query, params).fetchall()
+        finally:
+            connection.close()
+        
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, (rows[-1][7], rows[-1][0])
+
+    def get_chart_snapshot(self, block_id: int, strict: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Фрагмент графика блока одной строкой (окно свечей сохраняет BlockProcessor).
+        Возвращает {'block', 'meta', 'candles'} или None, если фрагмента нет
+        """
+        try:
+            rows = self._read("""
+            SELECT s.data, s.meta, b.id, b.symbol, b.timeframe, b.timestamp, b.direction,
+                   b.imbalance_high, b.imbalance_low, b.price_target, b.is_confirmed,
+                   b.status, b.confluence_score
+            FROM chart_snapshots s JOIN order_blocks b ON b.id = s.block_id
+            WHERE s.block_id = ?
+            """, (block_id,))
+        except sqlite3.Error as e:
+            if strict:
+                raise
+            print(f"Error getting chart snapshot: {e}")
+            return None
+        
+        if not rows:
+            return None
+        row = rows[0]
+        data, meta = row[:2]
+        block = dict(zip(('id', 'symbol', 'timeframe', 'timestamp', 'direction', 'imbalance_high',
+                          'imbalance_low', 'price_target', 'is_confirmed', 'status', 'confluence_score'), row[2:]))
+        block['timestamp'] = datetime.fromisoformat(block['timestamp'])
+        block['is_confirmed'] = bool(block['is_confirmed'])
+        # numpy нужен только для фрагментов графика - не загружаем его при старте окна
+        from utils.helpers import unpack_candles
+        return {'block': block, 'meta': json.loads(meta or '{}'), 'candles': unpack_candles(data)}
+
+    def _order_blocks_query(self, filters: Optional[Dict[str, Any]] = None, after: Optional[Tuple] = None,
+                            limit: Optional[int] = None) -> Tuple[str, list]:
+        """
+        Запрос списка блоков. Фильтры (пустые значения не учитываются):
+        symbol, symbol_prefix, timeframe, direction, confirmed,
+        min_strength/max_strength (confirmation_strength), date_from/date_to (даты, включительно)
+        """
+        filters = filters or {}
+        # Используем реальные названия колонок из вашей таблицы
+        query = """
+        SELECT id, symbol, timeframe, direction, confirmation_strength, 
+               imbalance_high, is_confirmed, timestamp 
+        FROM order_blocks 
+        WHERE 1=1
+        """
+        params = []
+        
+        if filters.get('symbol'):
+            query += " AND symbol = ?"
+            params.append(filters['symbol'])
+        
+        # Префикс задается диапазоном, чтобы работал индекс по symbol (LIKE его не использует)
+        prefix = (filters.get('symbol_prefix') or '').upper()
+        if prefix:
+            query += " AND symbol >= ? AND symbol < ?"
+            params.extend([prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)])
+        
+        # При фильтре по префиксу символа ведущим должен быть индекс по symbol: иначе SQLite
+        # выбирает индекс по таймфрейму или времени и перебирает все их блоки.
+        # Унарный плюс исключает условие из выбора индекса. Точный символ - равенство,
+        # с ним индексы (symbol, timeframe, timestamp) и (symbol, timestamp) дают и поиск,
+        # и порядок по времени без сортировки, поэтому колонки остаются как есть
+        by_prefix = bool(prefix) and not filters.get('symbol')
+        timeframe_column = '+timeframe' if by_prefix else 'timeframe'
+        timestamp_column = '+timestamp' if by_prefix else 'timestamp'
+        
+        if filters.get('timeframe'):
+            query += f" AND {timeframe_column} = ?"
+            params.append(filters['timeframe'])
+        
+        if filters.get('direction'):
+            query += " AND direction = ?"
+            params.append(filters['direction'])
+        
+        if filters.get('confirmed') is not None:
+            query += " AND is_confirmed = ?"
+            params.append(1 if filters['confirmed'] else 0)
+        
+        if filters.get('min_strength') is not None:
+            query += " AND confirmation_strength >= ?"
+            params.append(filters['min_strength'])
+        
+        if filters.get('max_strength') is not None:
+            query += " AND confirmation_strength <= ?"
+            params.append(filters['max_strength'])
+        
+        # Время хранится строкой 'YYYY-MM-DD HH:MM:SS', даты сравниваются как строки
+        if filters.get('date_from'):
+            query += f" AND {timestamp_column} >= ?"
+            params.append(filters['date_from'].isoformat())
+        
+        # Последний день календаря (date.max) ограничения сверху не дает
+        if filters.get('date_to') and filters['date_to'] < date.max:
+            query += f" AND {timestamp_column} < ?"
+            params.append(date.fromordinal(filters['date_to'].toordinal() + 1).isoformat())
+        
+        # Условие <= повторяет курсор, но в отличие от OR задает границу поиска по индексу:
+        # следующая страница начинается с курсора, а не перебирает более новые блоки
+        if after is not None:
+            query += f" AND {timestamp_column} <= ? AND ({timestamp_column} < ? OR ({timestamp_column} = ? AND id < ?))"
+            params.extend([after[0], after[0], after[0], after[1]])
+            
+        query += " ORDER BY timestamp DESC, id DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        return query, params
+
     def add_test_order_blocks(self):
         """Добавление тестовых данных для демонстрации - ИСПРАВЛЕННАЯ ВЕРСИЯ"""
         try:
@@ -99,6 +374,10 @@ class DatabaseManager:
             self.connection.commit()
             print("Added test order blocks")
             
+            # Интерфейс читает опубликованный снимок - тестовые блоки попадут в него только с новым поколением
+            if current_snapshot(self.db_path):
+                SnapshotPublisher(self.db_path).publish()
+            
         except sqlite3.Error as e:
             print(f"Error adding test data: {e}")
 
@@ -106,6 +385,10 @@ class DatabaseManager:
         """Закрытие соединения с БД"""
         if self.connection:
             self.connection.close()
+        if self._read_connection:
+            self._read_connection.close()
+        if self._distinct_connection:
+            self._distinct_connection.close()
 
     def __enter__(self):
         return self
@@ -0,0 +1,105 @@
+# event_bus.py
+import logging
+import threading
+from collections import defaultdict
+
+class Event:
+    """Базовое событие шины"""
+
+    def __repr__(self):
+        fields = ', '.join(f"{key}={value!r}" for key, value in vars(self).items())
+        return f"{type(self).__name__}({fields})"
+
+class CandleClosed(Event):
+    """Закрылась новая свеча (symbol, timeframe)"""
+
+    def __init__(self, symbol, timeframe, candle):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.candle = candle
+
+class BlocksChanged(Event):
+    """
+    Изменение набора ордер-блоков: added и updated - словари блоков,
+    removed - id удаленных блоков
+    """
+
+    def __init__(self, added=None, updated=None, removed=None):
+        self.added = added or []
+        self.updated = updated or []
+        self.removed = removed or []
+
+class ConfirmationChanged(Event):
+    """Изменение подтверждения блоков: {block_id: confirmed}"""
+
+    def __init__(self, changes):
+        self.changes = changes
+
+class SeriesProcessed(Event):
+    """
+    Ряд (symbol, timeframe) обработан при обновлении: blocks - сохраненные
+    блоки (словари OrderBlock.to_dict), removed - id замененных блоков
+    """
+
+    def __init__(self, symbol, timeframe, blocks, removed=None):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.blocks = blocks
+        self.removed = removed or []
+
+class RefreshProgress(Event):
+    """
+    Прогресс обновления: завершено рядов из total, найдено блоков, прошло и
+    осталось секунд (eta=None, пока оценки нет), скорость стадий в рядах/с.
+    finished - обновление завершено, partial - часть рядов пропущена по бюджету времени
+    """
+
+    def __init__(self, done, total, blocks, elapsed, eta, throughput, finished=False, partial=False):
+        self.done = done
+        self.total = total
+        self.blocks = blocks
+        self.elapsed = elapsed
+        self.eta = eta
+        self.throughput = throughput
+        self.finished = finished
+        self.partial = partial
+
+class EventBus:
+    """
+    Внутрипроцессная шина publish/subscribe.
+    Обработчики вызываются синхронно в потоке издателя, поэтому подписчик,
+    которому нужен свой поток (GUI, фоновый обработчик), сам передает событие
+    в свою очередь или сигнал. Ошибка одного обработчика не мешает остальным.
+    """
+
+    def __init__(self):
+        self._handlers = defaultdict(list)
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def subscribe(self, event_type, handler):
+        """Подписка на события типа event_type (и его наследников)"""
+        with self._lock:
+            self._handlers[event_type].append(handler)
+        return handler
+
+    def unsubscribe(self, event_type, handler):
+        """Отписка обработчика"""
+        with self._lock:
+            if handler in self._handlers[event_type]:
+                self._handlers[event_type].remove(handler)
+
+    def publish(self, event):
+        """Доставка события всем подписчикам"""
+        with self._lock:
+            handlers = [handler for event_type, handlers in self._handlers.items()
+                        if isinstance(event, event_type) for handler in handlers]
+
+        for handler in handlers:
+            try:
+                handler(event)
+            except Exception as e:
+                self.logger.error(f"Ошибка обработчика события {type(event).__name__}: {e}")
+
+# Глобальная шина событий приложения
+event_bus = EventBus()
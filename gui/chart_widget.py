@@ -1,40 +1,290 @@
 # gui/chart_widget.py
+import numpy as np
+from datetime import datetime
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QRectF, QLineF, QPointF
+from PyQt5.QtGui import QPainter, QColor, QPen, QBrush
 from gui.styles import get_styles
 
+BULLISH_COLOR = QColor("#00C853")
+BEARISH_COLOR = QColor("#FF1744")
+GRID_COLOR = QColor("#2D3748")
+TEXT_COLOR = QColor("#A0AEC0")
+
+def build_ohlc_levels(open_, high, low, close):
+    """
+    Пирамида OHLC: уровень k объединяет по 2**k соседних свечей
+    (open первой, high/low экстремумы, close последней).
+    Строится один раз за O(n), после чего любой масштаб читает не больше
+    свечей, чем примерно вдвое превышает число пикселей по ширине
+    """
+    levels = [(open_, high, low, close)]
+    while len(levels[-1][0]) > 1:
+        o, h, l, c = levels[-1]
+        pairs = len(o) // 2
+        if pairs == 0:
+            break
+        odd = len(o) % 2
+        next_o = o[:2 * pairs:2]
+        next_h = np.maximum(h[:2 * pairs:2], h[1:2 * pairs:2])
+        next_l = np.minimum(l[:2 * pairs:2], l[1:2 * pairs:2])
+        next_c = c[1:2 * pairs:2]
+        if odd:
+            next_o = np.append(next_o, o[-1])
+            next_h = np.append(next_h, h[-1])
+            next_l = np.append(next_l, l[-1])
+            next_c = np.append(next_c, c[-1])
+        levels.append((next_o, next_h, next_l, next_c))
+    return levels
+
+def decimate_ohlc(levels, start, end, buckets):
+    """
+    OHLC видимого диапазона свечей [start, end), сжатый не более чем до buckets корзин.
+    Возвращает (позиции корзин в свечах исходного ряда, ширину корзины, o, h, l, c)
+    """
+    count = end - start
+    if count <= 0:
+        empty = np.empty(0)
+        return empty, 1.0, empty, empty, empty, empty
+
+    # Самый подробный уровень, на котором видимых свечей не больше 2 * buckets
+    level = 0
+    while level + 1 < len(levels) and count / (2 ** level) > 2 * buckets:
+        level += 1
+    scale = 2 ** level
+    o, h, l, c = levels[level]
+    level_start = start // scale
+    level_end = min(-(-end // scale), len(o))
+
+    o, h, l, c = o[level_start:level_end], h[level_start:level_end], l[level_start:level_end], c[level_start:level_end]
+    if len(o) <= buckets:
+        positions = (np.arange(level_start, level_end) * scale).astype(float)
+        return positions, float(scale), o, h, l, c
+
+    # Объединение в buckets корзин: границы корзин по индексам уровня
+    edges = np.linspace(0, len(o), buckets + 1).astype(int)
+    edges = np.unique(edges)
+    lefts = edges[:-1]
+    rights = edges[1:] - 1
+    bucket_o = o[lefts]
+    bucket_c = c[rights]
+    bucket_h = np.maximum.reduceat(h, lefts)
+    bucket_l = np.minimum.reduceat(l, lefts)
+    positions = ((level_start + lefts) * scale).astype(float)
+    width = (len(o) / len(lefts)) * scale
+    return positions, width, bucket_o, bucket_h, bucket_l, bucket_c
+
+class CandleChart(QWidget):
+    """
+    Свечной график с зоной имбаланса, направлением и целью блока.
+    Колесо мыши - масштаб относительно курсора, перетаскивание - сдвиг.
+    Отрисовывается не больше одной свечи на пиксель по ширине
+    """
+
+    MIN_VISIBLE = 10
+    PRICE_MARGIN = 0.05
+    RIGHT_AXIS = 70
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setMinimumSize(300, 200)
+        self.setMouseTracking(False)
+        self.times = np.empty(0, dtype='datetime64[ns]')
+        self.levels = None
+        self.block = None
+        self.block_index = None
+        self.view_start = 0.0
+        self.view_count = 0.0
+        self._drag_x = None
+
+    def set_candles(self, times, open_, high, low, close):
+        """Загрузка ряда свечей (массивы одинаковой длины, время по возрастанию)"""
+        self.times = np.asarray(times, dtype='datetime64[ns]')
+        self.levels = build_ohlc_levels(*(np.asarray(values, dtype=float) for values in (open_, high, low, close)))
+        self.view_count = float(min(len(self.times), 200))
+        self.view_start = float(max(0, len(self.times) - self.view_count))
+        self._locate_block()
+        self.update()
+
+    def set_block(self, block, bars_around=100):
+        """Блок для отображения; вид центрируется на свече блока"""
+        self.block = block
+        self._locate_block()
+        if self.block_index is not None:
+            self.view_count = float(min(len(self.times), 2 * bars_around))
+            self.view_start = float(max(0, min(self.block_index - bars_around, len(self.times) - self.view_count)))
+        self.update()
+
+    def _locate_block(self):
+        self.block_index = None
+        if self.block is not None and len(self.times) and self.block.get('timestamp') is not None:
+            position = np.searchsorted(self.times, np.datetime64(self.block['timestamp'], 'ns'))
+            self.block_index = int(min(position, len(self.times) - 1))
+
+    def _plot_rect(self):
+        return QRectF(0, 0, max(1, self.width() - self.RIGHT_AXIS), self.height())
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor("#1A202C"))
+        if self.levels is None or not len(self.times):
+            painter.setPen(TEXT_COLOR)
+            painter.drawText(self.rect(), Qt.AlignCenter, "Нет данных для графика")
+            return
+
+        font = painter.font()
+        font.setPixelSize(11)
+        painter.setFont(font)
+        plot = self._plot_rect()
+        start = int(max(0, np.floor(self.view_start)))
+        end = int(min(len(self.times), np.ceil(self.view_start + self.view_count)))
+        positions, width, o, h, l, c = decimate_ohlc(self.levels, start, end, int(plot.width()))
+        if not len(o):
+            return
+
+        price_low, price_high = float(l.min()), float(h.max())
+        if self.block:
+            for key in ('imbalance_high', 'imbalance_low', 'price_target'):
+                if self.block.get(key) is not None:
+                    price_low = min(price_low, self.block[key])
+                    price_high = max(price_high, self.block[key])
+        span = (price_high - price_low) or abs(price_high) or 1.0
+        price_low -= span * self.PRICE_MARGIN
+        price_high += span * self.PRICE_MARGIN
+
+        x_scale = plot.width() / self.view_count
+        y_scale = plot.height() / (price_high - price_low)
+        to_x = lambda index: (index - self.view_start) * x_scale
+        to_y = lambda price: plot.bottom() - (price - price_low) * y_scale
+
+        self._draw_grid(painter, plot, price_low, price_high, to_y)
+        if self.block:
+            self._draw_block(painter, plot, to_x, to_y)
+
+        # Свечи рисуются пачками по цвету: тени одной drawLines, тела одной drawRects
+        centers = to_x(positions + width / 2)
+        body_width = max(1.0, width * x_scale * 0.7)
+        rising = c >= o
+        for mask, color in ((rising, BULLISH_COLOR), (~rising, BEARISH_COLOR)):
+            if not mask.any():
+                continue
+            xs = centers[mask]
+            wick_top = to_y(h[mask])
+            wick_bottom = to_y(l[mask])
+            painter.setPen(QPen(color, 1))
+            painter.drawLines([QLineF(x, top, x, bottom) for x, top, bottom in zip(xs, wick_top, wick_bottom)])
+            if body_width >= 2:
+                body_top = to_y(np.maximum(o[mask], c[mask]))
+                body_height = np.maximum(1.0, to_y(np.minimum(o[mask], c[mask])) - body_top)
+                painter.setBrush(QBrush(color))
+                painter.drawRects([QRectF(x - body_width / 2, top, body_width, height)
+                                   for x, top, height in zip(xs, body_top, body_height)])
+
+        self._draw_time_labels(painter, plot, start, end)
+
+    def _draw_grid(self, painter, plot, price_low, price_high, to_y):
+        painter.setPen(QPen(GRID_COLOR, 1))
+        steps = 6
+        for step in range(steps + 1):
+            price = price_low + (price_high - price_low) * step / steps
+            y = to_y(price)
+            painter.drawLine(QLineF(plot.left(), y, plot.right(), y))
+            painter.setPen(TEXT_COLOR)
+            # Крайние подписи сдвигаются внутрь виджета
+            label_y = min(max(y, plot.top() + 8), plot.bottom() - 8)
+            painter.drawText(QRectF(plot.right() + 4, label_y - 8, self.RIGHT_AXIS - 6, 16),
+                             Qt.AlignLeft | Qt.AlignVCenter, f"{price:.6g}")
+            painter.setPen(QPen(GRID_COLOR, 1))
+
+    def _draw_block(self, painter, plot, to_x, to_y):
+        """Зона имбаланса от свечи блока вправо, цель и направление"""
+        block = self.block
+        bullish = str(block.get('direction', '')).upper() == 'BULLISH'
+        color = BULLISH_COLOR if bullish else BEARISH_COLOR
+        left = to_x(self.block_index) if self.block_index is not None else plot.left()
+        left = max(plot.left(), min(left, plot.right()))
+
+        if block.get('imbalance_high') is not None and block.get('imbalance_low') is not None:
+            zone_color = QColor(color)
+            zone_color.setAlpha(50)
+            top, bottom = to_y(block['imbalance_high']), to_y(block['imbalance_low'])
+            painter.fillRect(QRectF(left, top, plot.right() - left, bottom - top), zone_color)
+
+        if block.get('price_target') is not None:
+            y = to_y(block['price_target'])
+            painter.setPen(QPen(color, 1, Qt.DashLine))
+            painter.drawLine(QLineF(left, y, plot.right(), y))
+            # У верхнего края подпись уходит под линию, чтобы не наложиться на направление
+            text_y = y + 14 if y < plot.top() + 30 else y - 4
+            painter.drawText(QPointF(left + 4, text_y), f"Цель {block['price_target']:.6g}")
+
+        if self.block_index is not None:
+            x = to_x(self.block_index)
+            if plot.left() <= x <= plot.right():
+                painter.setPen(QPen(color, 1, Qt.DotLine))
+                painter.drawLine(QLineF(x, plot.top(), x, plot.bottom()))
+                painter.drawText(QPointF(x + 4, plot.top() + 14), "▲ BULLISH" if bullish else "▼ BEARISH")
+
+    def _draw_time_labels(self, painter, plot, start, end):
+        painter.setPen(TEXT_COLOR)
+        for index in np.linspace(start, end - 1, 5).astype(int):
+            x = (index - self.view_start) * plot.width() / self.view_count
+            label = str(self.times[index].astype('datetime64[m]')).replace('T', ' ')
+            left = min(max(x - 60, plot.left()), plot.right() - 120)
+            painter.drawText(QRectF(left, plot.bottom() - 18, 120, 16), Qt.AlignCenter, label)
+
+    def wheelEvent(self, event):
+        """Масштаб относительно позиции курсора"""
+        if not len(self.times):
+            return
+        plot = self._plot_rect()
+        anchor = self.view_start + event.x() / plot.width() * self.view_count
+        factor = 0.8 if event.angleDelta().y() > 0 else 1.25
+        new_count = float(np.clip(self.view_count * factor, self.MIN_VISIBLE, len(self.times)))
+        self.view_start = anchor - (anchor - self.view_start) * new_count / self.view_count
+        self.view_count = new_count
+        self._clamp_view()
+        self.update()
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self._drag_x = event.x()
+
+    def mouseMoveEvent(self, event):
+        if self._drag_x is None or not len(self.times):
+            return
+        delta = event.x() - self._drag_x
+        self._drag_x = event.x()
+        self.view_start -= delta / self._plot_rect().width() * self.view_count
+        self._clamp_view()
+        self.update()
+
+    def mouseReleaseEvent(self, event):
+        self._drag_x = None
+
+    def _clamp_view(self):
+        self.view_start = float(np.clip(self.view_start, 0, max(0, len(self.times) - self.view_count)))
+
 class ChartWidget(QWidget):
     def __init__(self):
         super().__init__()
         self.init_ui()
-        
+
     def init_ui(self):
         layout = QVBoxLayout()
-        
+
         # Заголовок графика
-        title = QLabel("График ордер-блока")
-        title.setStyleSheet("color: white; font-size: 16px; font-weight: bold;")
-        title.setAlignment(Qt.AlignCenter)
-        layout.addWidget(title)
-        
-        # Заглушка для графика
-        chart_placeholder = QLabel("Здесь будет отображаться график\nс уровнями поддержки/сопротивления\nи целями движения цены")
-        chart_placeholder.setStyleSheet("""
-            QLabel {
-                color: #A0AEC0;
-                font-size: 14px;
-                background-color: #2D3748;
-                border: 2px dashed #4A5568;
-                border-radius: 10px;
-                padding: 50px;
-            }
-        """)
-        chart_placeholder.setAlignment(Qt.AlignCenter)
-        layout.addWidget(chart_placeholder)
-        
+        self.title = QLabel("График ордер-блока")
+        self.title.setStyleSheet("color: white; font-size: 16px; font-weight: bold;")
+        self.title.setAlignment(Qt.AlignCenter)
+        layout.addWidget(self.title)
+
+        self.chart = CandleChart()
+        layout.addWidget(self.chart, 1)
+
         # Информационная панель
-        info_label = QLabel("Таймфрейм: -\nПодтверждение: -\nНаправление: -")
-        info_label.setStyleSheet("""
+        self.info_label = QLabel("Таймфрейм: -\nПодтверждение: -\nНаправление: -")
+        self.info_label.setStyleSheet("""
             QLabel {
                 color: white;
                 font-size: 12px;
@@ -44,8 +294,31 @@ class ChartWidget(QWidget):
                 padding: 10px;
             }
         """)
-        info_label.setAlignment(Qt.AlignLeft)
-        layout.addWidget(info_label)
-        
+        self.info_label.setAlignment(Qt.AlignLeft)
+        layout.addWidget(self.info_label)
+
         self.setLayout(layout)
         self.setStyleSheet(get_styles()['chart_widget'])
+
+    def display_block(self, block, candles):
+        """
+        Показ блока на графике его таймфрейма.
+        candles - DataFrame или словарь массивов со столбцами open/high/low/close
+        и временем в столбце timestamp (у DataFrame - также в индексе)
+        """
+        times = candles['timestamp'] if 'timestamp' in candles else candles.index
+        self.chart.set_candles(times, candles['open'], candles['high'], candles['low'], candles['close'])
+        self.chart.set_block(block)
+
+        timestamp = block.get('timestamp')
+        if isinstance(timestamp, datetime):
+            timestamp = timestamp.strftime('%Y-%m-%d %H:%M')
+        self.title.setText(f"{block.get('symbol', '')} ({block.get('timeframe', '')}) - {timestamp}")
+        lines = [
+            f"Таймфрейм: {block.get('timeframe', '-')}",
+            f"Подтверждение: {'Да' if block.get('is_confirmed') else 'Нет'}",
+            f"Направление: {block.get('direction', '-')}"
+        ]
+        if block.get('price_target') is not None:
+            lines.append(f"Цель: {block['price_target']:.6g}")
+        self.info_label.setText("\n".join(lines))
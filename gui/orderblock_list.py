@@ -1,142 +1,246 @@
 # gui/orderblock_list.py
-from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QListWidget, QListWidgetItem,
-                             QPushButton, QHBoxLayout, QLabel, QCheckBox, QFrame)
-from PyQt5.QtCore import Qt, pyqtSignal, QTimer
-from PyQt5.QtGui import QColor
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QTableView, QHeaderView, QAbstractItemView,
+                             QStyledItemDelegate, QStyle, QPushButton, QHBoxLayout, QLabel)
+from PyQt5.QtCore import Qt, pyqtSignal, QAbstractTableModel, QModelIndex, QRect, QEvent
+from PyQt5.QtGui import QColor, QPainter, QFont, QPen
 from gui.styles import get_styles
 from data_processor import data_processor
-
-class OrderBlockItemWidget(QWidget):
-    show_clicked = pyqtSignal(str)
-    toggle_confirmed = pyqtSignal(int, bool)
-
-    def __init__(self, block_id, symbol, timeframe, confirmed, direction, parent=None):
+from event_bus import event_bus, BlocksChanged, ConfirmationChanged
+
+# Колонки списка: заголовок и ширина
+COLUMNS = [("Пара", 90), ("ТФ", 50), ("Подтв.", 75), ("Напр.", 65), ("Действие", 110)]
+BUTTON_WIDTH, BUTTON_HEIGHT = 96, 24
+COL_SYMBOL, COL_TIMEFRAME, COL_CONFIRMED, COL_DIRECTION, COL_ACTION = range(len(COLUMNS))
+
+BULLISH_COLOR = QColor("#00C853")
+BEARISH_COLOR = QColor("#FF1744")
+
+class OrderBlockTableModel(QAbstractTableModel):
+    """
+    Модель списка ордер-блоков. Изменения применяются по id вставкой,
+    обновлением и удалением отдельных строк, поэтому представление
+    перерисовывает только затронутые видимые строки.
+    Блоки хранятся от старых к новым (строка 0 - последний элемент списка):
+    новые блоки вставляются сверху добавлением в конец, и индекс id -> позиция
+    при этом не перестраивается.
+    """
+
+    # Полная перестройка дешевле построчных сигналов при большом числе удалений
+    RESET_THRESHOLD = 200
+
+    def __init__(self, parent=None):
         super().__init__(parent)
-        self.block_id = block_id
-        self.symbol = symbol
-        self.timeframe = timeframe
-        self.confirmed = confirmed
-        self.direction = direction
-        self.init_ui()
-
-    def init_ui(self):
-        layout = QHBoxLayout()
-        layout.setContentsMargins(10, 5, 10, 5)
-        layout.setSpacing(5)
-
-        symbol_label = QLabel(self.symbol)
-        symbol_label.setStyleSheet("color: white; font-weight: bold;")
-        symbol_label.setFixedWidth(70)
-        symbol_label.setAlignment(Qt.AlignCenter)
-        layout.addWidget(symbol_label)
-
-        timeframe_label = QLabel(self.timeframe)
-        timeframe_label.setStyleSheet("color: #A0AEC0;")
-        timeframe_label.setFixedWidth(40)
-        timeframe_label.setAlignment(Qt.AlignCenter)
-        layout.addWidget(timeframe_label)
-
-        confirm_widget = QWidget()
-        confirm_layout = QHBoxLayout()
-        confirm_layout.setContentsMargins(0, 0, 0, 0)
-        confirm_layout.setAlignment(Qt.AlignCenter)
-
-        self.confirm_check = QCheckBox()
-        self.confirm_check.setChecked(self.confirmed)
-        self.confirm_check.stateChanged.connect(self.on_confirm_toggle)
-        self.confirm_check.setStyleSheet("""
-        QCheckBox::indicator {
-            width: 16px;
-            height: 16px;
-            border: 2px solid #718096;
-            border-radius: 3px;
-        }
-        QCheckBox::indicator:checked {
-            background-color: #00C853;
-            border: 2px solid #00C853;
-        }
-        QCheckBox::indicator:unchecked {
-            background-color: transparent;
-        }
-        """)
-
-        confirm_layout.addWidget(self.confirm_check)
-        confirm_widget.setLayout(confirm_layout)
-        confirm_widget.setFixedWidth(40)
-        layout.addWidget(confirm_widget)
-
-        direction_widget = QWidget()
-        direction_layout = QHBoxLayout()
-        direction_layout.setContentsMargins(0, 0, 0, 0)
-        direction_layout.setAlignment(Qt.AlignCenter)
-
-        arrow_label = QLabel()
-        arrow_label.setFixedSize(20, 20)
-        if self.direction == 'bullish':
-            arrow_label.setStyleSheet("""
-            QLabel {
-                background-color: #00C853;
-                border-radius: 10px;
-                color: white;
-                font-weight: bold;
-                qproperty-alignment: AlignCenter;
-            }
-            """)
-            arrow_label.setText("↑")
+        self._items = []
+        self._positions = {}
+        self._positions_dirty = False
+
+    @property
+    def blocks(self):
+        """Блоки в порядке отображения"""
+        return self._items[::-1]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._items)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return COLUMNS[section][0]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        block = self.block_at(index.row())
+        column = index.column()
+
+        if role == Qt.DisplayRole:
+            if column == COL_SYMBOL:
+                return block['symbol']
+            if column == COL_TIMEFRAME:
+                return block['timeframe']
+            if column == COL_ACTION:
+                return "Показать"
+        elif role == Qt.CheckStateRole and column == COL_CONFIRMED:
+            return Qt.Checked if block['confirmed'] else Qt.Unchecked
+        elif role == Qt.UserRole:
+            return block
+        return None
+
+    def block_at(self, row):
+        return self._items[len(self._items) - 1 - row]
+
+    def row_of(self, block_id):
+        """Номер строки блока или None"""
+        if self._positions_dirty:
+            self._positions = {block['id']: position for position, block in enumerate(self._items)}
+            self._positions_dirty = False
+        position = self._positions.get(block_id)
+        return None if position is None else len(self._items) - 1 - position
+
+    def set_blocks(self, blocks):
+        """Полная замена данных (blocks - в порядке отображения)"""
+        self.beginResetModel()
+        self._items = list(reversed(blocks))
+        self._positions_dirty = True
+        self.endResetModel()
+
+    def clear(self):
+        self.set_blocks([])
+
+    def insert_blocks(self, blocks, row=0):
+        """Вставка новых блоков одним диапазоном строк начиная с row"""
+        blocks = [block for block in blocks if self.row_of(block['id']) is None]
+        if not blocks:
+            return
+        row = min(row, len(self._items))
+        position = len(self._items) - row
+        self.beginInsertRows(QModelIndex(), row, row + len(blocks) - 1)
+        self._items[position:position] = blocks[::-1]
+        if position == len(self._items) - len(blocks):
+            for offset, block in enumerate(reversed(blocks)):
+                self._positions[block['id']] = position + offset
         else:
-            arrow_label.setStyleSheet("""
-            QLabel {
-                background-color: #FF1744;
-                border-radius: 10px;
-                color: white;
-                font-weight: bold;
-                qproperty-alignment: AlignCenter;
-            }
-            """)
-            arrow_label.setText("↓")
-
-        direction_layout.addWidget(arrow_label)
-        direction_widget.setLayout(direction_layout)
-        direction_widget.setFixedWidth(40)
-        layout.addWidget(direction_widget)
-
-        button_widget = QWidget()
-        button_layout = QHBoxLayout()
-        button_layout.setContentsMargins(0, 0, 0, 0)
-        button_layout.setAlignment(Qt.AlignCenter)
-
-        self.show_btn = QPushButton("Показать")
-        self.show_btn.setStyleSheet(get_styles()['button'])
-        self.show_btn.setFixedSize(70, 25)
-        self.show_btn.clicked.connect(self.on_show_clicked)
-        button_layout.addWidget(self.show_btn)
-
-        button_widget.setLayout(button_layout)
-        button_widget.setFixedWidth(80)
-        layout.addWidget(button_widget)
+            self._positions_dirty = True
+        self.endInsertRows()
+
+    def update_block(self, block):
+        """Замена данных блока на месте"""
+        row = self.row_of(block['id'])
+        if row is None:
+            return
+        self._items[len(self._items) - 1 - row] = block
+        self.dataChanged.emit(self.index(row, 0), self.index(row, len(COLUMNS) - 1))
+
+    def set_confirmed(self, block_id, confirmed):
+        row = self.row_of(block_id)
+        if row is None or self.block_at(row)['confirmed'] == confirmed:
+            return
+        self._items[len(self._items) - 1 - row] = dict(self.block_at(row), confirmed=confirmed)
+        index = self.index(row, COL_CONFIRMED)
+        self.dataChanged.emit(index, index, [Qt.CheckStateRole])
+
+    def remove_blocks(self, block_ids):
+        """Удаление блоков по id"""
+        block_ids = {block_id for block_id in block_ids if self.row_of(block_id) is not None}
+        if not block_ids:
+            return
+        if len(block_ids) > self.RESET_THRESHOLD:
+            self.set_blocks([block for block in self.blocks if block['id'] not in block_ids])
+            return
+
+        # Снизу вверх, чтобы номера оставшихся строк не сдвигались
+        for row in sorted((self.row_of(block_id) for block_id in block_ids), reverse=True):
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self._items[len(self._items) - 1 - row]
+            self.endRemoveRows()
+        self._positions_dirty = True
+
+    def apply_snapshot(self, blocks):
+        """
+        Приведение модели к новому полному списку через разницу по id:
+        удаленные строки убираются, измененные обновляются, новые вставляются сверху
+        """
+        new_ids = {block['id'] for block in blocks}
+        self.remove_blocks([block['id'] for block in self.blocks if block['id'] not in new_ids])
+
+        added = []
+        for block in blocks:
+            row = self.row_of(block['id'])
+            if row is None:
+                added.append(block)
+            elif self.block_at(row) != block:
+                self.update_block(block)
+        self.insert_blocks(added)
+
+class OrderBlockDelegate(QStyledItemDelegate):
+    """
+    Легкая отрисовка строки QPainter'ом вместо виджета с layout'ами на каждую строку
+    """
+    show_clicked = pyqtSignal(int)
+    toggle_confirmed = pyqtSignal(int, bool)
 
-        self.setLayout(layout)
-        self.setFixedHeight(40)
-        self.setStyleSheet("""
-        QWidget {
-            background-color: #1A202C;
-            border-radius: 5px;
-            border: 1px solid #4A5568;
-        }
-        """)
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.bold_font = QFont()
+        self.bold_font.setBold(True)
+
+    def paint(self, painter, option, index):
+        block = index.data(Qt.UserRole)
+        column = index.column()
+        rect = option.rect
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        selected = bool(option.state & QStyle.State_Selected)
+        painter.fillRect(rect, QColor("#2B6CB0") if selected else QColor("#1A202C"))
+
+        if column == COL_SYMBOL:
+            painter.setFont(self.bold_font)
+            painter.setPen(QColor("white"))
+            painter.drawText(rect, Qt.AlignCenter, block['symbol'])
+        elif column == COL_TIMEFRAME:
+            painter.setPen(QColor("#A0AEC0"))
+            painter.drawText(rect, Qt.AlignCenter, block['timeframe'])
+        elif column == COL_CONFIRMED:
+            box = self._centered(rect, 16, 16)
+            if block['confirmed']:
+                painter.setBrush(BULLISH_COLOR)
+                painter.setPen(QPen(BULLISH_COLOR, 2))
+            else:
+                painter.setBrush(Qt.NoBrush)
+                painter.setPen(QPen(QColor("#718096"), 2))
+            painter.drawRoundedRect(box, 3, 3)
+        elif column == COL_DIRECTION:
+            bullish = block['block_type'] == 'bullish'
+            circle = self._centered(rect, 20, 20)
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(BULLISH_COLOR if bullish else BEARISH_COLOR)
+            painter.drawEllipse(circle)
+            painter.setFont(self.bold_font)
+            painter.setPen(QColor("white"))
+            painter.drawText(circle, Qt.AlignCenter, "↑" if bullish else "↓")
+        elif column == COL_ACTION:
+            button = self._centered(rect, BUTTON_WIDTH, BUTTON_HEIGHT)
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(QColor("#3182CE"))
+            painter.drawRoundedRect(button, 5, 5)
+            painter.setFont(self.bold_font)
+            painter.setPen(QColor("white"))
+            painter.drawText(button, Qt.AlignCenter, "Показать")
+
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() != QEvent.MouseButtonRelease or event.button() != Qt.LeftButton:
+            return False
+        block = index.data(Qt.UserRole)
+        if index.column() == COL_CONFIRMED:
+            self.toggle_confirmed.emit(block['id'], not block['confirmed'])
+            return True
+        if index.column() == COL_ACTION and self._centered(option.rect, BUTTON_WIDTH, BUTTON_HEIGHT).contains(event.pos()):
+            self.show_clicked.emit(block['id'])
+            return True
+        return False
+
+    @staticmethod
+    def _centered(rect, width, height):
+        return QRect(rect.center().x() - width // 2 + 1, rect.center().y() - height // 2 + 1, width, height)
 
-    def on_show_clicked(self):
-        self.show_clicked.emit(f"{self.symbol}_{self.timeframe}")
+class OrderBlockList(QWidget):
+    # События шины приходят из потока обработчика, сигналы переносят их в поток GUI
+    blocks_changed = pyqtSignal(object)
+    confirmation_changed = pyqtSignal(object)
 
-    def on_confirm_toggle(self, state):
-        confirmed = state == Qt.Checked
-        self.toggle_confirmed.emit(self.block_id, confirmed)
+    ROW_HEIGHT = 36
 
-class OrderBlockList(QWidget):
     def __init__(self):
         super().__init__()
+        self.model = OrderBlockTableModel(self)
         self.init_ui()
-        self.setup_timer()
+        self.subscribe_events()
+        self.refresh_list()
 
     def init_ui(self):
         layout = QVBoxLayout()
@@ -158,93 +262,78 @@ class OrderBlockList(QWidget):
         title.setAlignment(Qt.AlignCenter)
         layout.addWidget(title)
 
-        headers_widget = QWidget()
-        headers_layout = QHBoxLayout()
-        headers_layout.setContentsMargins(10, 5, 10, 5)
-        headers_layout.setSpacing(5)
-
-        header1 = QLabel("Пара")
-        header1.setStyleSheet("color: #718096; font-weight: bold;")
-        header1.setFixedWidth(70)
-        header1.setAlignment(Qt.AlignCenter)
-        headers_layout.addWidget(header1)
-
-        header2 = QLabel("ТФ")
-        header2.setStyleSheet("color: #718096; font-weight: bold;")
-        header2.setFixedWidth(40)
-        header2.setAlignment(Qt.AlignCenter)
-        headers_layout.addWidget(header2)
-
-        header3 = QLabel("Подтв.")
-        header3.setStyleSheet("color: #718096; font-weight: bold;")
-        header3.setFixedWidth(40)
-        header3.setAlignment(Qt.AlignCenter)
-        headers_layout.addWidget(header3)
-
-        header4 = QLabel("Напр.")
-        header4.setStyleSheet("color: #718096; font-weight: bold;")
-        header4.setFixedWidth(40)
-        header4.setAlignment(Qt.AlignCenter)
-        headers_layout.addWidget(header4)
-
-        header5 = QLabel("Действие")
-        header5.setStyleSheet("color: #718096; font-weight: bold;")
-        header5.setFixedWidth(80)
-        header5.setAlignment(Qt.AlignCenter)
-        headers_layout.addWidget(header5)
-
-        headers_widget.setLayout(headers_layout)
-        headers_widget.setStyleSheet("background-color: #2D3748; border-radius: 3px;")
-        layout.addWidget(headers_widget)
-
-        self.list_widget = QListWidget()
-        self.list_widget.setStyleSheet(get_styles()['list_widget'])
-        self.list_widget.setSpacing(5)
-        layout.addWidget(self.list_widget)
+        self.delegate = OrderBlockDelegate(self)
+        self.delegate.show_clicked.connect(self.on_show_block)
+        self.delegate.toggle_confirmed.connect(self.on_toggle_confirmation)
+
+        # Представление рисует только видимые строки, высота строк фиксирована,
+        # так что размеры не пересчитываются по всем строкам модели
+        self.table_view = QTableView()
+        self.table_view.setModel(self.model)
+        self.table_view.setItemDelegate(self.delegate)
+        self.table_view.setStyleSheet(get_styles()['table_view'])
+        self.table_view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table_view.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.table_view.setShowGrid(False)
+        self.table_view.setWordWrap(False)
+        self.table_view.verticalHeader().hide()
+        self.table_view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table_view.verticalHeader().setDefaultSectionSize(self.ROW_HEIGHT)
+        header = self.table_view.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.Fixed)
+        for column, (_, width) in enumerate(COLUMNS):
+            header.resizeSection(column, width)
+        header.setStretchLastSection(True)
+        layout.addWidget(self.table_view)
 
         button_layout = QHBoxLayout()
         self.clear_btn = QPushButton("Очистить список")
         self.clear_btn.setStyleSheet(get_styles()['button'])
         self.clear_btn.clicked.connect(self.clear_list)
-        
+
         self.refresh_btn = QPushButton("Обновить")
         self.refresh_btn.setStyleSheet(get_styles()['button'])
         self.refresh_btn.clicked.connect(self.refresh_list)
-        
+
         button_layout.addWidget(self.refresh_btn)
         button_layout.addWidget(self.clear_btn)
         layout.addLayout(button_layout)
 
         self.setLayout(layout)
 
-    def setup_timer(self):
-        """Таймер для автоматического обновления списка"""
-        self.update_timer = QTimer()
-        self.update_timer.timeout.connect(self.refresh_list)
-        self.update_timer.start(5000)  # Обновление каждые 5 секунд
+    def subscribe_events(self):
+        """Подписка на изменения блоков вместо периодического опроса базы"""
+        self.blocks_changed.connect(self.apply_blocks_changed)
+        self.confirmation_changed.connect(self.apply_confirmation_changed)
+        handlers = [(BlocksChanged, self.blocks_changed.emit),
+                    (ConfirmationChanged, self.confirmation_changed.emit)]
+        for event_type, handler in handlers:
+            event_bus.subscribe(event_type, handler)
+        # После удаления виджета обработчики не должны оставаться в шине
+        self.destroyed.connect(lambda: [event_bus.unsubscribe(event_type, handler)
+                                        for event_type, handler in handlers])
+
+    def apply_blocks_changed(self, event):
+        """Применение изменений к модели по id блоков"""
+        self.model.remove_blocks(event.removed)
+        for block in event.updated:
+            self.model.update_block(block)
+        # Новые блоки показываются сверху, как в выборке по created_at DESC
+        self.model.insert_blocks(event.added)
+
+    def apply_confirmation_changed(self, event):
+        for block_id, confirmed in event.changes.items():
+            self.model.set_confirmed(block_id, confirmed)
 
     def update_blocks(self, blocks):
-        """Обновление списка ордер-блоками из базы данных"""
-        self.clear_list()
-        for block in blocks:
-            self.add_order_block(block)
-
-    def add_order_block(self, block):
-        item_widget = OrderBlockItemWidget(
-            block_id=block['id'],
-            symbol=block['symbol'],
-            timeframe=block['timeframe'],
-            confirmed=block['confirmed'],
-            direction=block['block_type']
-        )
-        
-        item_widget.show_clicked.connect(self.on_show_block)
-        item_widget.toggle_confirmed.connect(self.on_toggle_confirmation)
-        
-        item = QListWidgetItem(self.list_widget)
-        item.setSizeHint(item_widget.sizeHint())
-        self.list_widget.addItem(item)
-        self.list_widget.setItemWidget(item, item_widget)
+        """Обновление списка ордер-блоками из базы данных (только разница с текущим списком)"""
+        self.model.apply_snapshot(blocks)
+
+    def add_order_block(self, block, row=None):
+        self.model.insert_blocks([block], self.model.rowCount() if row is None else row)
+
+    def remove_order_block(self, block_id):
+        self.model.remove_blocks([block_id])
 
     def on_show_block(self, block_id):
         print(f"Показываем ордер-блок: {block_id}")
@@ -253,10 +342,11 @@ class OrderBlockList(QWidget):
         """Обработка изменения статуса подтверждения"""
         success = data_processor.update_order_block_confirmation(block_id, confirmed)
         if success:
+            # Модель обновится по событию ConfirmationChanged
             print(f"Статус ордер-блока {block_id} изменен на: {'Подтвержден' if confirmed else 'Не подтвержден'}")
 
     def clear_list(self):
-        self.list_widget.clear()
+        self.model.clear()
 
     def refresh_list(self):
         """Обновление списка из базы данных"""
@@ -1,21 +1,58 @@
 import tkinter as tk
 from tkinter import ttk
+import queue
+import threading
+import time
 import sys
 import os
+from datetime import datetime
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from database_manager import DatabaseManager
+from event_bus import event_bus, SeriesProcessed, RefreshProgress
+
+ALL_VALUES = "Все"
+
+CONFIRMED_VALUES = {ALL_VALUES: None, "Да": True, "Нет": False}
 
 class SimpleMainWindow:
-    def __init__(self, root, db_manager=None):
+    # Период опроса очереди загрузки и бюджет вставки строк за один проход, мс
+    POLL_INTERVAL_MS = 30
+    INSERT_BUDGET_MS = 15
+    # Строк на странице списка (следующая страница загружается при прокрутке до конца)
+    PAGE_SIZE = 200
+    # Задержка применения фильтра после последнего нажатия клавиши, мс
+    DEBOUNCE_MS = 250
+    # Сколько лучших по силе блоков показывается по завершении поиска
+    TOP_BLOCKS = 5
+
+    def __init__(self, root, db_manager=None, on_first_page=None):
         self.root = root
         self.db_manager = db_manager
+        # Вызывается один раз, когда первая страница списка вставлена в таблицу
+        self.on_first_page = on_first_page
+        self._load_queue = queue.Queue()
+        self._load_generation = 0
+        self._cancel_event = None
+        self._filters = {}
+        self._page_after = None
+        self._next_cursor = None
+        self._pending_rows = []
+        self._loaded_count = 0
+        self._load_finished = True
+        self._source_exhausted = False
+        self._poll_scheduled = False
+        self._filter_job = None
+        self._filter_values_queue = queue.Queue()
+        self._refresh_queue = queue.Queue()
+        self._refresh_thread = None
+        self._search_partial = False
         self.setup_window()
         self.create_widgets()
         
         # Загружаем данные из БД
         if self.db_manager:
-            self.load_order_blocks()
+            self.refresh()
     
     def setup_window(self):
         self.root.title("SMAT - Smart Money Analysis Tool")
@@ -36,20 +73,102 @@ class SimpleMainWindow:
         
         # Кнопка обновления
         button_frame = ttk.Frame(left_frame)
-        button_frame.pack(fill=tk.X, pady=(0, 10))
+        button_frame.pack(fill=tk.X, pady=(0, 5))
+        
+        ttk.Button(button_frame, text="Обновить", command=self.refresh).pack(side=tk.LEFT)
+        ttk.Button(button_frame, text="Отмена", command=self.cancel_loading).pack(side=tk.LEFT, padx=(5, 0))
+        ttk.Button(button_frame, text="Показать", command=self.show_selected_block).pack(side=tk.LEFT, padx=(5, 0))
+        ttk.Button(button_frame, text="Сбросить фильтры", command=self.reset_filters).pack(side=tk.LEFT, padx=(5, 0))
+        
+        # Поиск новых блоков: результаты каждого ряда появляются в списке по мере готовности,
+        # бюджет времени (в секундах, пусто - без ограничения) обрывает поиск с частичным результатом
+        self.budget_var = tk.StringVar(value="")
+        self.search_button = ttk.Button(button_frame, text="Поиск блоков", command=self.start_search)
+        self.search_button.pack(side=tk.LEFT, padx=(15, 0))
+        ttk.Label(button_frame, text="Бюджет, с:").pack(side=tk.LEFT, padx=(5, 2))
+        ttk.Entry(button_frame, textvariable=self.budget_var, width=5).pack(side=tk.LEFT)
+        
+        progress_frame = ttk.Frame(left_frame)
+        progress_frame.pack(fill=tk.X, pady=(0, 5))
+        self.progress_bar = ttk.Progressbar(progress_frame, orient=tk.HORIZONTAL, mode="determinate", length=150)
+        self.progress_bar.pack(side=tk.LEFT)
+        self.progress_label = ttk.Label(progress_frame, text="")
+        self.progress_label.pack(side=tk.LEFT, padx=(5, 0))
+        
+        # Фильтры: ввод текста применяется с задержкой DEBOUNCE_MS, выбор из списка - сразу.
+        # Смена фильтра отменяет текущую загрузку и запускает новую
+        self.symbol_var = tk.StringVar(value="")
+        self.timeframe_var = tk.StringVar(value=ALL_VALUES)
+        self.direction_var = tk.StringVar(value=ALL_VALUES)
+        self.confirmed_var = tk.StringVar(value=ALL_VALUES)
+        self.min_strength_var = tk.StringVar(value="")
+        self.max_strength_var = tk.StringVar(value="")
+        self.date_from_var = tk.StringVar(value="")
+        self.date_to_var = tk.StringVar(value="")
+        
+        filter_frame = ttk.Frame(left_frame)
+        filter_frame.pack(fill=tk.X, pady=(0, 5))
+        
+        # Пара: ввод задает префикс, выпадающий список - известные символы
+        ttk.Label(filter_frame, text="Пара:").pack(side=tk.LEFT, padx=(0, 2))
+        self.symbol_box = ttk.Combobox(filter_frame, textvariable=self.symbol_var, width=12)
+        self.symbol_box.pack(side=tk.LEFT)
+        self.symbol_box.bind("<<ComboboxSelected>>", lambda event: self.schedule_filter(0))
+        
+        ttk.Label(filter_frame, text="ТФ:").pack(side=tk.LEFT, padx=(10, 2))
+        self.timeframe_box = ttk.Combobox(filter_frame, textvariable=self.timeframe_var, state="readonly",
+                                          width=6, values=[ALL_VALUES])
+        self.timeframe_box.pack(side=tk.LEFT)
+        
+        ttk.Label(filter_frame, text="Направление:").pack(side=tk.LEFT, padx=(10, 2))
+        self.direction_box = ttk.Combobox(filter_frame, textvariable=self.direction_var, state="readonly",
+                                          width=9, values=[ALL_VALUES])
+        self.direction_box.pack(side=tk.LEFT)
+        
+        ttk.Label(filter_frame, text="Подтвержден:").pack(side=tk.LEFT, padx=(10, 2))
+        confirmed_box = ttk.Combobox(filter_frame, textvariable=self.confirmed_var, state="readonly",
+                                     width=5, values=list(CONFIRMED_VALUES))
+        confirmed_box.pack(side=tk.LEFT)
+        
+        for box in (self.timeframe_box, self.direction_box, confirmed_box):
+            box.bind("<<ComboboxSelected>>", lambda event: self.schedule_filter(0))
+        
+        range_frame = ttk.Frame(left_frame)
+        range_frame.pack(fill=tk.X, pady=(0, 10))
+        
+        ttk.Label(range_frame, text="Сила от").pack(side=tk.LEFT, padx=(0, 2))
+        ttk.Entry(range_frame, textvariable=self.min_strength_var, width=6).pack(side=tk.LEFT)
+        ttk.Label(range_frame, text="до").pack(side=tk.LEFT, padx=(5, 2))
+        ttk.Entry(range_frame, textvariable=self.max_strength_var, width=6).pack(side=tk.LEFT)
+        
+        ttk.Label(range_frame, text="Дата с").pack(side=tk.LEFT, padx=(15, 2))
+        ttk.Entry(range_frame, textvariable=self.date_from_var, width=11).pack(side=tk.LEFT)
+        ttk.Label(range_frame, text="по").pack(side=tk.LEFT, padx=(5, 2))
+        ttk.Entry(range_frame, textvariable=self.date_to_var, width=11).pack(side=tk.LEFT)
+        ttk.Label(range_frame, text="(ГГГГ-ММ-ДД)").pack(side=tk.LEFT, padx=(5, 0))
         
-        ttk.Button(button_frame, text="Обновить", command=self.load_order_blocks).pack(side=tk.LEFT)
+        for var in (self.symbol_var, self.min_strength_var, self.max_strength_var,
+                    self.date_from_var, self.date_to_var):
+            var.trace_add("write", lambda *args: self.schedule_filter())
         
         # Order blocks list
+        tree_frame = ttk.Frame(left_frame)
+        tree_frame.pack(fill=tk.BOTH, expand=True)
+        
         columns = ("ID", "Symbol", "Timeframe", "Direction", "Confidence", "Price", "Confirmed", "Time")
-        self.tree = ttk.Treeview(left_frame, columns=columns, show="headings", height=20)
+        self.tree = ttk.Treeview(tree_frame, columns=columns, show="headings", height=20)
         
         # Настройка столбцов
         for col in columns:
             self.tree.heading(col, text=col)
             self.tree.column(col, width=100)
         
-        self.tree.pack(fill=tk.BOTH, expand=True)
+        # Прокрутка до конца списка подгружает следующую страницу
+        self.scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self._on_tree_scroll)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.tree.bind("<Double-1>", lambda event: self.show_selected_block())
         
         # Info label
         self.info_label = ttk.Label(right_frame, text="Выберите ордер-блок для отображения графика")
@@ -59,42 +178,389 @@ class SimpleMainWindow:
         self.status_label = ttk.Label(left_frame, text="Загрузка данных...")
         self.status_label.pack(fill=tk.X, pady=(5, 0))
     
+    def refresh(self):
+        """Обновление списков значений фильтров и перезагрузка списка блоков"""
+        self.load_filter_values()
+        self.load_order_blocks()
+    
+    def load_filter_values(self):
+        """
+        Списки значений фильтров читаются в фоновом потоке
+        (DatabaseManager кэширует их до следующего изменения БД)
+        """
+        def worker():
+            try:
+                self._filter_values_queue.put((self.db_manager.get_unique_symbols(),
+                                               self.db_manager.get_unique_timeframes(),
+                                               self.db_manager.get_unique_directions()))
+            except Exception as e:
+                self._filter_values_queue.put(e)
+        
+        threading.Thread(target=worker, daemon=True).start()
+        self.root.after(self.POLL_INTERVAL_MS, self._poll_filter_values)
+    
+    def _poll_filter_values(self):
+        try:
+            payload = self._filter_values_queue.get_nowait()
+        except queue.Empty:
+            self.root.after(self.POLL_INTERVAL_MS, self._poll_filter_values)
+            return
+        if isinstance(payload, Exception):
+            print(f"Error loading filter values: {payload}")
+            return
+        symbols, timeframes, directions = payload
+        self.symbol_box.config(values=symbols)
+        self.timeframe_box.config(values=[ALL_VALUES] + timeframes)
+        self.direction_box.config(values=[ALL_VALUES] + directions)
+    
+    def schedule_filter(self, delay=None):
+        """Применение фильтров после паузы во вводе (повторный вызов откладывает применение)"""
+        if self._filter_job is not None:
+            self.root.after_cancel(self._filter_job)
+        self._filter_job = self.root.after(self.DEBOUNCE_MS if delay is None else delay, self._apply_filters)
+    
+    def _apply_filters(self):
+        self._filter_job = None
+        self.load_order_blocks()
+    
+    def reset_filters(self):
+        for var in (self.symbol_var, self.min_strength_var, self.max_strength_var,
+                    self.date_from_var, self.date_to_var):
+            var.set("")
+        for var in (self.timeframe_var, self.direction_var, self.confirmed_var):
+            var.set(ALL_VALUES)
+        self.schedule_filter(0)
+    
+    def _collect_filters(self):
+        """Фильтры из полей ввода (ValueError с понятным сообщением при ошибке ввода)"""
+        def number(var, name):
+            text = var.get().strip().replace(',', '.')
+            if not text:
+                return None
+            try:
+                return float(text)
+            except ValueError:
+                raise ValueError(f"{name}: ожидается число")
+        
+        def day(var, name):
+            text = var.get().strip()
+            if not text:
+                return None
+            try:
+                return datetime.strptime(text, "%Y-%m-%d").date()
+            except ValueError:
+                raise ValueError(f"{name}: ожидается дата ГГГГ-ММ-ДД")
+        
+        timeframe = self.timeframe_var.get()
+        direction = self.direction_var.get()
+        return {
+            'symbol_prefix': self.symbol_var.get().strip(),
+            'timeframe': None if timeframe == ALL_VALUES else timeframe,
+            'direction': None if direction == ALL_VALUES else direction,
+            'confirmed': CONFIRMED_VALUES.get(self.confirmed_var.get()),
+            'min_strength': number(self.min_strength_var, "Сила от"),
+            'max_strength': number(self.max_strength_var, "Сила до"),
+            'date_from': day(self.date_from_var, "Дата с"),
+            'date_to': day(self.date_to_var, "Дата по"),
+        }
+    
     def load_order_blocks(self):
-        """Load order blocks from database"""
+        """
+        Загрузка первой страницы ордер-блоков по текущим фильтрам.
+        Запрос выполняется в фоновом потоке, строки приходят через очередь,
+        которую главный поток опрашивает через after() и вставляет
+        в таблицу порциями, не дольше INSERT_BUDGET_MS за раз
+        """
         try:
-            self.status_label.config(text="Загрузка данных...")
-            
-            blocks = self.db_manager.get_order_blocks()
-            print(f"Loaded {len(blocks)} order blocks from database")
-            
-            # Clear existing items
-            for item in self.tree.get_children():
-                self.tree.delete(item)
-            
-            # Add blocks to treeview
-            for block in blocks:
-                # Структура: id, symbol, timeframe, direction, confirmation_strength, imbalance_high, is_confirmed, timestamp
-                block_id, symbol, timeframe, direction, confidence, price_level, is_confirmed, timestamp = block
-                
-                # Форматирование данных
-                direction_icon = "🟢 UP" if direction == 'up' else "🔴 DOWN"
-                confidence_pct = f"{confidence*100:.0f}%"
-                price_str = f"{price_level:.2f}"
-                confirmed_icon = "✅" if is_confirmed else "❌"
-                time_str = timestamp.split(' ')[0] if timestamp else "N/A"
-                
-                self.tree.insert("", "end", values=(
-                    block_id, symbol, timeframe, direction_icon, 
-                    confidence_pct, price_str, confirmed_icon, time_str
-                ))
-            
-            # Update status
-            self.status_label.config(text=f"Загружено блоков: {len(blocks)}")
-            self.info_label.config(text=f"Загружено {len(blocks)} ордер-блоков")
-                
+            filters = self._collect_filters()
+        except ValueError as e:
+            self.status_label.config(text=str(e))
+            return
+        
+        self.cancel_loading(update_status=False)
+        self.tree.delete(*self.tree.get_children())
+        
+        self._load_generation += 1
+        self._cancel_event = threading.Event()
+        self._filters = filters
+        self._loaded_count = 0
+        self._request_page(None)
+    
+    def load_next_page(self):
+        """Загрузка следующей страницы, если она есть и предыдущая уже вставлена"""
+        if self._load_finished and self._next_cursor is not None:
+            self._request_page(self._next_cursor)
+    
+    def _request_page(self, after):
+        self._page_after = after
+        self._next_cursor = None
+        self._pending_rows = []
+        self._load_finished = False
+        self._source_exhausted = False
+        self.status_label.config(text=f"Загрузка данных... {self._loaded_count}")
+        
+        threading.Thread(
+            target=self._load_worker,
+            args=(self._load_generation, self._cancel_event, self._filters, after),
+            daemon=True
+        ).start()
+        self._schedule_poll()
+    
+    def _on_tree_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if float(last) >= 1.0:
+            self.load_next_page()
+    
+    def cancel_loading(self, update_status=True):
+        """Отмена текущей загрузки (уже вставленные строки остаются)"""
+        if self._cancel_event is not None:
+            self._cancel_event.set()
+        if not self._load_finished:
+            self._load_finished = True
+            self._pending_rows = []
+            # Страница вставлена не полностью - продолжать с курсора нельзя
+            self._next_cursor = None
+            if update_status:
+                self.status_label.config(text=f"Загрузка отменена, показано блоков: {self._loaded_count}")
+    
+    def _load_worker(self, generation, cancel_event, filters, after):
+        """Запрос страницы и форматирование строк вне главного потока"""
+        try:
+            rows, next_cursor = self.db_manager.get_order_blocks_page(filters, self.PAGE_SIZE, after)
+            if not cancel_event.is_set():
+                self._load_queue.put((generation, ([self._format_row(block) for block in rows], next_cursor)))
+        except Exception as e:
+            self._load_queue.put((generation, e))
+    
+    @staticmethod
+    def _format_row(block):
+        # Структура: id, symbol, timeframe, direction, confirmation_strength, imbalance_high, is_confirmed, timestamp
+        block_id, symbol, timeframe, direction, confidence, price_level, is_confirmed, timestamp = block
+        
+        # Форматирование данных
+        direction_icon = "🟢 UP" if str(direction).lower() in ('up', 'bullish') else "🔴 DOWN"
+        confidence_pct = f"{confidence*100:.0f}%" if confidence is not None else "N/A"
+        price_str = f"{price_level:.2f}" if price_level is not None else "N/A"
+        confirmed_icon = "✅" if is_confirmed else "❌"
+        time_str = str(timestamp).split(' ')[0] if timestamp else "N/A"
+        
+        return (block_id, symbol, timeframe, direction_icon,
+                confidence_pct, price_str, confirmed_icon, time_str)
+    
+    def show_selected_block(self):
+        """
+        Показ выбранного блока по сохраненному фрагменту графика:
+        одна строка из chart_snapshots, без запроса к таблице свечей
+        """
+        selection = self.tree.selection()
+        if not selection or not self.db_manager:
+            return
+        block_id = int(self.tree.item(selection[0], "values")[0])
+        snapshot = self.db_manager.get_chart_snapshot(block_id)
+        if snapshot is None:
+            self.info_label.config(text=f"Фрагмент графика для блока {block_id} еще не построен")
+            return
+        
+        block, meta, candles = snapshot['block'], snapshot['meta'], snapshot['candles']
+        lines = [
+            f"{block['symbol']} ({block['timeframe']}) - {block['timestamp']:%Y-%m-%d %H:%M}",
+            f"Направление: {block['direction']}",
+            f"Зона: {block['imbalance_low']} - {block['imbalance_high']}",
+            f"Цель: {block['price_target']}",
+            f"Свечей: {len(candles['close'])} ({meta.get('bars_before')} до, {meta.get('bars_after')} после)",
+            f"Диапазон цены: {meta.get('price_low')} - {meta.get('price_high')}"
+        ]
+        self.info_label.config(text="\n".join(lines))
+    
+    def _schedule_poll(self, delay=None):
+        if not self._poll_scheduled:
+            self._poll_scheduled = True
+            self.root.after(self.POLL_INTERVAL_MS if delay is None else delay, self._poll_load_queue)
+    
+    def _poll_load_queue(self):
+        """Перенос готовых строк из очереди в таблицу порциями по времени"""
+        self._poll_scheduled = False
+        
+        while True:
+            try:
+                generation, payload = self._load_queue.get_nowait()
+            except queue.Empty:
+                break
+            # Результаты отмененных загрузок отбрасываются
+            if generation != self._load_generation or self._load_finished:
+                continue
+            if isinstance(payload, Exception):
+                print(f"Error loading order blocks: {payload}")
+                self.status_label.config(text=f"Ошибка: {payload}")
+                self._load_finished = True
+                self._pending_rows = []
+                return
+            rows, self._next_cursor = payload
+            self._pending_rows.extend(rows)
+            self._source_exhausted = True
+        
+        deadline = time.perf_counter() + self.INSERT_BUDGET_MS / 1000
+        consumed = inserted = 0
+        for row in self._pending_rows:
+            # Блок мог уже появиться в списке из идущего поиска - он уже учтен в счетчике
+            if not self.tree.exists(str(row[0])):
+                self.tree.insert("", "end", iid=str(row[0]), values=row)
+                inserted += 1
+            consumed += 1
+            if consumed % 50 == 0 and time.perf_counter() >= deadline:
+                break
+        del self._pending_rows[:consumed]
+        self._loaded_count += inserted
+        
+        if self._load_finished:
+            return
+        if self._source_exhausted and not self._pending_rows:
+            self._load_finished = True
+            more = ", прокрутите вниз, чтобы загрузить еще" if self._next_cursor is not None else ""
+            self.status_label.config(text=f"Показано блоков: {self._loaded_count}{more}")
+            if self._page_after is None:
+                self.info_label.config(text=f"Загружено {self._loaded_count} ордер-блоков")
+                if self.on_first_page is not None:
+                    callback, self.on_first_page = self.on_first_page, None
+                    callback()
+            # Страница не заполнила видимую область - прокрутки не будет, загружаем следующую сразу
+            if self.tree.yview()[1] >= 1.0:
+                self.load_next_page()
+            return
+        
+        self.status_label.config(text=f"Загрузка данных... {self._loaded_count}")
+        # Пока есть строки, следующая порция вставляется сразу после обработки событий окна
+        self._schedule_poll(1 if self._pending_rows else None)
+
+    def start_search(self):
+        """
+        Поиск блоков конвейером RefreshPipeline в фоновом потоке.
+        События шины (SeriesProcessed, RefreshProgress) приходят в потоке конвейера
+        и передаются главному потоку через очередь, которую опрашивает after()
+        """
+        if self._refresh_thread is not None or not self.db_manager:
+            return
+        text = self.budget_var.get().strip().replace(',', '.')
+        try:
+            budget = float(text) if text else None
+        except ValueError:
+            self.status_label.config(text="Бюджет: ожидается число секунд")
+            return
+        
+        event_bus.subscribe(SeriesProcessed, self._refresh_queue.put)
+        event_bus.subscribe(RefreshProgress, self._refresh_queue.put)
+        self.search_button.config(state=tk.DISABLED)
+        self.progress_bar.config(value=0, maximum=1)
+        self.progress_label.config(text="Поиск: подготовка...")
+        self._refresh_thread = threading.Thread(target=self._search_worker, args=(budget,), daemon=True)
+        self._refresh_thread.start()
+        self.root.after(self.POLL_INTERVAL_MS, self._poll_refresh_queue)
+    
+    def _search_worker(self, budget):
+        try:
+            # Конвейер тянет клиент биржи и детектор - импорт только при первом поиске
+            from refresh_pipeline import RefreshPipeline
+        except ImportError as e:
+            self._refresh_queue.put(('unavailable', e))
+            return
+        try:
+            results = RefreshPipeline(self.db_manager.db_path).run(time_budget=budget)
+            self._refresh_queue.put(('done', results))
         except Exception as e:
-            print(f"Error loading order blocks: {e}")
-            self.status_label.config(text=f"Ошибка: {e}")
+            self._refresh_queue.put(('error', e))
+    
+    def _poll_refresh_queue(self):
+        """Перенос событий поиска в список и индикатор прогресса"""
+        while True:
+            try:
+                item = self._refresh_queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, SeriesProcessed):
+                self._merge_series(item)
+            elif isinstance(item, RefreshProgress):
+                self._show_progress(item)
+            else:
+                self._finish_search(*item)
+                return
+        self.root.after(self.POLL_INTERVAL_MS, self._poll_refresh_queue)
+    
+    def _merge_series(self, event):
+        """Замененные блоки ряда удаляются, новые, подходящие под фильтры, - в начало списка"""
+        for block_id in event.removed:
+            if self.tree.exists(str(block_id)):
+                self.tree.delete(str(block_id))
+                self._loaded_count -= 1
+        for block in event.blocks:
+            if not self._matches_filters(block) or self.tree.exists(str(block['id'])):
+                continue
+            row = self._format_row((block['id'], block['symbol'], block['timeframe'], block['direction'],
+                                    block['confirmation_strength'], block['imbalance_high'],
+                                    block['is_confirmed'], block['timestamp']))
+            self.tree.insert("", 0, iid=str(block['id']), values=row)
+            self._loaded_count += 1
+    
+    def _matches_filters(self, block):
+        """Проверка блока текущими фильтрами списка (та же логика, что в запросе страницы)"""
+        filters = self._filters
+        strength = block['confirmation_strength']
+        day = block['timestamp'].date()
+        # Префикс в запросе страницы приводится к верхнему регистру - здесь так же
+        prefix = (filters.get('symbol_prefix') or '').upper()
+        if prefix and not block['symbol'].startswith(prefix):
+            return False
+        if filters.get('timeframe') and block['timeframe'] != filters['timeframe']:
+            return False
+        if filters.get('direction') and block['direction'] != filters['direction']:
+            return False
+        if filters.get('confirmed') is not None and bool(block['is_confirmed']) != filters['confirmed']:
+            return False
+        if filters.get('min_strength') is not None and (strength is None or strength < filters['min_strength']):
+            return False
+        if filters.get('max_strength') is not None and (strength is None or strength > filters['max_strength']):
+            return False
+        if filters.get('date_from') and day < filters['date_from']:
+            return False
+        if filters.get('date_to') and day > filters['date_to']:
+            return False
+        return True
+    
+    def _show_progress(self, event):
+        self._search_partial = event.partial
+        self.progress_bar.config(value=event.done, maximum=max(event.total, 1))
+        if event.eta is None:
+            eta = "оценка..."
+        else:
+            minutes, seconds = divmod(int(round(event.eta)), 60)
+            eta = f"осталось ~{minutes}:{seconds:02d}"
+        names = {'download': "загрузка", 'store': "сохранение", 'detect': "поиск"}
+        speed = ", ".join(f"{names.get(stage, stage)} {rate:.1f}/с" for stage, rate in event.throughput.items())
+        self.progress_label.config(
+            text=f"Поиск: {event.done}/{event.total} рядов, блоков: {event.blocks}, {eta} | {speed}")
+    
+    def _finish_search(self, kind, payload):
+        event_bus.unsubscribe(SeriesProcessed, self._refresh_queue.put)
+        event_bus.unsubscribe(RefreshProgress, self._refresh_queue.put)
+        self._refresh_thread = None
+        if kind == 'unavailable':
+            # Без модулей обработки поиск не заработает до перезапуска - кнопка остается выключенной
+            print(f"Order block search is unavailable: {payload}")
+            self.progress_label.config(text=f"Поиск недоступен: {payload}")
+            return
+        self.search_button.config(state=tk.NORMAL)
+        if kind == 'error':
+            print(f"Error searching order blocks: {payload}")
+            self.progress_label.config(text=f"Ошибка поиска: {payload}")
+            return
+        
+        # Результаты уже отсортированы по силе подтверждения
+        lines = [f"Найдено блоков: {len(payload)}" + (" (частичный результат по бюджету времени)" if self._search_partial else "")]
+        for block in payload[:self.TOP_BLOCKS]:
+            lines.append(f"{block['symbol']} ({block['timeframe']}) {block['direction']} "
+                         f"сила {block['confirmation_strength']:.2f}")
+        self.info_label.config(text="\n".join(lines))
+        self.status_label.config(text=f"Поиск завершен, показано блоков: {self._loaded_count}")
+        self.load_filter_values()
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -77,6 +77,33 @@ def get_styles():
             }}
         """,
         
+        'table_view': f"""
+            QTableView {{
+                background-color: {Config.COLORS['panel']};
+                border: 1px solid {Config.COLORS['border']};
+                border-radius: 5px;
+                outline: none;
+            }}
+            QHeaderView::section {{
+                background-color: {Config.COLORS['panel']};
+                color: #718096;
+                font-weight: bold;
+                border: none;
+                padding: 5px;
+            }}
+            QScrollBar:vertical {{
+                border: none;
+                background-color: {Config.COLORS['background']};
+                width: 12px;
+                margin: 0px;
+            }}
+            QScrollBar::handle:vertical {{
+                background-color: {Config.COLORS['border']};
+                border-radius: 6px;
+                min-height: 30px;
+            }}
+        """,
+        
         'chart_widget': f"""
             QWidget {{
                 background-color: {Config.COLORS['background']};
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+Замер производительности интерфейса без экрана
+
+Использование:
+    python gui_benchmark.py [--sizes 1000 10000 100000] [--repeat 20] [--no-tk]
+                            [--json result.json] [--baseline old.json] [--tolerance 0.25]
+
+OrderBlockList и ChartWidget работают на платформе Qt offscreen, окно Tk -
+на дисплее из DISPLAY или на виртуальном Xvfb, если он установлен (иначе
+замер Tk пропускается). На синтетических наборах блоков замеряются полное
+обновление списка, инкрементальные изменения, прокрутка и открытие графика.
+Окно Tk загружает список своим путем (фоновый запрос страницы к временной БД
+и вставка через _poll_load_queue), поэтому в замер входит и сам запрос.
+
+Для каждого сценария выводится время шагов (вместе с перерисовкой) и
+задержки цикла событий: таймер-пульс срабатывает каждые HEARTBEAT_MS мс,
+задержка - насколько позже положенного он сработал. С --baseline результаты
+сравниваются с сохраненным через --json замером, код возврата 1 - p95 шага
+вырос больше чем на tolerance.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# До импорта PyQt: без экрана Qt рисует в память
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(PROJECT_ROOT)
+
+import numpy as np
+
+HEARTBEAT_MS = 5
+SYMBOLS = [f"{base}USDT" for base in ('BTC', 'ETH', 'SOL', 'XRP', 'ADA', 'DOGE', 'LINK', 'DOT', 'AVAX', 'ATOM')]
+TIMEFRAMES = ['5', '15', '60', '240', 'D']
+# Окно фрагмента графика (chart_snapshots) и длинный ряд для проверки прореживания
+CHART_SIZES = (201, 5000)
+# Изменений за одно инкрементальное обновление: добавлено, изменено, удалено
+INCREMENT = 5
+
+def percentiles(values):
+    """p50/p95/p99/max в мс (ближайший ранг)"""
+    if not values:
+        return {'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'max': 0.0}
+    ordered = sorted(values)
+    rank = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {'p50': rank(0.50), 'p95': rank(0.95), 'p99': rank(0.99), 'max': ordered[-1]}
+
+def run_steps(schedule, run_loop, stop_loop, steps):
+    """
+    Выполнение шагов по одному за проход цикла событий с таймером-пульсом.
+    schedule(ms, func) - отложенный вызов, run_loop/stop_loop - запуск и выход из цикла.
+    Возвращает (длительности шагов, задержки пульса) в мс
+    """
+    durations, stalls = [], []
+    state = {'last': time.perf_counter(), 'running': True}
+
+    def beat():
+        if not state['running']:
+            return
+        now = time.perf_counter()
+        stalls.append(max(0.0, (now - state['last']) * 1000 - HEARTBEAT_MS))
+        state['last'] = now
+        schedule(HEARTBEAT_MS, beat)
+
+    pending = iter(steps)
+
+    def next_step():
+        step = next(pending, None)
+        if step is None:
+            state['running'] = False
+            stop_loop()
+            return
+        started = time.perf_counter()
+        step()
+        durations.append((time.perf_counter() - started) * 1000)
+        # Между шагами пульс успевает сработать, очередь событий разбирается
+        schedule(HEARTBEAT_MS * 2, next_step)
+
+    schedule(HEARTBEAT_MS, beat)
+    schedule(0, next_step)
+    run_loop()
+    return durations, stalls
+
+def make_blocks(count, start_id=1, seed=0):
+    """Блоки в формате database.Database.get_order_blocks (список Qt)"""
+    rng = np.random.default_rng(seed)
+    started = datetime(2024, 1, 1)
+    return [{
+        'id': start_id + offset,
+        'symbol': SYMBOLS[int(rng.integers(len(SYMBOLS)))],
+        'timeframe': TIMEFRAMES[int(rng.integers(len(TIMEFRAMES)))],
+        'block_type': 'bullish' if rng.random() < 0.5 else 'bearish',
+        'price_level': float(rng.uniform(1, 1000)),
+        'open_time': started + timedelta(minutes=5 * offset),
+        'close_time': started + timedelta(minutes=5 * offset + 5),
+        'confirmed': bool(rng.random() < 0.7),
+        'created_at': started + timedelta(minutes=5 * offset)
+    } for offset in range(count)]
+
+def make_db_blocks(count, start_id=1, seed=0):
+    """Блоки в формате OrderBlock.to_dict (окно Tk и график)"""
+    rng = np.random.default_rng(seed)
+    started = datetime(2024, 1, 1)
+    blocks = []
+    for offset in range(count):
+        low = float(rng.uniform(1, 1000))
+        blocks.append({
+            'id': start_id + offset,
+            'symbol': SYMBOLS[int(rng.integers(len(SYMBOLS)))],
+            'timeframe': TIMEFRAMES[int(rng.integers(len(TIMEFRAMES)))],
+            'timestamp': started + timedelta(minutes=5 * offset),
+            'direction': 'BULLISH' if rng.random() < 0.5 else 'BEARISH',
+            'confirmation_strength': float(rng.uniform(0, 20)),
+            'imbalance_low': low,
+            'imbalance_high': low * 1.01,
+            'price_target': low * 1.05,
+            'is_confirmed': bool(rng.random() < 0.7)
+        })
+    return blocks
+
+def make_candles(count, seed=0):
+    """Случайное блуждание цены с блоком на средней свече"""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, count)))
+    open_ = np.r_[close[0], close[:-1]]
+    spread = np.abs(rng.normal(0, 0.004, count)) * close
+    times = np.datetime64('2024-01-01T00:00') + np.arange(count) * np.timedelta64(1, 'h')
+    candles = {'timestamp': times, 'open': open_, 'close': close,
+               'high': np.maximum(open_, close) + spread, 'low': np.minimum(open_, close) - spread}
+    middle = count // 2
+    block = {'symbol': 'BTCUSDT', 'timeframe': '60', 'timestamp': times[middle].astype(datetime),
+             'direction': 'BULLISH', 'is_confirmed': True, 'imbalance_low': float(candles['low'][middle]),
+             'imbalance_high': float(candles['high'][middle]), 'price_target': float(close[middle] * 1.05)}
+    return block, candles
+
+def make_block_db(path, blocks):
+    """БД со схемой models.py и блоками make_db_blocks - окно Tk читает ее своим DatabaseManager"""
+    from models import DatabaseManager as ModelsDatabaseManager, OrderBlock
+
+    manager = ModelsDatabaseManager(path)
+    manager.init_database()
+    session = manager.get_session()
+    try:
+        session.bulk_insert_mappings(OrderBlock, blocks)
+        session.commit()
+    finally:
+        session.close()
+    manager.engine.dispose()
+    return path
+
+def mutated(blocks, step):
+    """Набор после обновления: часть блоков удалена, часть изменена, добавлены новые"""
+    changes = max(1, len(blocks) // 100)
+    kept = blocks[changes:]
+    for index in range(0, len(kept), max(1, len(kept) // changes)):
+        kept[index] = dict(kept[index], confirmed=not kept[index]['confirmed'])
+    return make_blocks(changes, start_id=10 ** 9 + step * changes, seed=step) + kept
+
+def benchmark_qt(sizes, repeat):
+    from PyQt5.QtCore import QEventLoop, QTimer, Qt
+    from PyQt5.QtWidgets import QApplication
+    from gui.orderblock_list import OrderBlockList
+    from gui.chart_widget import ChartWidget
+    from event_bus import BlocksChanged
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    results = []
+
+    def measure(scenario, size, steps):
+        loop = QEventLoop()
+        durations, stalls = run_steps(lambda ms, func: QTimer.singleShot(ms, Qt.PreciseTimer, func),
+                                      loop.exec_, loop.quit, steps)
+        results.append({'ui': 'qt', 'scenario': scenario, 'size': size,
+                        'steps': len(durations), 'step': percentiles(durations), 'stall': percentiles(stalls)})
+
+    widget = OrderBlockList()
+    widget.resize(420, 800)
+    widget.show()
+    view = widget.table_view
+    app.processEvents()
+
+    for size in sizes:
+        blocks = make_blocks(size)
+        heavy_repeat = max(3, repeat // 5)
+
+        def load():
+            widget.clear_list()
+            widget.update_blocks(blocks)
+            view.viewport().repaint()
+        measure('list_full_refresh', size, [load] * heavy_repeat)
+
+        variants = [mutated(blocks, step) for step in range(heavy_repeat)]
+        measure('list_diff_refresh', size,
+                [lambda variant=variant: (widget.update_blocks(variant), view.viewport().repaint())
+                 for variant in variants])
+
+        widget.update_blocks(blocks)
+        next_id = 2 * 10 ** 9
+
+        def increment(step):
+            current = widget.model.blocks
+            event = BlocksChanged(
+                added=make_blocks(INCREMENT, start_id=next_id + step * INCREMENT, seed=step),
+                updated=[dict(block, confirmed=not block['confirmed']) for block in current[:INCREMENT]],
+                removed=[block['id'] for block in current[-INCREMENT:]]
+            )
+            # Тот же путь, что у события шины из потока обработчика
+            widget.blocks_changed.emit(event)
+            view.viewport().repaint()
+        measure('list_incremental', size, [lambda step=step: increment(step) for step in range(repeat)])
+
+        scrollbar = view.verticalScrollBar()
+        positions = np.random.default_rng(size).integers(0, max(1, scrollbar.maximum()) + 1, repeat * 2)
+
+        def scroll(position):
+            scrollbar.setValue(int(position))
+            view.viewport().repaint()
+        measure('list_scroll', size, [lambda position=position: scroll(position) for position in positions])
+
+    widget.clear_list()
+    widget.close()
+
+    chart = ChartWidget()
+    chart.resize(900, 600)
+    chart.show()
+    app.processEvents()
+    for count in CHART_SIZES:
+        series = [make_candles(count, seed) for seed in range(repeat)]
+
+        def open_chart(block, candles):
+            chart.display_block(block, candles)
+            chart.chart.repaint()
+        measure('chart_open', count, [lambda item=item: open_chart(*item) for item in series])
+    chart.close()
+    return results
+
+def start_virtual_display():
+    """Xvfb на свободном номере дисплея, если экрана нет. Возвращает процесс или None"""
+    if os.environ.get('DISPLAY') or not shutil.which('Xvfb'):
+        return None
+    for number in range(99, 110):
+        if os.path.exists(f"/tmp/.X11-unix/X{number}"):
+            continue
+        process = subprocess.Popen(['Xvfb', f":{number}", '-screen', '0', '1280x800x24', '-nolisten', 'tcp'],
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        for _ in range(50):
+            if os.path.exists(f"/tmp/.X11-unix/X{number}"):
+                os.environ['DISPLAY'] = f":{number}"
+                return process
+            time.sleep(0.1)
+        process.terminate()
+    return None
+
+def benchmark_tk(sizes, repeat):
+    import tkinter as tk
+    from gui.simple_main_window import SimpleMainWindow
+    from database_manager import DatabaseManager
+    from event_bus import SeriesProcessed
+
+    display = start_virtual_display()
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"Замер Tk пропущен: нет дисплея ({e})")
+        if display:
+            display.terminate()
+        return []
+
+    results = []
+    window = SimpleMainWindow(root)
+    root.update()
+
+    def measure(scenario, size, steps):
+        durations, stalls = run_steps(root.after, root.mainloop, root.quit, steps)
+        results.append({'ui': 'tk', 'scenario': scenario, 'size': size,
+                        'steps': len(durations), 'step': percentiles(durations), 'stall': percentiles(stalls)})
+
+    def wait_loaded():
+        # Страница читается в фоновом потоке и вставляется через _poll_load_queue -
+        # цикл событий крутится, пока окно не закончит загрузку
+        while not window._load_finished:
+            root.update()
+            time.sleep(0.001)
+
+    try:
+        for size in sizes:
+            window.db_manager = DatabaseManager(make_block_db(f"data/blocks_{size}.db", make_db_blocks(size)))
+
+            def load():
+                window.refresh()
+                wait_loaded()
+            measure('list_full_refresh', size, [load] * max(3, repeat // 5))
+
+            def next_page():
+                window.load_next_page()
+                wait_loaded()
+            pages = min(repeat, -(-size // window.PAGE_SIZE) - 1)
+            measure('list_next_page', size, [next_page] * pages)
+
+            def increment(step):
+                added = make_db_blocks(INCREMENT, start_id=2 * 10 ** 9 + step * INCREMENT, seed=step)
+                removed = [int(iid) for iid in window.tree.get_children()[-INCREMENT:]]
+                window._merge_series(SeriesProcessed('BTCUSDT', '60', added, removed))
+                root.update_idletasks()
+            measure('list_incremental', size, [lambda step=step: increment(step) for step in range(repeat)])
+
+            def scroll(fraction):
+                window.tree.yview_moveto(fraction)
+                root.update_idletasks()
+            fractions = np.random.default_rng(size).random(repeat * 2)
+            measure('list_scroll', size, [lambda fraction=fraction: scroll(fraction) for fraction in fractions])
+    finally:
+        root.destroy()
+        if display:
+            display.terminate()
+    return results
+
+def print_results(results):
+    print(f"{'UI':<4} {'сценарий':<18} {'размер':>7} {'шагов':>6} "
+          f"{'шаг p50':>9} {'p95':>8} {'max':>8}   {'задержка p50':>12} {'p95':>8} {'p99':>8} {'max':>8}")
+    for result in results:
+        step, stall = result['step'], result['stall']
+        print(f"{result['ui']:<4} {result['scenario']:<18} {result['size']:>7} {result['steps']:>6} "
+              f"{step['p50']:>9.2f} {step['p95']:>8.2f} {step['max']:>8.2f}   "
+              f"{stall['p50']:>12.2f} {stall['p95']:>8.2f} {stall['p99']:>8.2f} {stall['max']:>8.2f}")
+    print("Время в мс")
+
+def compare_with_baseline(results, baseline_path, tolerance):
+    """Сравнение p95 шага с сохраненным замером. Возвращает число регрессий"""
+    with open(baseline_path, encoding='utf-8') as file:
+        baseline = {(item['ui'], item['scenario'], item['size']): item for item in json.load(file)['results']}
+
+    regressions = 0
+    for result in results:
+        previous = baseline.get((result['ui'], result['scenario'], result['size']))
+        if previous is None:
+            continue
+        before, after = previous['step']['p95'], result['step']['p95']
+        # Разница меньше миллисекунды - шум таймера, а не регрессия
+        regressed = after > before * (1 + tolerance) and after - before > 1.0
+        regressions += regressed
+        change = (after / before - 1) * 100 if before else 0.0
+        print(f"{result['ui']:<4} {result['scenario']:<18} {result['size']:>7}: "
+              f"p95 {before:.2f} -> {after:.2f} мс ({change:+.0f}%)" + (" РЕГРЕССИЯ" if regressed else ""))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Замер производительности интерфейса без экрана")
+    parser.add_argument('--sizes', nargs='+', type=int, default=[1000, 10000, 100000], help="размеры наборов блоков")
+    parser.add_argument('--repeat', type=int, default=20, help="повторов легких сценариев")
+    parser.add_argument('--no-tk', action='store_true', help="не замерять окно Tk")
+    parser.add_argument('--json', help="сохранить результаты в файл")
+    parser.add_argument('--baseline', help="сравнить с результатами из файла")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="допустимый рост p95 шага")
+    args = parser.parse_args(argv)
+    json_path = os.path.abspath(args.json) if args.json else None
+    baseline_path = os.path.abspath(args.baseline) if args.baseline else None
+
+    # database.py при импорте создает smat.db в текущем каталоге - замер не должен трогать рабочую БД
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            results = benchmark_qt(args.sizes, args.repeat)
+            if not args.no_tk:
+                results += benchmark_tk(args.sizes, args.repeat)
+        finally:
+            os.chdir(PROJECT_ROOT)
+    print_results(results)
+
+    if json_path:
+        from PyQt5.QtCore import QT_VERSION_STR
+        meta = {'created_at': datetime.now().isoformat(timespec='seconds'), 'python': platform.python_version(),
+                'qt': QT_VERSION_STR, 'platform': platform.platform(), 'qpa': os.environ.get('QT_QPA_PLATFORM')}
+        with open(json_path, 'w', encoding='utf-8') as file:
+            json.dump({'meta': meta, 'results': results}, file, ensure_ascii=False, indent=2)
+
+    if baseline_path:
+        return 1 if compare_with_baseline(results, baseline_path, args.tolerance) else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
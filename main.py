@@ -1,35 +1,72 @@
+import time
+
+# Отсчет времени запуска - до всех импортов
+STARTED = time.perf_counter()
+
+import argparse
+import importlib
+import threading
 import tkinter as tk
 import sys
 import os
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+# В пути запуска окна только tkinter и sqlite3: список блоков читается из кэша БД
+# сразу, тяжелые модули (pandas, детектор, клиент API) загружаются в фоне после
+# показа первой страницы. Проверка: python -m utils.import_report
 from gui.simple_main_window import SimpleMainWindow
 from database_manager import DatabaseManager
 
+# Модули, которые понадобятся для поиска блоков и графиков
+PRELOAD_MODULES = ('numpy', 'pandas', 'utils.helpers', 'order_block_detector', 'bybit_api', 'refresh_pipeline')
+
+def elapsed_ms():
+    return (time.perf_counter() - STARTED) * 1000
+
+def preload_modules():
+    """Фоновый импорт тяжелых модулей, чтобы первый поиск не ждал их загрузки"""
+    started = time.perf_counter()
+    for name in PRELOAD_MODULES:
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            print(f"Фоновая загрузка модуля {name} не удалась: {e}")
+    print(f"Фоновая загрузка модулей: {(time.perf_counter() - started) * 1000:.0f} мс")
+
+def on_first_page():
+    print(f"Список блоков показан через {elapsed_ms():.0f} мс после запуска")
+    threading.Thread(target=preload_modules, daemon=True).start()
+
 def main():
     """
     Главная функция запуска SMAT приложения
     """
+    parser = argparse.ArgumentParser(description="SMAT - Smart Money Analysis Tool")
+    parser.add_argument('--demo', action='store_true', help="добавить в БД тестовые ордер-блоки")
+    args = parser.parse_args()
+
     try:
         print("Запуск SMAT Application...")
-        
+
         # Инициализация базы данных
         db_manager = DatabaseManager()
         print("База данных инициализирована")
-        
-        # Добавляем тестовые данные если таблица пустая
-        db_manager.add_test_order_blocks()
-        
+
+        # Тестовые данные пишутся в БД только по запросу, а не при каждом запуске
+        if args.demo:
+            db_manager.add_test_order_blocks()
+
         # Создание и запуск главного окна
         root = tk.Tk()
-        app = SimpleMainWindow(root, db_manager)
-        
-        print("Графический интерфейс загружен успешно")
-        
+        app = SimpleMainWindow(root, db_manager, on_first_page=on_first_page)
+
+        root.update_idletasks()
+        print(f"Графический интерфейс загружен за {elapsed_ms():.0f} мс")
+
         # Запуск главного цикла
         root.mainloop()
-        
+
     except Exception as e:
         print(f"Ошибка при запуске приложения: {e}")
         raise
@@ -1,6 +1,6 @@
 # models.py
 import os
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Boolean, BigInteger
+from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Boolean, BigInteger, LargeBinary, Text, Index, UniqueConstraint, event, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
@@ -16,6 +16,9 @@ class Symbol(Base):
     base_currency = Column(String(10))
     quote_currency = Column(String(10))
     is_active = Column(Boolean, default=True)
+    turnover_24h = Column(Float)
+    tier = Column(Integer)  # 1 - самые ликвидные, None - вне рабочего набора
+    ranked_at = Column(DateTime)
     created_at = Column(DateTime, default=datetime.utcnow)
 
 class KlineData(Base):
@@ -35,6 +38,7 @@ class KlineData(Base):
     
     # Составной индекс для быстрого поиска
     __table_args__ = (
+        Index('ix_klines_symbol_timeframe_timestamp', 'symbol', 'timeframe', 'timestamp'),
         {'sqlite_autoincrement': True},
     )
 
@@ -56,6 +60,27 @@ class OrderBlock(Base):
     is_confirmed = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     
+    # Границы разрыва справедливой стоимости (FVG) на свече имбаланса
+    fvg_high = Column(Float)
+    fvg_low = Column(Float)
+    
+    # Жизненный цикл зоны: ACTIVE -> MITIGATED -> INVALIDATED
+    status = Column(String(12), default='ACTIVE')
+    mitigated_at = Column(DateTime)
+    invalidated_at = Column(DateTime)
+    target_hit_at = Column(DateTime)
+    
+    # Число других таймфреймов с совпадающими зонами
+    confluence_score = Column(Integer, default=0)
+    
+    __table_args__ = (
+        Index('ix_order_blocks_symbol_timeframe_timestamp', 'symbol', 'timeframe', 'timestamp'),
+        # Фильтры и постраничный вывод списка блоков в интерфейсе
+        Index('ix_order_blocks_timestamp', 'timestamp'),
+        Index('ix_order_blocks_symbol_timestamp', 'symbol', 'timestamp'),
+        Index('ix_order_blocks_timeframe_timestamp', 'timeframe', 'timestamp'),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -70,26 +95,139 @@ class OrderBlock(Base):
             'direction': self.direction,
             'confirmation_strength': self.confirmation_strength,
             'price_target': self.price_target,
-            'is_confirmed': self.is_confirmed
+            'is_confirmed': self.is_confirmed,
+            'fvg_high': self.fvg_high,
+            'fvg_low': self.fvg_low,
+            'status': self.status,
+            'mitigated_at': self.mitigated_at,
+            'invalidated_at': self.invalidated_at,
+            'target_hit_at': self.target_hit_at,
+            'confluence_score': self.confluence_score
         }
 
+class ProcessingState(Base):
+    """Водяной знак обработки ряда: последняя обработанная свеча и параметры детектора"""
+    __tablename__ = 'processing_state'
+    
+    id = Column(Integer, primary_key=True)
+    symbol = Column(String(20), nullable=False)
+    timeframe = Column(String(5), nullable=False)
+    last_candle_timestamp = Column(DateTime, nullable=False)
+    params_hash = Column(String(32), nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        UniqueConstraint('symbol', 'timeframe', name='uq_processing_state_series'),
+    )
+
+class ScanJob(Base):
+    """Сохраняемое задание сканирования (поиск блоков или обновление данных)"""
+    __tablename__ = 'scan_jobs'
+    
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(32), nullable=False)
+    params = Column(String(500))
+    status = Column(String(12), default='RUNNING')  # RUNNING/DONE/ABANDONED
+    created_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime)
+
+class ScanJobItem(Base):
+    """Элемент задания - один ряд (symbol, timeframe)"""
+    __tablename__ = 'scan_job_items'
+    
+    id = Column(Integer, primary_key=True)
+    job_id = Column(Integer, nullable=False)
+    symbol = Column(String(20), nullable=False)
+    timeframe = Column(String(5), nullable=False)
+    status = Column(String(12), default='PENDING')  # PENDING/LEASED/DONE/FAILED
+    range_start = Column(DateTime)
+    range_end = Column(DateTime)
+    result_count = Column(Integer, default=0)
+    error = Column(String(500))
+    finished_at = Column(DateTime)
+    
+    # Аренда элемента воркером (распределенный режим)
+    lease_owner = Column(String(100))
+    lease_token = Column(String(32))
+    lease_expires_at = Column(DateTime)
+    attempts = Column(Integer, default=0)
+    
+    __table_args__ = (
+        Index('ix_scan_job_items_job_status', 'job_id', 'status'),
+    )
+
+class ChartSnapshot(Base):
+    """
+    Фрагмент графика подтвержденного блока: окно свечей вокруг свечи блока
+    в сжатом поколоночном виде (utils.helpers.pack_candles) и данные для отображения
+    """
+    __tablename__ = 'chart_snapshots'
+    
+    id = Column(Integer, primary_key=True)
+    block_id = Column(Integer, nullable=False, unique=True)
+    symbol = Column(String(20), nullable=False)
+    timeframe = Column(String(5), nullable=False)
+    candle_count = Column(Integer, nullable=False)
+    # Окно заполнено полностью (свечей после блока достаточно) и больше не пересобирается
+    is_complete = Column(Boolean, default=False)
+    data = Column(LargeBinary, nullable=False)
+    meta = Column(Text)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        Index('ix_chart_snapshots_series', 'symbol', 'timeframe'),
+    )
+
 class DatabaseManager:
     def __init__(self, db_path="data/smat.db"):
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
         self.db_path = db_path
-        self.engine = create_engine(f"sqlite:///{db_path}")
+        # Таймаут ожидания блокировки - БД может использоваться несколькими процессами
+        self.engine = create_engine(f"sqlite:///{db_path}", connect_args={'timeout': 30})
+        event.listen(self.engine, 'connect', self._configure_connection)
         self.Session = sessionmaker(bind=self.engine)
         self.logger = logging.getLogger(__name__)
         
+    @staticmethod
+    def _configure_connection(dbapi_connection, connection_record):
+        """
+        WAL позволяет читать БД во время записи другим процессом той же машины
+        (индекс WAL - в общей памяти, на сетевых файловых системах WAL не работает)
+        """
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.close()
+    
     def init_database(self):
         """Инициализация базы данных и создание таблиц"""
         try:
             Base.metadata.create_all(self.engine)
+            self._upgrade_schema()
             self.logger.info(f"База данных инициализирована: {self.db_path}")
         except Exception as e:
             self.logger.error(f"Ошибка инициализации БД: {e}")
             raise
     
+    def _upgrade_schema(self):
+        """Добавление новых колонок и индексов в уже существующие таблицы"""
+        inspector = inspect(self.engine)
+        existing_tables = inspector.get_table_names()
+        
+        with self.engine.begin() as conn:
+            for table in Base.metadata.sorted_tables:
+                if table.name not in existing_tables:
+                    continue
+                existing_columns = {col['name'] for col in inspector.get_columns(table.name)}
+                for column in table.columns:
+                    if column.name not in existing_columns:
+                        column_type = column.type.compile(dialect=self.engine.dialect)
+                        conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+                        self.logger.info(f"Добавлена колонка {table.name}.{column.name}")
+        
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(self.engine, checkfirst=True)
+    
     def get_session(self):
         """Получить сессию базы данных"""
         return self.Session()
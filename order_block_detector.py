@@ -1,4 +1,6 @@
 # order_block_detector.py
+import hashlib
+import json
 import logging
 import pandas as pd
 from datetime import datetime, timedelta
@@ -6,13 +8,37 @@ from typing import List, Dict, Optional
 import numpy as np
 
 class OrderBlockDetector:
+    # Параметры алгоритма
+    LOOKBACK_PERIOD = 20        # Окно скользящих средних объема и тела
+    CONTEXT_BARS = 10           # Минимум свечей до имбаланса
+    CONFIRMATION_BARS = 5       # Свечи после имбаланса для подтверждения
+    MIN_BODY_RATIO = 0.6
+    MIN_VOLUME_RATIO = 1.5
+    MIN_BODY_MULTIPLIER = 1.5
+    MIN_CONFIRMATION_STRENGTH = 5
+    
     def __init__(self):
         self.logger = logging.getLogger(__name__)
     
-    def detect_imbalance(self, df: pd.DataFrame, lookback_period: int = 20) -> pd.DataFrame:
+    @classmethod
+    def params_hash(cls) -> str:
+        """Хэш параметров алгоритма - при изменении нужен полный пересчет"""
+        params = {
+            'lookback_period': cls.LOOKBACK_PERIOD,
+            'context_bars': cls.CONTEXT_BARS,
+            'confirmation_bars': cls.CONFIRMATION_BARS,
+            'min_body_ratio': cls.MIN_BODY_RATIO,
+            'min_volume_ratio': cls.MIN_VOLUME_RATIO,
+            'min_body_multiplier': cls.MIN_BODY_MULTIPLIER,
+            'min_confirmation_strength': cls.MIN_CONFIRMATION_STRENGTH,
+        }
+        return hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()[:16]
+    
+    def detect_imbalance(self, df: pd.DataFrame, lookback_period: int = LOOKBACK_PERIOD) -> pd.DataFrame:
         """
         Обнаружение имбалансов на свечном графике
         Имбаланс - это большая свеча с маленькими свечами вокруг
+        В том же проходе отмечаются разрывы справедливой стоимости (FVG)
         """
         df = df.copy()
         
@@ -27,11 +53,24 @@ class OrderBlockDetector:
         
         # Ищем имбалансы (большие свечи с высоким объемом)
         df['is_imbalance'] = (
-            (df['body_ratio'] > 0.6) &  # Большое тело
-            (df['volume_ratio'] > 1.5) &  # Высокий объем
-            (df['body_size'] > df['body_size'].rolling(window=lookback_period).mean() * 1.5)  # Большой размер относительно контекста
+            (df['body_ratio'] > self.MIN_BODY_RATIO) &  # Большое тело
+            (df['volume_ratio'] > self.MIN_VOLUME_RATIO) &  # Высокий объем
+            (df['body_size'] > df['body_size'].rolling(window=lookback_period).mean() * self.MIN_BODY_MULTIPLIER)  # Большой размер относительно контекста
         )
         
+        # FVG на свече i: разрыв между high[i-1] и low[i+1] (бычий) или low[i-1] и high[i+1] (медвежий)
+        prev_high = df['high'].shift(1)
+        prev_low = df['low'].shift(1)
+        next_high = df['high'].shift(-1)
+        next_low = df['low'].shift(-1)
+        
+        bullish_fvg = prev_high < next_low
+        bearish_fvg = prev_low > next_high
+        
+        df['fvg_direction'] = np.select([bullish_fvg, bearish_fvg], ['BULLISH', 'BEARISH'], default=None)
+        df['fvg_low'] = np.select([bullish_fvg, bearish_fvg], [prev_high, next_high], default=np.nan)
+        df['fvg_high'] = np.select([bullish_fvg, bearish_fvg], [next_low, prev_low], default=np.nan)
+        
         return df
     
     def find_order_blocks(self, df: pd.DataFrame, timeframe: str) -> List[Dict]:
@@ -60,12 +99,12 @@ class OrderBlockDetector:
         """
         try:
             current_idx = df.index.get_loc(imbalance_idx)
-            if current_idx < 10:  # Нужно достаточно данных для анализа
+            if current_idx < self.CONTEXT_BARS:  # Нужно достаточно данных для анализа
                 return None
             
             # Анализируем свечи до и после имбаланса
             prev_candles = df.iloc[current_idx-5:current_idx]
-            next_candles = df.iloc[current_idx+1:current_idx+6]
+            next_candles = df.iloc[current_idx+1:current_idx+1+self.CONFIRMATION_BARS]
             
             if len(prev_candles) < 3 or len(next_candles) < 3:
                 return None
@@ -78,6 +117,9 @@ class OrderBlockDetector:
             # Проверяем подтверждение (движение цены после имбаланса)
             confirmation = self._check_confirmation(next_candles, is_bullish)
             
+            # Разрыв привязывается к блоку, только если совпадает с ним по направлению
+            has_fvg = imbalance_candle['fvg_direction'] == ('BULLISH' if is_bullish else 'BEARISH')
+            
             if confirmation['confirmed']:
                 block = {
                     'symbol': 'UNKNOWN',  # Будет установлено позже
@@ -91,6 +133,8 @@ class OrderBlockDetector:
                     'direction': 'BULLISH' if is_bullish else 'BEARISH',
                     'confirmation_strength': confirmation['strength'],
                     'price_target': self._calculate_price_target(imbalance_candle, is_bullish),
+                    'fvg_high': imbalance_candle['fvg_high'] if has_fvg else None,
+                    'fvg_low': imbalance_candle['fvg_low'] if has_fvg else None,
                     'created_at': datetime.now()
                 }
                 return block
@@ -122,7 +166,7 @@ class OrderBlockDetector:
                 strength = min(price_movement / next_candles['open'].iloc[0] * 100, 100)
         
         return {
-            'confirmed': strength > 5,  # Минимум 5% движения для подтверждения
+            'confirmed': strength > self.MIN_CONFIRMATION_STRENGTH,  # Минимум 5% движения для подтверждения
             'strength': strength
         }
     
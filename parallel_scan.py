@@ -0,0 +1,112 @@
+# parallel_scan.py
+import logging
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple
+from order_block_detector import OrderBlockDetector
+
+# Порядок колонок в общем буфере свечей
+CANDLE_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+_detector = None
+
+
+class SharedCandleStore:
+    """
+    Свечи всех рядов в одном блоке общей памяти.
+    Каждая колонка хранится как float64, время - как int64 (нс),
+    ряд описывается смещением и длиной, так что воркеры не получают
+    DataFrame через pickle, а читают массивы напрямую.
+    """
+
+    def __init__(self, frames: List[Tuple[str, str, pd.DataFrame]]):
+        total = sum(len(df) for _, _, df in frames)
+        row_count = len(CANDLE_COLUMNS) + 1
+        self.shm = shared_memory.SharedMemory(create=True, size=max(total * row_count * 8, 8))
+        self.total = total
+        self.units = []
+
+        buffer = np.ndarray((row_count, total), dtype=np.float64, buffer=self.shm.buf)
+        times = buffer[0].view(np.int64)
+        offset = 0
+        for symbol, timeframe, df in frames:
+            length = len(df)
+            times[offset:offset + length] = df.index.values.astype('datetime64[ns]').view(np.int64)
+            for row, column in enumerate(CANDLE_COLUMNS, start=1):
+                buffer[row, offset:offset + length] = df[column].to_numpy(dtype=np.float64)
+            self.units.append((self.shm.name, total, offset, length, symbol, timeframe))
+            offset += length
+
+    def close(self):
+        """Освобождение общей памяти"""
+        self.shm.close()
+        self.shm.unlink()
+
+
+def _init_worker():
+    global _detector
+    _detector = OrderBlockDetector()
+
+
+def _detect_unit(unit) -> List[dict]:
+    """Поиск блоков для одного ряда в процессе-воркере"""
+    shm_name, total, offset, length, symbol, timeframe = unit
+    try:
+        shm = shared_memory.SharedMemory(name=shm_name)
+        try:
+            buffer = np.ndarray((len(CANDLE_COLUMNS) + 1, total), dtype=np.float64, buffer=shm.buf)
+            index = pd.DatetimeIndex(buffer[0, offset:offset + length].view(np.int64).astype('datetime64[ns]'),
+                                     name='timestamp')
+            df = pd.DataFrame({column: buffer[row, offset:offset + length].copy()
+                               for row, column in enumerate(CANDLE_COLUMNS, start=1)}, index=index)
+            del buffer
+        finally:
+            shm.close()
+
+        blocks = _detector.find_order_blocks(df, timeframe)
+        for block in blocks:
+            block['symbol'] = symbol
+        return blocks
+    except Exception as e:
+        logging.getLogger(__name__).error(f"Ошибка обработки {symbol} ({timeframe}): {e}")
+        return []
+
+
+def create_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Пул процессов поиска с детектором, созданным один раз на процесс.
+    Запуск пула дороже поиска по небольшой пачке рядов, поэтому пул
+    создается на все задание и передается в detect_parallel
+    """
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+
+
+def detect_parallel(frames: List[Tuple[str, str, pd.DataFrame]], workers: int,
+                    executor: Optional[ProcessPoolExecutor] = None) -> List[dict]:
+    """
+    Поиск ордер-блоков по рядам (symbol, timeframe, df) в пуле процессов.
+    executor - уже запущенный пул (create_pool), без него пул создается на один вызов.
+    Результат объединяется в порядке входных рядов, поэтому не зависит
+    от порядка завершения воркеров.
+    """
+    logger = logging.getLogger(__name__)
+    frames = [(symbol, timeframe, df) for symbol, timeframe, df in frames if not df.empty]
+    if not frames:
+        return []
+
+    store = SharedCandleStore(frames)
+    try:
+        chunksize = max(1, len(store.units) // (workers * 4))
+        if executor is not None:
+            results = list(executor.map(_detect_unit, store.units, chunksize=chunksize))
+        else:
+            with create_pool(workers) as own_executor:
+                results = list(own_executor.map(_detect_unit, store.units, chunksize=chunksize))
+    finally:
+        store.close()
+
+    all_blocks = [block for blocks in results for block in blocks]
+    logger.info(f"Параллельный поиск: {len(frames)} рядов, {workers} процессов, найдено {len(all_blocks)} блоков")
+    return all_blocks
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Локальный HTTP-сервис чтения ордер-блоков и фрагментов графика
+
+Использование:
+    python query_server.py [--host 127.0.0.1] [--port 8765] [--db data/smat.db]
+
+Только GET и HEAD, ответы в JSON:
+    /blocks?symbol=&symbol_prefix=&timeframe=&direction=&confirmed=1&min_strength=&max_strength=
+           &date_from=ГГГГ-ММ-ДД&date_to=ГГГГ-ММ-ДД&limit=200&cursor=
+                          страница блоков по убыванию времени, next - курсор следующей страницы
+    /blocks/<id>/chart    фрагмент графика блока
+    /filters              списки значений фильтров
+    /generation           текущая версия данных
+
+БД читает только этот процесс (через DatabaseManager, т.е. из опубликованных
+снимков, а пока их нет - саму БД в режиме только для чтения), инструменты
+обращаются к сервису. Ошибка чтения БД - ответ 500, он не кэшируется. Соединения keep-alive (HTTP/1.1),
+ответы сжимаются gzip, если клиент его принимает. ETag ответа - версия данных
+и адрес запроса: пока версия не сменилась, запрос с If-None-Match получает
+304 без обращения к БД, а готовые ответы берутся из кэша.
+"""
+
+import argparse
+import base64
+import binascii
+import gzip
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+from database_manager import DatabaseManager
+
+# Поля строки get_order_blocks_page
+BLOCK_FIELDS = ('id', 'symbol', 'timeframe', 'direction', 'confirmation_strength',
+                'imbalance_high', 'is_confirmed', 'timestamp')
+CANDLE_FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+DEFAULT_LIMIT = 200
+MAX_LIMIT = 1000
+# Ответы меньше этого размера не сжимаются - выигрыш меньше накладных расходов
+GZIP_MIN_BYTES = 1024
+CACHE_SIZE = 256
+
+# Статусы ответов, которые сохраняются в кэше версии данных
+CACHED_STATUSES = (200, 404)
+
+CHART_PATH = re.compile(r'^/blocks/(\d+)/chart$')
+TRUE_VALUES = ('1', 'true', 'yes')
+FALSE_VALUES = ('0', 'false', 'no')
+
+class QueryError(Exception):
+    """Ошибка запроса с HTTP-статусом ответа"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+def encode_cursor(cursor):
+    if cursor is None:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(list(cursor)).encode()).decode()
+
+def decode_cursor(token):
+    try:
+        timestamp, block_id = json.loads(base64.urlsafe_b64decode(token.encode()))
+        return str(timestamp), int(block_id)
+    except (ValueError, TypeError, binascii.Error):
+        raise QueryError(400, "cursor: неверный курсор")
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    # Массивы numpy (свечи фрагмента) и их элементы
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    raise TypeError(f"{type(value).__name__} не сериализуется в JSON")
+
+class QueryService:
+    """
+    Ответы на запросы без привязки к HTTP: (статус, JSON). Готовые ответы
+    кэшируются для текущей версии данных и сбрасываются при ее смене
+    """
+
+    def __init__(self, db_manager, cache_size=CACHE_SIZE):
+        self.db_manager = db_manager
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._cache_generation = None
+        self._cache_lock = threading.Lock()
+
+    def generation(self):
+        return self.db_manager.data_generation()
+
+    def respond(self, generation, path, params, compressed=False):
+        """
+        Ответ (status, body, сжат ли body) для версии данных generation, из кэша
+        или из БД. compressed - сжать gzip, если ответ не меньше GZIP_MIN_BYTES
+        """
+        key = (path, tuple(sorted(params.items())), compressed)
+        with self._cache_lock:
+            if generation != self._cache_generation:
+                self._cache.clear()
+                self._cache_generation = generation
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+
+        try:
+            payload = self.query(path, params)
+            status = 200
+        except QueryError as e:
+            status, payload = e.status, {'error': str(e)}
+        except sqlite3.Error as e:
+            logging.getLogger(__name__).error(f"Ошибка БД при запросе {path}: {e}")
+            status, payload = 500, {'error': "Ошибка чтения БД"}
+        except Exception:
+            logging.getLogger(__name__).exception(f"Ошибка обработки запроса {path}")
+            status, payload = 500, {'error': "Внутренняя ошибка сервиса"}
+        body = json.dumps(payload, ensure_ascii=False, separators=(',', ':'), default=_json_default).encode()
+        gzipped = compressed and len(body) >= GZIP_MIN_BYTES
+        if gzipped:
+            body = gzip.compress(body, compresslevel=5)
+
+        # Кэшируются только ответы, определяемые версией данных: ошибки разбора
+        # параметров (их ключи не ограничены) и сбои чтения (500) - нет
+        if status in CACHED_STATUSES:
+            with self._cache_lock:
+                if generation == self._cache_generation:
+                    self._cache[key] = (status, body, gzipped)
+                    if len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+        return status, body, gzipped
+
+    def query(self, path, params):
+        if path == '/blocks':
+            return self.blocks(params)
+        match = CHART_PATH.match(path)
+        if match:
+            return self.chart(int(match.group(1)))
+        if path == '/filters':
+            return {'symbols': self.db_manager.get_unique_symbols(strict=True),
+                    'timeframes': self.db_manager.get_unique_timeframes(strict=True),
+                    'directions': self.db_manager.get_unique_directions(strict=True)}
+        if path == '/generation':
+            return {'generation': self.generation()}
+        raise QueryError(404, f"Неизвестный адрес: {path}")
+
+    def blocks(self, params):
+        filters = self.parse_filters(params)
+        limit = self._integer(params, 'limit', DEFAULT_LIMIT)
+        if not 1 <= limit <= MAX_LIMIT:
+            raise QueryError(400, f"limit: от 1 до {MAX_LIMIT}")
+        after = decode_cursor(params['cursor']) if params.get('cursor') else None
+
+        rows, next_cursor = self.db_manager.get_order_blocks_page(filters, limit, after)
+        blocks = []
+        for row in rows:
+            block = dict(zip(BLOCK_FIELDS, row))
+            block['is_confirmed'] = bool(block['is_confirmed'])
+            blocks.append(block)
+        return {'blocks': blocks, 'next': encode_cursor(next_cursor)}
+
+    def chart(self, block_id):
+        snapshot = self.db_manager.get_chart_snapshot(block_id, strict=True)
+        if snapshot is None:
+            raise QueryError(404, f"Фрагмент графика для блока {block_id} не найден")
+        candles = snapshot['candles']
+        return {
+            'block': snapshot['block'],
+            'meta': snapshot['meta'],
+            'candles': dict({'timestamp': [str(value) for value in candles['timestamp']]},
+                            **{field: candles[field] for field in CANDLE_FIELDS})
+        }
+
+    @classmethod
+    def parse_filters(cls, params):
+        """Фильтры DatabaseManager._order_blocks_query из параметров запроса"""
+        confirmed = params.get('confirmed', '').lower()
+        if confirmed and confirmed not in TRUE_VALUES + FALSE_VALUES:
+            raise QueryError(400, "confirmed: ожидается true или false")
+        date_from, date_to = cls._day(params, 'date_from'), cls._day(params, 'date_to')
+        if date_from and date_to and date_from > date_to:
+            raise QueryError(400, "date_from: позже date_to")
+        min_strength, max_strength = cls._number(params, 'min_strength'), cls._number(params, 'max_strength')
+        if min_strength is not None and max_strength is not None and min_strength > max_strength:
+            raise QueryError(400, "min_strength: больше max_strength")
+        return {
+            'symbol': params.get('symbol', '').upper() or None,
+            'symbol_prefix': params.get('symbol_prefix', ''),
+            'timeframe': params.get('timeframe') or None,
+            'direction': params.get('direction') or None,
+            'confirmed': (confirmed in TRUE_VALUES) if confirmed else None,
+            'min_strength': min_strength,
+            'max_strength': max_strength,
+            'date_from': date_from,
+            'date_to': date_to,
+        }
+
+    @staticmethod
+    def _number(params, name):
+        if not params.get(name):
+            return None
+        try:
+            value = float(params[name])
+        except ValueError:
+            raise QueryError(400, f"{name}: ожидается число")
+        if not math.isfinite(value):
+            raise QueryError(400, f"{name}: ожидается конечное число")
+        return value
+
+    @staticmethod
+    def _integer(params, name, default):
+        if not params.get(name):
+            return default
+        try:
+            return int(params[name])
+        except ValueError:
+            raise QueryError(400, f"{name}: ожидается целое число")
+
+    @staticmethod
+    def _day(params, name):
+        if not params.get(name):
+            return None
+        try:
+            return date.fromisoformat(params[name])
+        except ValueError:
+            raise QueryError(400, f"{name}: ожидается дата ГГГГ-ММ-ДД")
+
+class QueryRequestHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 - соединение остается открытым между запросами клиента
+    protocol_version = 'HTTP/1.1'
+    # Простаивающее keep-alive соединение закрывается через timeout секунд
+    timeout = 30
+    # Заголовки и тело уходят разными записями - без TCP_NODELAY второй пакет
+    # ждет подтверждения первого (~40 мс на каждый ответ keep-alive соединения)
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self._respond(send_body=True)
+
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+    def _respond(self, send_body):
+        service = self.server.service
+        url = urlsplit(self.path)
+        params = dict(parse_qsl(url.query))
+        generation = service.generation()
+        etag = hashlib.sha1(f"{url.path}?{urlencode(sorted(params.items()))}".encode()).hexdigest()[:16]
+        etag = f"{generation}.{etag}"
+
+        # Повторный опрос без изменений данных - 304 без обращения к БД
+        if etag in self._client_etags():
+            self.send_response(304)
+            self.send_header('ETag', f'"{etag}"')
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        accepts_gzip = 'gzip' in self.headers.get('Accept-Encoding', '').lower()
+        status, body, compressed = service.respond(generation, url.path, params, compressed=accepts_gzip)
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Vary', 'Accept-Encoding')
+        if status == 200:
+            # Сжатый ответ - другое представление, у него свой ETag
+            self.send_header('ETag', f'"{etag}-gzip"' if compressed else f'"{etag}"')
+        if compressed:
+            self.send_header('Content-Encoding', 'gzip')
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def _client_etags(self):
+        """ETag'и из If-None-Match без кавычек, признака W/ и суффикса сжатия"""
+        tags = set()
+        for tag in self.headers.get('If-None-Match', '').split(','):
+            tag = tag.strip()
+            if tag.startswith('W/'):
+                tag = tag[2:]
+            tag = tag.strip('"')
+            if tag.endswith('-gzip'):
+                tag = tag[:-len('-gzip')]
+            if tag:
+                tags.add(tag)
+        return tags
+
+    def log_message(self, format, *args):
+        logging.getLogger(__name__).debug("%s - %s", self.address_string(), format % args)
+
+class QueryServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, db_manager):
+        super().__init__(address, QueryRequestHandler)
+        self.service = QueryService(db_manager)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Локальный HTTP-сервис чтения ордер-блоков")
+    parser.add_argument('--host', default=Config.QUERY_SERVER_HOST, help="адрес (по умолчанию только локальный)")
+    parser.add_argument('--port', type=int, default=Config.QUERY_SERVER_PORT)
+    parser.add_argument('--db', default="data/smat.db", help="БД обработки (читаются ее опубликованные снимки)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    # Сервис только читает: БД обработки не создается и не изменяется (индексы и т.п.)
+    db_manager = DatabaseManager(args.db, read_only=True)
+    server = QueryServer((args.host, args.port), db_manager)
+    logging.getLogger(__name__).info(f"Сервис блоков: http://{args.host}:{server.server_address[1]}/blocks")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        db_manager.close()
+
+if __name__ == "__main__":
+    main()
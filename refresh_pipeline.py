@@ -0,0 +1,225 @@
+# refresh_pipeline.py
+import logging
+import queue
+import threading
+import time
+from typing import Callable, List, Optional
+from data_collector import DataCollector
+from block_processor import BlockProcessor
+from event_bus import event_bus, SeriesProcessed, RefreshProgress
+
+_STOP = object()
+
+class RefreshPipeline:
+    """
+    Конвейерное обновление: загрузка -> сохранение -> поиск блоков.
+    Каждая пара (symbol, timeframe) проходит стадии независимо, стадии
+    соединены ограниченными очередями, поэтому поиск блоков по первым
+    символам идет параллельно с загрузкой следующих, а переполненная
+    очередь притормаживает предыдущую стадию.
+    Блоки каждой пары сохраняются сразу после поиска и публикуются в шину
+    событием SeriesProcessed вместе с прогрессом RefreshProgress.
+    """
+
+    def __init__(self, db_path="data/smat.db", download_workers=4, store_workers=1,
+                 detect_workers=2, queue_size=32, bus=event_bus):
+        self.collector = DataCollector(db_path)
+        self.block_processor = BlockProcessor(db_path)
+        self.bus = bus
+        self.download_workers = download_workers
+        # SQLite допускает одного писателя - по умолчанию один поток сохранения
+        self.store_workers = store_workers
+        self.detect_workers = detect_workers
+        self.queue_size = queue_size
+        self.stats = {}
+        self._stats_lock = threading.Lock()
+        self._deadline = None
+        self._progress = {}
+        self.logger = logging.getLogger(__name__)
+
+    def run(self, symbols: Optional[list] = None, timeframes: Optional[list] = None, days_back=1,
+            on_result: Optional[Callable] = None, time_budget: Optional[float] = None) -> List[dict]:
+        """
+        Полный проход конвейера. on_result(symbol, timeframe, blocks) вызывается
+        по мере готовности результатов каждой пары (блоки уже сохранены в БД).
+        time_budget - ограничение времени в секундах: после него новые пары не
+        загружаются и не обрабатываются (их водяные знаки не сдвигаются, они будут
+        обработаны при следующем обновлении), уже найденные блоки сохраняются.
+        Возвращает сохраненные блоки по убыванию силы подтверждения
+        """
+        if symbols is None:
+            symbols = self.collector.get_active_symbols()
+        if timeframes is None:
+            timeframes = ['5', '15', '60', '240', 'D']
+
+        started = time.time()
+        self._deadline = started + time_budget if time_budget else None
+        self.stats = {name: {'processed': 0, 'errors': 0, 'skipped': 0, 'busy_seconds': 0.0}
+                      for name in ('download', 'store', 'detect')}
+        self._progress = {'started': started, 'done': 0, 'total': len(symbols) * len(timeframes), 'blocks': 0}
+
+        download_q = queue.Queue(maxsize=self.queue_size)
+        store_q = queue.Queue(maxsize=self.queue_size)
+        detect_q = queue.Queue(maxsize=self.queue_size)
+        results = []
+        # Ряды, по которым сохранены блоки и сдвинуты водяные знаки, и удаленные блоки
+        committed = {'series': 0, 'removed': 0}
+        results_lock = threading.Lock()
+        # SQLite допускает одного писателя - блоки пар сохраняются по очереди
+        commit_lock = threading.Lock()
+
+        def download(item):
+            symbol, timeframe = item
+            try:
+                klines = self.collector.fetch_new_klines(symbol, timeframe, days_back)
+            except Exception as e:
+                # Поиск блоков все равно выполняется по уже сохраненным данным
+                self.logger.error(f"Ошибка загрузки {symbol} ({timeframe}): {e}")
+                klines = None
+            return symbol, timeframe, klines
+
+        def store(item):
+            symbol, timeframe, klines = item
+            if klines:
+                self.collector.data_manager.store_klines(symbol, timeframe, klines)
+            return symbol, timeframe
+
+        def detect(item):
+            symbol, timeframe = item
+            # Ряд без новых свечей после водяного знака не пересчитывается
+            plan = self.block_processor.plan_series([symbol], [timeframe])
+            blocks = []
+            for series in plan:
+                blocks.extend(self.block_processor.detect_series(series))
+
+            saved, removed = [], []
+            if plan:
+                with commit_lock:
+                    saved, removed = self.block_processor.commit_series(plan, blocks, finalize=False)
+            with results_lock:
+                results.extend(saved)
+                committed['series'] += len(plan)
+                committed['removed'] += len(removed)
+            with self._stats_lock:
+                self._progress['blocks'] += len(saved)
+            if on_result:
+                on_result(symbol, timeframe, saved)
+            self.bus.publish(SeriesProcessed(symbol, timeframe, saved, removed))
+            return None
+
+        stages = [
+            # Сохранение загруженных свечей не пропускается по бюджету - данные не теряются
+            self._start_stage('download', download, download_q, store_q, self.download_workers),
+            self._start_stage('store', store, store_q, detect_q, self.store_workers, skippable=False),
+            self._start_stage('detect', detect, detect_q, None, self.detect_workers),
+        ]
+
+        for symbol in symbols:
+            for timeframe in timeframes:
+                download_q.put((symbol, timeframe))
+        download_q.put(_STOP)
+
+        for supervisor in stages:
+            supervisor.join()
+
+        # Новые свечи меняют статусы и фрагменты графика и уже сохраненных блоков,
+        # поэтому пересчет и публикация нужны после любого обработанного ряда,
+        # даже если новых блоков не найдено
+        if committed['series'] or committed['removed']:
+            self.block_processor.update_lifecycle()
+            self.block_processor.update_confluence()
+            self.block_processor.publish_snapshot()
+
+        skipped = sum(stage_stats['skipped'] for stage_stats in self.stats.values())
+        self._publish_progress(finished=True, partial=skipped > 0)
+
+        elapsed = time.time() - started
+        self.logger.info(f"Конвейерное обновление завершено за {elapsed:.1f} с, найдено {len(results)} блоков"
+                         + (f", пропущено по бюджету времени {skipped} пар" if skipped else ""))
+        for name, stage_stats in self.stats.items():
+            self.logger.info(f"Стадия {name}: обработано {stage_stats['processed']}, "
+                             f"ошибок {stage_stats['errors']}, занятость {stage_stats['busy_seconds']:.1f} с")
+        results.sort(key=lambda block: block.get('confirmation_strength') or 0, reverse=True)
+        return results
+
+    def _publish_progress(self, finished=False, partial=False):
+        """Событие RefreshProgress: оценка оставшегося времени по средней скорости завершения пар"""
+        with self._stats_lock:
+            progress = dict(self._progress)
+            throughput_counts = {name: stage_stats['processed'] for name, stage_stats in self.stats.items()}
+
+        elapsed = max(time.time() - progress['started'], 1e-9)
+        remaining = progress['total'] - progress['done']
+        eta = None
+        if finished:
+            eta = 0.0
+        elif progress['done']:
+            eta = remaining * elapsed / progress['done']
+            if self._deadline is not None:
+                eta = min(eta, max(0.0, self._deadline - time.time()))
+
+        self.bus.publish(RefreshProgress(
+            progress['done'], progress['total'], progress['blocks'], elapsed, eta,
+            {name: count / elapsed for name, count in throughput_counts.items()},
+            finished=finished, partial=partial
+        ))
+
+    def _start_stage(self, name, func, in_q, out_q, workers, skippable=True) -> threading.Thread:
+        """
+        Запуск потоков стадии и супервизора, передающего сигнал остановки дальше.
+        Элементы skippable-стадии после исчерпания бюджета времени пропускаются
+        """
+        threads = [threading.Thread(target=self._stage_worker, args=(name, func, in_q, out_q, skippable),
+                                    daemon=True)
+                   for _ in range(max(1, workers))]
+        for thread in threads:
+            thread.start()
+
+        def supervise():
+            for thread in threads:
+                thread.join()
+            if out_q is not None:
+                out_q.put(_STOP)
+
+        supervisor = threading.Thread(target=supervise, daemon=True)
+        supervisor.start()
+        return supervisor
+
+    def _stage_worker(self, name, func, in_q, out_q, skippable=True):
+        while True:
+            item = in_q.get()
+            if item is _STOP:
+                # Возвращаем сигнал в очередь для остальных потоков стадии
+                in_q.put(_STOP)
+                return
+
+            if skippable and self._deadline is not None and time.time() >= self._deadline:
+                with self._stats_lock:
+                    self.stats[name]['skipped'] += 1
+                    self._progress['done'] += 1
+                self._publish_progress()
+                continue
+
+            started = time.time()
+            result = None
+            errors = 0
+            try:
+                result = func(item)
+            except Exception as e:
+                self.logger.error(f"Ошибка стадии {name} для {item[:2]}: {e}")
+                errors = 1
+
+            # Пара завершена, если дальше ее передавать некуда или нечего
+            item_done = out_q is None or result is None
+            with self._stats_lock:
+                stage_stats = self.stats[name]
+                stage_stats['processed'] += 1
+                stage_stats['errors'] += errors
+                stage_stats['busy_seconds'] += time.time() - started
+                if item_done:
+                    self._progress['done'] += 1
+
+            if item_done:
+                self._publish_progress()
+            else:
+                out_q.put(result)
@@ -0,0 +1,229 @@
+# scan_jobs.py
+import json
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy import and_, func, or_
+from models import ScanJob, ScanJobItem
+
+class ScanJobManager:
+    """
+    Хранение заданий сканирования в БД. Задание состоит из элементов
+    (symbol, timeframe), каждый элемент фиксируется по завершении, поэтому
+    прерванное задание продолжается с первого незавершенного элемента.
+    """
+
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+        self.logger = logging.getLogger(__name__)
+
+    def start_or_resume(self, kind: str, params: dict, series: List[tuple], create=True,
+                        ranges: Optional[List[tuple]] = None) -> Optional[int]:
+        """
+        Продолжить незавершенное задание того же типа с теми же параметрами
+        или создать новое из списка (symbol, timeframe).
+        ranges - необязательные (range_start, range_end) для каждого элемента.
+        При create=False новое задание не создается и возвращается None
+        """
+        params_json = json.dumps(params, sort_keys=True)
+        session = self.db_manager.get_session()
+        try:
+            running = session.query(ScanJob).filter(
+                ScanJob.kind == kind, ScanJob.status == 'RUNNING'
+            ).order_by(ScanJob.id.desc()).all()
+
+            for job in running:
+                if job.params == params_json:
+                    session.commit()
+                    self.logger.info(f"Продолжение задания {kind} #{job.id}")
+                    return job.id
+                # Параметры изменились - старое задание больше не продолжаем
+                job.status = 'ABANDONED'
+                job.finished_at = datetime.utcnow()
+
+            if not create:
+                session.commit()
+                return None
+
+            job = ScanJob(kind=kind, params=params_json)
+            session.add(job)
+            session.flush()
+            ranges = ranges or [(None, None)] * len(series)
+            session.bulk_insert_mappings(ScanJobItem, [
+                {'job_id': job.id, 'symbol': symbol, 'timeframe': timeframe, 'status': 'PENDING',
+                 'range_start': range_start, 'range_end': range_end, 'attempts': 0}
+                for (symbol, timeframe), (range_start, range_end) in zip(series, ranges)
+            ])
+            session.commit()
+            self.logger.info(f"Создано задание {kind} #{job.id}: {len(series)} элементов")
+            return job.id
+        except Exception as e:
+            session.rollback()
+            self.logger.error(f"Ошибка создания задания {kind}: {e}")
+            raise
+        finally:
+            session.close()
+
+    def pending_items(self, job_id: int) -> List[Dict]:
+        """Незавершенные элементы задания в порядке создания"""
+        session = self.db_manager.get_session()
+        try:
+            items = session.query(ScanJobItem).filter(
+                ScanJobItem.job_id == job_id, ScanJobItem.status == 'PENDING'
+            ).order_by(ScanJobItem.id).all()
+            return [{'id': item.id, 'symbol': item.symbol, 'timeframe': item.timeframe,
+                     'range_start': item.range_start, 'range_end': item.range_end} for item in items]
+        finally:
+            session.close()
+
+    def claim_items(self, job_id: int, owner: str, limit: int = 1, lease_seconds: int = 120,
+                    max_attempts: int = 3) -> List[Dict]:
+        """
+        Аренда свободных элементов задания воркером. Свободными считаются
+        ожидающие элементы и элементы с истекшей арендой (воркер упал).
+        Один UPDATE с подзапросом атомарен, поэтому элемент не достанется двум воркерам
+        """
+        now = datetime.utcnow()
+        token = uuid.uuid4().hex
+        session = self.db_manager.get_session()
+        try:
+            # Элементы, исчерпавшие попытки, больше не выдаются
+            session.query(ScanJobItem).filter(
+                ScanJobItem.job_id == job_id,
+                ScanJobItem.status == 'LEASED',
+                ScanJobItem.lease_expires_at < now,
+                ScanJobItem.attempts >= max_attempts
+            ).update({
+                'status': 'FAILED',
+                'error': f"Аренда истекла {max_attempts} раз",
+                'finished_at': now
+            }, synchronize_session=False)
+
+            claimable = session.query(ScanJobItem.id).filter(
+                ScanJobItem.job_id == job_id,
+                or_(ScanJobItem.status == 'PENDING',
+                    and_(ScanJobItem.status == 'LEASED', ScanJobItem.lease_expires_at < now))
+            ).order_by(ScanJobItem.id).limit(limit).scalar_subquery()
+
+            session.query(ScanJobItem).filter(ScanJobItem.id.in_(claimable)).update({
+                'status': 'LEASED',
+                'lease_owner': owner,
+                'lease_token': token,
+                'lease_expires_at': now + timedelta(seconds=lease_seconds),
+                'attempts': func.coalesce(ScanJobItem.attempts, 0) + 1
+            }, synchronize_session=False)
+            session.commit()
+
+            items = session.query(ScanJobItem).filter(ScanJobItem.lease_token == token).order_by(ScanJobItem.id).all()
+            return [{'id': item.id, 'symbol': item.symbol, 'timeframe': item.timeframe,
+                     'range_start': item.range_start, 'range_end': item.range_end,
+                     'lease_token': token} for item in items]
+        except Exception as e:
+            session.rollback()
+            self.logger.error(f"Ошибка аренды элементов задания {job_id}: {e}")
+            raise
+        finally:
+            session.close()
+
+    def heartbeat(self, lease_token: str, lease_seconds: int = 120) -> int:
+        """Продление аренды элементов, которые воркер еще обрабатывает"""
+        session = self.db_manager.get_session()
+        try:
+            updated = session.query(ScanJobItem).filter(
+                ScanJobItem.lease_token == lease_token,
+                ScanJobItem.status == 'LEASED'
+            ).update({
+                'lease_expires_at': datetime.utcnow() + timedelta(seconds=lease_seconds)
+            }, synchronize_session=False)
+            session.commit()
+            return updated
+        except Exception as e:
+            session.rollback()
+            self.logger.error(f"Ошибка продления аренды: {e}")
+            return 0
+        finally:
+            session.close()
+
+    def complete_item(self, item_id: int, result_count: int = 0, error: Optional[str] = None,
+                      lease_token: Optional[str] = None):
+        """
+        Фиксация результата элемента. С lease_token результат принимается,
+        только если аренда не перешла к другому воркеру
+        """
+        session = self.db_manager.get_session()
+        try:
+            query = session.query(ScanJobItem).filter(ScanJobItem.id == item_id)
+            if lease_token:
+                query = query.filter(ScanJobItem.lease_token == lease_token)
+            query.update({
+                'status': 'FAILED' if error else 'DONE',
+                'result_count': result_count,
+                'error': error[:500] if error else None,
+                'finished_at': datetime.utcnow()
+            }, synchronize_session=False)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            self.logger.error(f"Ошибка фиксации элемента задания {item_id}: {e}")
+            raise
+        finally:
+            session.close()
+
+    def finish_job(self, job_id: int):
+        """Завершение задания"""
+        session = self.db_manager.get_session()
+        try:
+            session.query(ScanJob).filter(ScanJob.id == job_id).update({
+                'status': 'DONE',
+                'finished_at': datetime.utcnow()
+            })
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            self.logger.error(f"Ошибка завершения задания {job_id}: {e}")
+            raise
+        finally:
+            session.close()
+
+    def get_progress(self, job_id: Optional[int] = None, kind: Optional[str] = None) -> Dict:
+        """
+        Прогресс задания (по id или последнего задания указанного типа)
+        """
+        session = self.db_manager.get_session()
+        try:
+            query = session.query(ScanJob)
+            if job_id is not None:
+                job = query.filter(ScanJob.id == job_id).first()
+            else:
+                if kind:
+                    query = query.filter(ScanJob.kind == kind)
+                job = query.order_by(ScanJob.id.desc()).first()
+            if job is None:
+                return {}
+
+            counts = dict(session.query(ScanJobItem.status, func.count(ScanJobItem.id)).filter(
+                ScanJobItem.job_id == job.id
+            ).group_by(ScanJobItem.status).all())
+            results = session.query(func.coalesce(func.sum(ScanJobItem.result_count), 0)).filter(
+                ScanJobItem.job_id == job.id
+            ).scalar()
+
+            total = sum(counts.values())
+            finished = counts.get('DONE', 0) + counts.get('FAILED', 0)
+            return {
+                'job_id': job.id,
+                'kind': job.kind,
+                'status': job.status,
+                'total': total,
+                'done': counts.get('DONE', 0),
+                'failed': counts.get('FAILED', 0),
+                'pending': counts.get('PENDING', 0),
+                'leased': counts.get('LEASED', 0),
+                'percent': finished / total * 100 if total else 100.0,
+                'results': int(results),
+                'created_at': job.created_at,
+                'finished_at': job.finished_at
+            }
+        finally:
+            session.close()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Распределенный поиск ордер-блоков через общую БД
+
+Использование:
+    python scan_worker.py enqueue [--timeframes 5 15 60 240 D]
+    python scan_worker.py work [--job ID] [--batch 4] [--lease 120]
+    python scan_worker.py wait [--job ID]
+
+Координатор ставит задание в очередь (enqueue) и ждет его завершения (wait),
+любое число воркеров (work) на этой же машине забирает элементы задания
+(диапазоны свечей рядов) в аренду. Элементы упавших воркеров возвращаются
+в очередь по истечении аренды. Все процессы должны работать с файлом БД на
+локальном диске одной машины: режим WAL SQLite использует общую память
+и не работает на сетевых файловых системах.
+"""
+
+import argparse
+import logging
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from block_processor import BlockProcessor
+
+def resolve_job(processor, job_id):
+    """Задание по id или последнее распределенное задание"""
+    if job_id is not None:
+        return job_id
+    progress = processor.jobs.get_progress(kind=BlockProcessor.DISTRIBUTED_JOB)
+    if not progress or progress['status'] != 'RUNNING':
+        return None
+    return progress['job_id']
+
+def main():
+    parser = argparse.ArgumentParser(description="Распределенный поиск ордер-блоков")
+    parser.add_argument('command', choices=['enqueue', 'work', 'wait'])
+    parser.add_argument('--db', default="data/smat.db", help="Путь к общей БД")
+    parser.add_argument('--job', type=int, default=None, help="ID задания (по умолчанию последнее)")
+    parser.add_argument('--timeframes', nargs='+', default=None)
+    parser.add_argument('--batch', type=int, default=4, help="Элементов за одну аренду")
+    parser.add_argument('--lease', type=int, default=120, help="Длительность аренды, сек")
+    parser.add_argument('--owner', default=None, help="Имя воркера")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(processName)s %(levelname)s %(message)s")
+    processor = BlockProcessor(args.db)
+
+    if args.command == 'enqueue':
+        job_id = processor.enqueue_distributed_scan(args.timeframes)
+        if job_id is None:
+            print("Новых свечей нет, задание не создано")
+        else:
+            print(f"Задание #{job_id} поставлено в очередь")
+        return
+
+    job_id = resolve_job(processor, args.job)
+    if job_id is None:
+        print("Нет активного распределенного задания")
+        return
+
+    if args.command == 'work':
+        processed = processor.run_scan_worker(job_id, args.owner, args.batch, args.lease)
+        print(f"Обработано элементов: {processed}")
+    else:
+        progress = processor.wait_for_distributed_scan(job_id)
+        print(f"Задание #{job_id}: {progress['done']} рядов, ошибок {progress['failed']}, "
+              f"найдено {progress['results']} блоков")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# snapshot_publisher.py
+import logging
+import os
+import re
+import sqlite3
+import threading
+from typing import List, Optional
+
+# Таблицы, которые читает интерфейс (database_manager.DatabaseManager)
+SNAPSHOT_TABLES = ('order_blocks', 'chart_snapshots')
+
+# Сколько последних поколений хранить: читатель может еще дочитывать предыдущее
+KEEP_GENERATIONS = 2
+
+POINTER_NAME = 'CURRENT'
+
+def snapshot_dir(db_path: str) -> str:
+    """Каталог снимков БД обработки: data/smat.db -> data/smat.snapshots"""
+    return os.path.splitext(db_path)[0] + '.snapshots'
+
+def current_snapshot(db_path: str) -> Optional[str]:
+    """Путь к текущему опубликованному снимку или None, если снимков еще нет"""
+    directory = snapshot_dir(db_path)
+    try:
+        with open(os.path.join(directory, POINTER_NAME), encoding='utf-8') as pointer:
+            name = pointer.read().strip()
+    except FileNotFoundError:
+        return None
+    return os.path.join(directory, name) if name else None
+
+class SnapshotPublisher:
+    """
+    Публикация снимка промежуточной БД для интерфейса.
+    Блоки и фрагменты графика копируются в новый файл поколения (сначала во
+    временный, затем атомарное переименование), после чего атомарно заменяется
+    указатель CURRENT. Интерфейс читает только опубликованные снимки, которые
+    после публикации не меняются, поэтому пересборка блоков в БД обработки
+    и чтение списка никогда не ждут друг друга и читатель не видит
+    частично обновленных данных
+    """
+
+    FILE_PATTERN = re.compile(r'^gen-(\d+)\.db$')
+
+    def __init__(self, db_path: str = "data/smat.db", keep: int = KEEP_GENERATIONS):
+        self.db_path = db_path
+        self.directory = snapshot_dir(db_path)
+        self.keep = max(1, keep)
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def publish(self) -> Optional[str]:
+        """Сборка и публикация нового поколения. Возвращает путь к снимку"""
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            generation = max(self._generations(), default=0) + 1
+            name = f"gen-{generation:06d}.db"
+            path = os.path.join(self.directory, name)
+            staging = f"{path}.{os.getpid()}.tmp"
+
+            try:
+                copied = self._build(staging)
+                self._fsync(staging)
+                os.replace(staging, path)
+                self._write_pointer(name)
+            except Exception:
+                if os.path.exists(staging):
+                    os.remove(staging)
+                raise
+
+            self._remove_old(generation)
+            self.logger.info(f"Опубликован снимок {name}: {copied} блоков")
+            return path
+
+    def _build(self, staging: str) -> int:
+        """
+        Копирование таблиц интерфейса в новый файл одной транзакцией
+        (согласованное чтение БД обработки, в WAL оно не блокирует запись)
+        """
+        if os.path.exists(staging):
+            os.remove(staging)
+        connection = sqlite3.connect(staging, isolation_level=None)
+        try:
+            connection.execute("PRAGMA journal_mode=OFF")
+            connection.execute("PRAGMA synchronous=OFF")
+            connection.execute("ATTACH DATABASE ? AS source", (self.db_path,))
+            connection.execute("BEGIN")
+            schema = connection.execute(
+                "SELECT type, tbl_name, sql FROM source.sqlite_master "
+                "WHERE sql IS NOT NULL AND type IN ('table', 'index')"
+            ).fetchall()
+            tables = [table for kind, table, _ in schema if kind == 'table' and table in SNAPSHOT_TABLES]
+            for kind, table, sql in schema:
+                if kind == 'table' and table in tables:
+                    connection.execute(sql)
+            for table in tables:
+                connection.execute(f"INSERT INTO main.{table} SELECT * FROM source.{table}")
+            # Индексы строятся после заполнения таблиц - так быстрее, чем вставка в индексы
+            for kind, table, sql in schema:
+                if kind == 'index' and table in tables:
+                    connection.execute(sql)
+            connection.execute("COMMIT")
+            connection.execute("DETACH DATABASE source")
+            if 'order_blocks' not in tables:
+                return 0
+            return connection.execute("SELECT COUNT(*) FROM order_blocks").fetchone()[0]
+        finally:
+            connection.close()
+
+    def _write_pointer(self, name: str):
+        pointer = os.path.join(self.directory, POINTER_NAME)
+        staging = f"{pointer}.{os.getpid()}.tmp"
+        with open(staging, 'w', encoding='utf-8') as file:
+            file.write(name)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(staging, pointer)
+
+    @staticmethod
+    def _fsync(path: str):
+        with open(path, 'rb') as file:
+            os.fsync(file.fileno())
+
+    def _generations(self) -> List[int]:
+        generations = []
+        for name in os.listdir(self.directory):
+            match = self.FILE_PATTERN.match(name)
+            if match:
+                generations.append(int(match.group(1)))
+        return generations
+
+    def _remove_old(self, current: int):
+        """
+        Удаление поколений старше keep последних. Открытый читателем файл в Windows
+        удалить нельзя - он останется до следующей публикации
+        """
+        for generation in self._generations():
+            if generation <= current - self.keep:
+                try:
+                    os.remove(os.path.join(self.directory, f"gen-{generation:06d}.db"))
+                except OSError:
+                    pass
@@ -0,0 +1,35 @@
+# tests/conftest.py
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    """Каждый тест во временном каталоге: database.py при импорте создает smat.db в текущем"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "data" / "smat.db")
+
+def make_klines(seed, count, start='2024-01-01', freq='15min', volatility=0.03):
+    """Свечи в формате BybitAPI.get_kline_data: случайное блуждание цены и объема"""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, volatility, count)))
+    open_ = np.r_[close[0], close[:-1]] * (1 + rng.normal(0, volatility / 3, count))
+    # Всплески объема нужны детектору для свечей имбаланса
+    volume = rng.lognormal(0, 1, count)
+    times = pd.date_range(start, periods=count, freq=freq)
+    return [{'timestamp': ts.to_pydatetime(), 'open': float(o), 'high': max(o, c) * 1.003,
+             'low': min(o, c) * 0.997, 'close': float(c), 'volume': float(v), 'turnover': 1.0}
+            for ts, o, c, v in zip(times, open_, close, volume)]
+
+@pytest.fixture
+def kline_factory():
+    return make_klines
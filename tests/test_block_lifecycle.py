@@ -0,0 +1,80 @@
+# tests/test_block_lifecycle.py
+import numpy as np
+import pandas as pd
+
+from block_lifecycle import BlockLifecycleTracker
+from models import DatabaseManager
+
+def brute_force(high, low, close, position, bullish, target, delay):
+    """События блока перебором свечей: (mitigated, invalidated, target_hit) - индексы или None"""
+    n = len(close)
+    start = position + 1 + delay
+    first = lambda begin, condition: next((j for j in range(begin, n) if condition(j)), None)
+    if bullish:
+        return (first(start, lambda j: low[j] <= high[position]),
+                first(start, lambda j: close[j] <= low[position]),
+                first(position + 1, lambda j: high[j] >= target))
+    return (first(start, lambda j: high[j] >= low[position]),
+            first(start, lambda j: close[j] >= high[position]),
+            first(position + 1, lambda j: low[j] <= target))
+
+def test_lifecycle_matches_brute_force(db_path):
+    manager = DatabaseManager(db_path)
+    manager.init_database()
+    rng = np.random.default_rng(0)
+    n, m = 3000, 400
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.003, n)))
+    open_ = np.r_[close[0], close[:-1]]
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.002, n))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.002, n))
+    times = pd.date_range('2024-01-01', periods=n, freq='5min')
+    pd.DataFrame({'symbol': 'BTCUSDT', 'timeframe': '5', 'timestamp': times, 'open': open_, 'high': high,
+                  'low': low, 'close': close, 'volume': 1.0, 'turnover': 1.0}
+                 ).to_sql('klines', manager.engine, if_exists='append', index=False)
+
+    positions = rng.integers(0, n - 10, m)
+    bullish = rng.random(m) < 0.5
+    # Часть целей недостижима - у таких блоков цель остается не достигнутой
+    targets = np.where(bullish, high[positions] * rng.choice([1.01, 1.02, 10.0], m),
+                       low[positions] * rng.choice([0.99, 0.98, 0.1], m))
+    pd.DataFrame({'symbol': 'BTCUSDT', 'timeframe': '5', 'timestamp': times[positions],
+                  'imbalance_high': high[positions], 'imbalance_low': low[positions],
+                  'direction': np.where(bullish, 'BULLISH', 'BEARISH'), 'price_target': targets,
+                  'is_confirmed': True}).to_sql('order_blocks', manager.engine, if_exists='append', index=False)
+
+    updates = BlockLifecycleTracker(manager).update_all()
+    assert len(updates) == m
+
+    result = pd.read_sql("SELECT * FROM order_blocks ORDER BY id", manager.engine,
+                         parse_dates=['mitigated_at', 'invalidated_at', 'target_hit_at'])
+    statuses = set()
+    for index, row in enumerate(result.itertuples()):
+        mitigated, invalidated, target_hit = brute_force(high, low, close, positions[index], bullish[index],
+                                                         targets[index], BlockLifecycleTracker.CONFIRMATION_BARS)
+        for name, expected in (('mitigated_at', mitigated), ('invalidated_at', invalidated),
+                               ('target_hit_at', target_hit)):
+            value = getattr(row, name)
+            assert (None if pd.isna(value) else value) == (None if expected is None else times[expected]), \
+                (index, name)
+        status = 'INVALIDATED' if invalidated is not None else 'MITIGATED' if mitigated is not None else 'ACTIVE'
+        assert row.status == status, index
+        statuses.add(status)
+    # Набор проверяет все три состояния
+    assert statuses == {'ACTIVE', 'MITIGATED', 'INVALIDATED'}
+
+def test_finished_blocks_are_not_reloaded(db_path):
+    """Блок с пробоем и достигнутой целью больше не пересчитывается"""
+    manager = DatabaseManager(db_path)
+    manager.init_database()
+    times = pd.date_range('2024-01-01', periods=20, freq='5min')
+    close = np.r_[np.full(10, 100.0), np.full(10, 50.0)]
+    pd.DataFrame({'symbol': 'BTCUSDT', 'timeframe': '5', 'timestamp': times, 'open': close,
+                  'high': close + 1, 'low': close - 1, 'close': close, 'volume': 1.0, 'turnover': 1.0}
+                 ).to_sql('klines', manager.engine, if_exists='append', index=False)
+    pd.DataFrame({'symbol': ['BTCUSDT'], 'timeframe': ['5'], 'timestamp': [times[0]], 'imbalance_high': [101.0],
+                  'imbalance_low': [99.0], 'direction': ['BULLISH'], 'price_target': [100.5], 'is_confirmed': [True]}
+                 ).to_sql('order_blocks', manager.engine, if_exists='append', index=False)
+
+    tracker = BlockLifecycleTracker(manager)
+    assert [update['status'] for update in tracker.update_all()] == ['INVALIDATED']
+    assert tracker.update_all() == []
@@ -0,0 +1,67 @@
+# tests/test_database_manager.py
+import sqlite3
+from datetime import date
+
+import pytest
+
+from database_manager import DatabaseManager as ReaderManager
+from models import DatabaseManager
+
+CURSOR = ('2024-01-01 00:00:00.000000', 5)
+
+@pytest.fixture
+def reader(db_path):
+    manager = DatabaseManager(db_path)
+    manager.init_database()
+    manager.engine.dispose()
+    reader = ReaderManager(db_path)
+    yield reader
+    reader.close()
+
+def query_plan(reader, filters, after):
+    query, params = reader._order_blocks_query(filters, after, 201)
+    return [row[3] for row in reader.connection.execute(f"EXPLAIN QUERY PLAN {query}", params)]
+
+@pytest.mark.parametrize('filters, index', [
+    ({'symbol': 'BTCUSDT', 'timeframe': '15'}, 'ix_order_blocks_symbol_timeframe_timestamp'),
+    ({'symbol': 'BTCUSDT', 'timeframe': '15', 'date_from': date(2024, 1, 1)},
+     'ix_order_blocks_symbol_timeframe_timestamp'),
+    ({'symbol': 'BTCUSDT'}, 'ix_order_blocks_symbol_timestamp'),
+    ({'symbol': 'BTCUSDT', 'direction': 'BULLISH', 'date_to': date(2024, 2, 1)}, 'ix_order_blocks_symbol_timestamp'),
+    ({'timeframe': '15'}, 'ix_order_blocks_timeframe_timestamp'),
+    ({}, 'ix_order_blocks_timestamp'),
+])
+@pytest.mark.parametrize('after', [None, CURSOR])
+def test_page_order_comes_from_index(reader, filters, index, after):
+    """Страница читается по индексу в порядке времени - без сортировки всех подходящих блоков"""
+    plan = query_plan(reader, filters, after)
+    assert len(plan) == 1, plan
+    assert plan[0].split('USING INDEX ')[1].split(' ')[0] == index, plan
+    if after is not None:
+        # Курсор - граница поиска по индексу, а не фильтр перебираемых строк
+        assert 'timestamp<?' in plan[0]
+
+def test_prefix_filter_leads_with_symbol_index(reader):
+    plan = query_plan(reader, {'symbol_prefix': 'BT', 'timeframe': '15'}, None)
+    assert 'symbol>? AND symbol<?' in plan[0]
+
+def test_pages_follow_cursor(reader, db_path):
+    connection = sqlite3.connect(db_path)
+    connection.executemany(
+        "INSERT INTO order_blocks (symbol, timeframe, timestamp, direction, confirmation_strength, is_confirmed) "
+        "VALUES ('BTCUSDT', ?, ?, 'BULLISH', 1.0, 1)",
+        # Одинаковое время у соседних блоков - порядок внутри задает id
+        [('15' if index % 2 else '60', f"2024-01-01 00:{index // 2:02d}:00.000000") for index in range(50)])
+    connection.commit()
+    connection.close()
+
+    for filters in ({'symbol': 'BTCUSDT'}, {'symbol': 'BTCUSDT', 'timeframe': '15'}, {'symbol_prefix': 'btc'}):
+        expected = [row[0] for row in reader.get_order_blocks(filters.get('symbol') or 'BTCUSDT',
+                                                              filters.get('timeframe'))]
+        seen, after = [], None
+        while True:
+            rows, after = reader.get_order_blocks_page(filters, 7, after)
+            seen.extend(row[0] for row in rows)
+            if after is None:
+                break
+        assert seen == expected
@@ -0,0 +1,39 @@
+# tests/test_helpers.py
+import numpy as np
+import pytest
+
+from utils.helpers import pack_candles, unpack_candles
+
+def random_window(count, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, count)))
+    times = np.datetime64('2024-01-01T00:00') + np.arange(count) * np.timedelta64(15, 'm')
+    return times, close * 0.999, close * 1.002, close * 0.997, close, rng.lognormal(0, 1, count)
+
+@pytest.mark.parametrize('count', [0, 1, 201])
+def test_pack_unpack_round_trip(count):
+    times, open_, high, low, close, volume = random_window(count)
+    candles = unpack_candles(pack_candles(times, open_, high, low, close, volume))
+
+    np.testing.assert_array_equal(candles['timestamp'], times.astype('datetime64[s]'))
+    for name, values in zip(('open', 'high', 'low', 'close', 'volume'), (open_, high, low, close, volume)):
+        np.testing.assert_array_equal(candles[name], values)
+
+def test_round_trip_keeps_gaps_and_nan():
+    """Пропуски во времени и значения восстанавливаются побитово, включая nan и -0.0"""
+    times = np.array(['2024-01-01T00:00', '2024-01-01T00:15', '2024-01-03T12:00'], dtype='datetime64[s]')
+    values = np.array([1.5, np.nan, -0.0])
+    candles = unpack_candles(pack_candles(times, values, values, values, values, values))
+    np.testing.assert_array_equal(candles['timestamp'], times)
+    np.testing.assert_array_equal(candles['close'], values)
+    assert np.signbit(candles['close'][2])
+
+def test_packed_window_is_compressed():
+    window = random_window(201)
+    assert len(pack_candles(*window)) < 201 * 6 * 8
+
+def test_unknown_format_rejected():
+    data = bytearray(pack_candles(*random_window(3)))
+    data[0] ^= 0xFF
+    with pytest.raises(ValueError):
+        unpack_candles(bytes(data))
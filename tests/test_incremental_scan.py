@@ -0,0 +1,64 @@
+# tests/test_incremental_scan.py
+import logging
+import os
+
+import pandas as pd
+
+from block_processor import BlockProcessor
+from models import ProcessingState
+
+SYMBOLS = ['AAAUSDT', 'BBBUSDT']
+BLOCKS_QUERY = ("SELECT symbol, timeframe, timestamp, direction, ROUND(price_target, 6) AS target, is_confirmed "
+                "FROM order_blocks ORDER BY symbol, timeframe, timestamp")
+
+def processor_at(tmp_path, name):
+    logging.getLogger('block_processor').setLevel(logging.WARNING)
+    return BlockProcessor(os.path.join(tmp_path, name, 'smat.db'))
+
+def stored_blocks(processor):
+    return pd.read_sql(BLOCKS_QUERY, processor.data_manager.db_manager.engine)
+
+def test_incremental_runs_match_full_rescan(tmp_path, kline_factory):
+    """Обработка по водяным знакам частями дает те же блоки, что полный пересчет"""
+    history = {symbol: kline_factory(seed, 900) for seed, symbol in enumerate(SYMBOLS)}
+
+    incremental = processor_at(tmp_path, 'incremental')
+    for end in (600, 603, 750, 900):
+        for symbol, klines in history.items():
+            incremental.data_manager.store_klines(symbol, '15', klines[:end])
+        incremental.find_blocks_all_symbols(timeframes=['15'], workers=1)
+
+    session = incremental.data_manager.db_manager.get_session()
+    try:
+        watermarks = {state.symbol: state.last_candle_timestamp for state in session.query(ProcessingState)}
+    finally:
+        session.close()
+    assert watermarks == {symbol: klines[-1]['timestamp'] for symbol, klines in history.items()}
+    # Новых свечей нет - ряды не обрабатываются
+    assert incremental.find_blocks_all_symbols(timeframes=['15'], workers=1) == {}
+
+    full = processor_at(tmp_path, 'full')
+    for symbol, klines in history.items():
+        full.data_manager.store_klines(symbol, '15', klines)
+    full.find_blocks_all_symbols(timeframes=['15'], workers=1, incremental=False)
+
+    expected = stored_blocks(full)
+    assert len(expected) > 0
+    pd.testing.assert_frame_equal(stored_blocks(incremental), expected)
+
+def test_replace_window_starts_inside_confirmation_window(tmp_path, kline_factory):
+    """Окно пересчета захватывает CONFIRMATION_BARS - 1 свечей до водяного знака"""
+    processor = processor_at(tmp_path, 'window')
+    klines = kline_factory(0, 300)
+    processor.data_manager.store_klines('AAAUSDT', '15', klines)
+
+    watermark = klines[200]['timestamp']
+    item = {'symbol': 'AAAUSDT', 'timeframe': '15', 'watermark': watermark,
+            'latest_timestamp': klines[250]['timestamp'], 'replace_from': None, 'last_candle_timestamp': None}
+    df = processor._load_series(item)
+
+    bars = processor.detector.CONFIRMATION_BARS
+    assert item['replace_from'] == klines[200 - bars + 1]['timestamp']
+    # Свечи после latest_timestamp относятся к следующему диапазону
+    assert item['last_candle_timestamp'] == klines[250]['timestamp']
+    assert df.index[-1] == pd.Timestamp(klines[250]['timestamp'])
@@ -0,0 +1,151 @@
+# tests/test_query_server.py
+import gzip
+import http.client
+import json
+import sqlite3
+import threading
+
+import numpy as np
+import pytest
+
+from database_manager import DatabaseManager as ReaderManager
+from models import DatabaseManager
+from query_server import QueryServer
+from utils.helpers import pack_candles
+
+BLOCKS = 30
+
+def add_blocks(db_path, count, start=0):
+    connection = sqlite3.connect(db_path)
+    try:
+        connection.executemany(
+            "INSERT INTO order_blocks (symbol, timeframe, timestamp, direction, confirmation_strength, "
+            "imbalance_high, imbalance_low, price_target, is_confirmed) VALUES (?, '15', ?, 'BULLISH', ?, 101, 99, 110, 1)",
+            [(f"SYM{index:03d}USDT", f"2024-01-{1 + index % 28:02d} 00:00:00", float(index))
+             for index in range(start, start + count)])
+        connection.commit()
+    finally:
+        connection.close()
+
+@pytest.fixture
+def server(db_path):
+    manager = DatabaseManager(db_path)
+    manager.init_database()
+    manager.engine.dispose()
+    add_blocks(db_path, BLOCKS)
+
+    times = np.datetime64('2024-01-01T00:00') + np.arange(3) * np.timedelta64(15, 'm')
+    values = np.array([100.0, 101.0, 102.0])
+    connection = sqlite3.connect(db_path)
+    connection.execute("INSERT INTO chart_snapshots (block_id, symbol, timeframe, candle_count, is_complete, data, meta) "
+                       "VALUES (1, 'SYM000USDT', '15', 3, 1, ?, '{}')",
+                       (pack_candles(times, values, values, values, values, values),))
+    connection.commit()
+    connection.close()
+
+    reader = ReaderManager(db_path, read_only=True)
+    server = QueryServer(('127.0.0.1', 0), reader)
+    thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    reader.close()
+
+@pytest.fixture
+def get(server):
+    connection = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=10)
+
+    def request(path, **headers):
+        connection.request('GET', path, headers=headers)
+        response = connection.getresponse()
+        return response.status, response.getheader('ETag'), response.getheader('Content-Encoding'), response.read()
+
+    yield request
+    connection.close()
+
+@pytest.mark.parametrize('path, status', [
+    ('/blocks', 200),
+    ('/blocks?date_to=9999-12-31', 200),
+    ('/blocks?date_from=2024-02-01&date_to=2024-01-01', 400),
+    ('/blocks?date_from=2024-13-01', 400),
+    ('/blocks?min_strength=nan', 400),
+    ('/blocks?min_strength=5&max_strength=1', 400),
+    ('/blocks?limit=0', 400),
+    ('/blocks?confirmed=maybe', 400),
+    ('/blocks?cursor=not-a-cursor', 400),
+    ('/blocks/1/chart', 200),
+    ('/blocks/2/chart', 404),
+    ('/filters', 200),
+    ('/generation', 200),
+    ('/nope', 404),
+])
+def test_status_codes(get, path, status):
+    assert get(path)[0] == status
+
+def test_blocks_paging(get):
+    status, _, _, body = get('/blocks?limit=20')
+    page = json.loads(body)
+    assert status == 200 and len(page['blocks']) == 20 and page['next']
+
+    status, _, _, body = get(f"/blocks?limit=20&cursor={page['next']}")
+    rest = json.loads(body)
+    assert len(rest['blocks']) == BLOCKS - 20 and rest['next'] is None
+    ids = [block['id'] for block in page['blocks'] + rest['blocks']]
+    assert sorted(ids) == list(range(1, BLOCKS + 1))
+
+def test_etag_not_modified_until_data_changes(get, db_path):
+    status, etag, _, _ = get('/blocks')
+    assert status == 200 and etag
+    assert get('/blocks', **{'If-None-Match': etag})[0] == 304
+    assert get('/blocks', **{'If-None-Match': f"W/{etag}"})[0] == 304
+    # Другой адрес - другой ETag
+    assert get('/blocks?timeframe=15', **{'If-None-Match': etag})[0] == 200
+
+    add_blocks(db_path, 1, start=BLOCKS)
+    status, new_etag, _, body = get('/blocks', **{'If-None-Match': etag})
+    assert status == 200 and new_etag != etag
+    assert len(json.loads(body)['blocks']) == BLOCKS + 1
+
+def test_gzip_representation_has_own_etag(get):
+    status, etag, encoding, body = get('/blocks', **{'Accept-Encoding': 'gzip'})
+    assert status == 200 and encoding == 'gzip' and etag.endswith('-gzip"')
+    assert len(json.loads(gzip.decompress(body))['blocks']) == BLOCKS
+    # Сжатое и несжатое представления одной версии данных взаимозаменяемы для 304
+    assert get('/blocks', **{'If-None-Match': etag})[0] == 304
+
+def test_database_error_is_500_and_not_cached(get, server, monkeypatch):
+    reader = server.service.db_manager
+    original = reader.get_order_blocks_page
+
+    def broken(*args, **kwargs):
+        raise sqlite3.OperationalError("disk I/O error")
+    monkeypatch.setattr(reader, 'get_order_blocks_page', broken)
+    status, etag, _, body = get('/blocks')
+    assert status == 500 and etag is None
+    assert 'error' in json.loads(body)
+
+    monkeypatch.setattr(reader, 'get_order_blocks_page', original)
+    assert get('/blocks')[0] == 200
+
+def test_read_only_service_does_not_modify_database(db_path, server):
+    """Сервис открывает БД только для чтения и не создает индексы"""
+    connection = sqlite3.connect(db_path)
+    try:
+        connection.execute("DROP INDEX ix_order_blocks_timestamp")
+        connection.commit()
+    finally:
+        connection.close()
+    reader = ReaderManager(db_path, read_only=True)
+    try:
+        assert reader.get_order_blocks_page({}, 1)[0]
+        with pytest.raises(sqlite3.OperationalError):
+            reader.connection.execute("DELETE FROM order_blocks")
+    finally:
+        reader.close()
+    connection = sqlite3.connect(db_path)
+    try:
+        names = [row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index'")]
+    finally:
+        connection.close()
+    assert 'ix_order_blocks_timestamp' not in names
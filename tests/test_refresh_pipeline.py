@@ -0,0 +1,48 @@
+# tests/test_refresh_pipeline.py
+import pandas as pd
+import pytest
+
+from refresh_pipeline import RefreshPipeline
+
+FINALIZE_STEPS = ('update_lifecycle', 'update_confluence', 'publish_snapshot')
+
+@pytest.fixture
+def pipeline(db_path):
+    """Конвейер без загрузки с биржи: шаги завершения записываются в calls"""
+    pipeline = RefreshPipeline(db_path, download_workers=1, detect_workers=1)
+    pipeline.collector.fetch_new_klines = lambda *args, **kwargs: None
+    pipeline.calls = []
+    for name in FINALIZE_STEPS:
+        setattr(pipeline.block_processor, name, lambda *args, name=name: pipeline.calls.append(name))
+    return pipeline
+
+def flat_klines(count):
+    """Свечи без движения цены - блоков в них нет"""
+    return [{'timestamp': ts.to_pydatetime(), 'open': 1.0, 'high': 1.0, 'low': 1.0, 'close': 1.0,
+             'volume': 1.0, 'turnover': 1.0} for ts in pd.date_range('2024-01-01', periods=count, freq='15min')]
+
+def test_finalize_runs_when_series_processed_without_new_blocks(pipeline):
+    """Новые свечи меняют статусы старых блоков, даже если новых блоков нет"""
+    pipeline.collector.data_manager.store_klines('FLATUSDT', '15', flat_klines(300))
+
+    assert pipeline.run(['FLATUSDT'], ['15']) == []
+    assert pipeline.calls == list(FINALIZE_STEPS)
+
+def test_finalize_skipped_when_nothing_processed(pipeline):
+    pipeline.collector.data_manager.store_klines('FLATUSDT', '15', flat_klines(300))
+    pipeline.run(['FLATUSDT'], ['15'])
+    pipeline.calls.clear()
+
+    # Водяной знак на последней свече - ряд не обрабатывается
+    assert pipeline.run(['FLATUSDT'], ['15']) == []
+    assert pipeline.calls == []
+
+def test_finalize_runs_after_new_candles(pipeline):
+    klines = flat_klines(310)
+    pipeline.collector.data_manager.store_klines('FLATUSDT', '15', klines[:300])
+    pipeline.run(['FLATUSDT'], ['15'])
+    pipeline.calls.clear()
+
+    pipeline.collector.fetch_new_klines = lambda *args, **kwargs: klines[300:]
+    pipeline.run(['FLATUSDT'], ['15'])
+    assert pipeline.calls == list(FINALIZE_STEPS)
@@ -0,0 +1,138 @@
+# tests/test_scan_jobs.py
+import os
+import re
+import subprocess
+import sys
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from block_processor import BlockProcessor
+from models import DatabaseManager, ProcessingState, ScanJobItem
+from scan_jobs import ScanJobManager
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def manager(db_path):
+    db_manager = DatabaseManager(db_path)
+    db_manager.init_database()
+    return db_manager
+
+def item_state(manager, item_id):
+    session = manager.get_session()
+    try:
+        item = session.get(ScanJobItem, item_id)
+        return item.status, item.lease_owner, item.attempts
+    finally:
+        session.close()
+
+def expire_leases(manager, job_id):
+    """Аренда истекла - воркер, державший элементы, считается упавшим"""
+    session = manager.get_session()
+    try:
+        session.query(ScanJobItem).filter(ScanJobItem.job_id == job_id, ScanJobItem.status == 'LEASED').update(
+            {'lease_expires_at': datetime.utcnow() - timedelta(seconds=1)}, synchronize_session=False)
+        session.commit()
+    finally:
+        session.close()
+
+def test_expired_lease_is_requeued(manager):
+    jobs = ScanJobManager(manager)
+    job_id = jobs.start_or_resume(BlockProcessor.DISTRIBUTED_JOB, {}, [('AAAUSDT', '15'), ('BBBUSDT', '15')])
+
+    first = jobs.claim_items(job_id, 'worker-1', limit=1, lease_seconds=60)
+    second = jobs.claim_items(job_id, 'worker-2', limit=1, lease_seconds=60)
+    assert [item['symbol'] for item in first + second] == ['AAAUSDT', 'BBBUSDT']
+    # Действующая аренда не выдается повторно
+    assert jobs.claim_items(job_id, 'worker-3', limit=2) == []
+
+    expire_leases(manager, job_id)
+    reclaimed = jobs.claim_items(job_id, 'worker-3', limit=2, lease_seconds=60)
+    assert [item['id'] for item in reclaimed] == [first[0]['id'], second[0]['id']]
+    assert item_state(manager, first[0]['id']) == ('LEASED', 'worker-3', 2)
+
+    # Результат упавшего воркера по старой аренде не принимается
+    jobs.complete_item(first[0]['id'], 5, lease_token=first[0]['lease_token'])
+    assert item_state(manager, first[0]['id'])[0] == 'LEASED'
+    jobs.complete_item(first[0]['id'], 5, lease_token=reclaimed[0]['lease_token'])
+    assert item_state(manager, first[0]['id'])[0] == 'DONE'
+
+    # Продление касается только своей аренды
+    assert jobs.heartbeat(reclaimed[0]['lease_token'], 60) == 1
+    assert jobs.heartbeat(second[0]['lease_token'], 60) == 0
+
+def test_item_fails_after_max_attempts(manager):
+    jobs = ScanJobManager(manager)
+    job_id = jobs.start_or_resume(BlockProcessor.DISTRIBUTED_JOB, {}, [('AAAUSDT', '15')])
+
+    for attempt in range(2):
+        assert len(jobs.claim_items(job_id, f"worker-{attempt}", max_attempts=2)) == 1
+        expire_leases(manager, job_id)
+
+    assert jobs.claim_items(job_id, 'worker-9', max_attempts=2) == []
+    progress = jobs.get_progress(job_id)
+    assert (progress['failed'], progress['leased'], progress['pending']) == (1, 0, 0)
+
+def test_worker_processes_exactly_the_leased_range(tmp_path, kline_factory):
+    """Свечи, пришедшие после постановки задания, обрабатываются следующим заданием"""
+    processor = BlockProcessor(str(tmp_path / 'data' / 'smat.db'))
+    klines = kline_factory(0, 500)
+    processor.data_manager.store_klines('AAAUSDT', '15', klines[:400])
+    job_id = processor.enqueue_distributed_scan(['15'])
+    processor.data_manager.store_klines('AAAUSDT', '15', klines)
+
+    assert processor.run_scan_worker(job_id, owner='worker-1') == 1
+    session = processor.data_manager.db_manager.get_session()
+    try:
+        watermark = session.query(ProcessingState.last_candle_timestamp).scalar()
+    finally:
+        session.close()
+    assert watermark == klines[399]['timestamp']
+
+def test_worker_processes_share_a_job(tmp_path, kline_factory):
+    """Несколько процессов scan_worker.py: каждый элемент обработан ровно одним воркером один раз"""
+    db_path = str(tmp_path / 'data' / 'smat.db')
+    processor = BlockProcessor(db_path)
+    symbols = [f"S{index:02d}USDT" for index in range(6)]
+    for seed, symbol in enumerate(symbols):
+        for timeframe, freq in (('15', '15min'), ('60', '60min')):
+            processor.data_manager.store_klines(symbol, timeframe, kline_factory(seed, 400, freq=freq))
+    job_id = processor.enqueue_distributed_scan(['15', '60'])
+
+    worker = os.path.join(PROJECT_ROOT, 'scan_worker.py')
+    processes = [subprocess.Popen([sys.executable, worker, 'work', '--db', db_path, '--job', str(job_id),
+                                   '--batch', '1', '--owner', f"worker-{index}"],
+                                  cwd=tmp_path, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+                 for index in range(3)]
+    processed = 0
+    for process in processes:
+        stdout, stderr = process.communicate(timeout=300)
+        assert process.returncode == 0, stderr
+        processed += int(re.search(r"Обработано элементов: (\d+)", stdout).group(1))
+
+    session = processor.data_manager.db_manager.get_session()
+    try:
+        items = session.query(ScanJobItem).filter(ScanJobItem.job_id == job_id).all()
+        watermarks = {(state.symbol, state.timeframe): state.last_candle_timestamp
+                      for state in session.query(ProcessingState)}
+    finally:
+        session.close()
+    assert len(items) == len(symbols) * 2
+    # Каждый элемент арендован один раз и завершен: ни один диапазон не обработан дважды
+    assert processed == len(items)
+    assert all(item.status == 'DONE' and item.attempts == 1 for item in items)
+    assert watermarks == {(item.symbol, item.timeframe): item.range_end for item in items}
+
+    # Результат совпадает с поиском в одном процессе
+    single = BlockProcessor(str(tmp_path / 'single' / 'smat.db'))
+    for seed, symbol in enumerate(symbols):
+        for timeframe, freq in (('15', '15min'), ('60', '60min')):
+            single.data_manager.store_klines(symbol, timeframe, kline_factory(seed, 400, freq=freq))
+    single.find_blocks_all_symbols(timeframes=['15', '60'], workers=1)
+    query = ("SELECT symbol, timeframe, timestamp, direction, ROUND(price_target, 6) AS target FROM order_blocks "
+             "WHERE is_confirmed = 1 ORDER BY symbol, timeframe, timestamp")
+    distributed = pd.read_sql(query, processor.data_manager.db_manager.engine)
+    assert len(distributed) > 0
+    pd.testing.assert_frame_equal(distributed, pd.read_sql(query, single.data_manager.db_manager.engine))
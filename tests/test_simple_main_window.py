@@ -0,0 +1,42 @@
+# tests/test_simple_main_window.py
+from datetime import datetime
+
+import pytest
+
+tk = pytest.importorskip('tkinter')
+
+from event_bus import SeriesProcessed
+from gui.simple_main_window import SimpleMainWindow
+
+@pytest.fixture
+def window():
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        pytest.skip(f"нет дисплея для Tk: {e}")
+    root.withdraw()
+    yield SimpleMainWindow(root)
+    root.destroy()
+
+def block(block_id):
+    return {'id': block_id, 'symbol': 'BTCUSDT', 'timeframe': '15', 'direction': 'BULLISH',
+            'confirmation_strength': 1.0, 'imbalance_high': 100.0, 'is_confirmed': True,
+            'timestamp': datetime(2024, 1, 1)}
+
+def test_rows_already_added_by_search_are_not_counted_twice(window):
+    window._filters = {}
+    window._merge_series(SeriesProcessed('BTCUSDT', '15', [block(1)], []))
+    assert window._loaded_count == 1
+
+    # Страница из БД содержит и блок, уже вставленный поиском
+    rows = [SimpleMainWindow._format_row(tuple(block(block_id).values())) for block_id in (1, 2, 3)]
+    window._load_generation += 1
+    window._load_finished = False
+    window._page_after = None
+    window._load_queue.put((window._load_generation, (rows, None)))
+    window._poll_load_queue()
+
+    assert window._load_finished
+    assert len(window.tree.get_children()) == 3
+    assert window._loaded_count == 3
+    assert window.status_label.cget('text') == "Показано блоков: 3"
@@ -0,0 +1,104 @@
+# tests/test_snapshot_publisher.py
+import os
+import sqlite3
+
+import pytest
+
+from database_manager import DatabaseManager as ReaderManager
+from models import DatabaseManager
+from snapshot_publisher import SnapshotPublisher, current_snapshot, snapshot_dir
+
+@pytest.fixture
+def processing_db(db_path):
+    manager = DatabaseManager(db_path)
+    manager.init_database()
+    manager.engine.dispose()
+    return db_path
+
+def add_block(db_path, symbol):
+    connection = sqlite3.connect(db_path)
+    try:
+        connection.execute("INSERT INTO order_blocks (symbol, timeframe, timestamp, direction, confirmation_strength, "
+                           "is_confirmed) VALUES (?, '15', '2024-01-01 00:00:00', 'BULLISH', 1.0, 1)", (symbol,))
+        connection.commit()
+    finally:
+        connection.close()
+
+def listed_symbols(reader):
+    rows, _ = reader.get_order_blocks_page({}, 100)
+    return sorted(row[1] for row in rows)
+
+def test_reader_switches_to_published_generation(processing_db):
+    add_block(processing_db, 'AAAUSDT')
+    reader = ReaderManager(processing_db)
+    # Пока снимков нет, читается сама БД
+    assert listed_symbols(reader) == ['AAAUSDT']
+
+    publisher = SnapshotPublisher(processing_db)
+    first = publisher.publish()
+    assert current_snapshot(processing_db) == first
+    assert reader.data_generation() == 'gen-000001'
+
+    # Изменения БД обработки не видны до следующей публикации
+    add_block(processing_db, 'BBBUSDT')
+    assert listed_symbols(reader) == ['AAAUSDT']
+    assert reader.get_unique_symbols() == ['AAAUSDT']
+
+    publisher.publish()
+    assert reader.data_generation() == 'gen-000002'
+    assert listed_symbols(reader) == ['AAAUSDT', 'BBBUSDT']
+    assert reader.get_unique_symbols() == ['AAAUSDT', 'BBBUSDT']
+    reader.close()
+
+def test_old_generations_are_removed(processing_db):
+    add_block(processing_db, 'AAAUSDT')
+    publisher = SnapshotPublisher(processing_db, keep=2)
+    for _ in range(3):
+        publisher.publish()
+
+    # Остаются keep последних поколений и указатель, временных файлов нет
+    assert sorted(os.listdir(snapshot_dir(processing_db))) == ['CURRENT', 'gen-000002.db', 'gen-000003.db']
+    assert os.path.basename(current_snapshot(processing_db)) == 'gen-000003.db'
+
+def test_snapshot_is_read_immutable(processing_db):
+    """Снимок открывается только для чтения: запись в него невозможна"""
+    add_block(processing_db, 'AAAUSDT')
+    SnapshotPublisher(processing_db).publish()
+    reader = ReaderManager(processing_db)
+    connection = reader._connect(current_snapshot(processing_db))
+    try:
+        with pytest.raises(sqlite3.OperationalError):
+            connection.execute("DELETE FROM order_blocks")
+    finally:
+        connection.close()
+        reader.close()
+
+def test_removed_generation_is_not_recreated(processing_db):
+    """Поколение, удаленное между чтением указателя и открытием, не создается пустым файлом"""
+    add_block(processing_db, 'AAAUSDT')
+    publisher = SnapshotPublisher(processing_db, keep=1)
+    first = publisher.publish()
+    publisher.publish()
+    assert not os.path.exists(first)
+
+    reader = ReaderManager(processing_db)
+    reader._current_source()
+    # Читатель успел прочитать указатель до второй публикации
+    reader._source = first
+    assert listed_symbols(reader) == ['AAAUSDT']
+    assert reader.get_unique_symbols() == ['AAAUSDT']
+    assert reader.get_order_blocks() and reader._read_source == current_snapshot(processing_db)
+    assert not os.path.exists(first)
+    reader.close()
+
+def test_missing_pointer_target_falls_back_to_database(processing_db):
+    add_block(processing_db, 'AAAUSDT')
+    directory = snapshot_dir(processing_db)
+    os.makedirs(directory)
+    with open(os.path.join(directory, 'CURRENT'), 'w', encoding='utf-8') as pointer:
+        pointer.write('gen-000009.db')
+
+    reader = ReaderManager(processing_db)
+    assert listed_symbols(reader) == ['AAAUSDT']
+    assert not os.path.exists(os.path.join(directory, 'gen-000009.db'))
+    reader.close()
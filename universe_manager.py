@@ -0,0 +1,144 @@
+# universe_manager.py
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from config import Config
+from models import Symbol
+
+class UniverseManager:
+    """
+    Рабочий набор символов по ликвидности. Один запрос tickers дает оборот
+    за 24ч по всем парам, пары ранжируются и делятся на уровни (Config.UNIVERSE_TIERS).
+    Ликвидные уровни обновляются на каждой границе свечи, нижние - не чаще
+    заданного для уровня интервала в минутах (на любом таймфрейме),
+    пары вне уровней помечаются is_active=False и не загружаются.
+    """
+
+    QUOTE_CURRENCY = 'USDT'
+
+    def __init__(self, db_manager, bybit_api, tiers=None, min_turnover: Optional[float] = None):
+        self.db_manager = db_manager
+        self.bybit_api = bybit_api
+        self.tiers = tiers or Config.UNIVERSE_TIERS
+        self.min_turnover = Config.MIN_TURNOVER_24H if min_turnover is None else min_turnover
+        self.logger = logging.getLogger(__name__)
+
+    def refresh(self) -> Dict:
+        """
+        Ранжирование пар по обороту и запись уровней в таблицу symbols.
+        Возвращает число пар на каждом уровне
+        """
+        tickers = [ticker for ticker in self.bybit_api.get_tickers()
+                   if ticker['symbol'].endswith(self.QUOTE_CURRENCY)]
+        if not tickers:
+            self.logger.warning("Биржа не вернула тикеры, рабочий набор не изменен")
+            return {}
+
+        tickers.sort(key=lambda ticker: ticker['turnover_24h'], reverse=True)
+        ranked_at = datetime.utcnow()
+        tier_counts = {}
+
+        session = self.db_manager.get_session()
+        try:
+            existing = {symbol.symbol: symbol for symbol in session.query(Symbol).all()}
+            seen = set()
+
+            for rank, ticker in enumerate(tickers):
+                tier = self._tier_for_rank(rank) if ticker['turnover_24h'] >= self.min_turnover else None
+                symbol = existing.get(ticker['symbol'])
+                if symbol is None:
+                    symbol = Symbol(
+                        symbol=ticker['symbol'],
+                        base_currency=ticker['symbol'][:-len(self.QUOTE_CURRENCY)],
+                        quote_currency=self.QUOTE_CURRENCY
+                    )
+                    session.add(symbol)
+
+                symbol.turnover_24h = ticker['turnover_24h']
+                symbol.tier = tier
+                symbol.is_active = tier is not None
+                symbol.ranked_at = ranked_at
+                seen.add(ticker['symbol'])
+                tier_counts[tier] = tier_counts.get(tier, 0) + 1
+
+            # Пары, снятые с торгов, выходят из рабочего набора
+            for name, symbol in existing.items():
+                if name not in seen:
+                    symbol.tier = None
+                    symbol.is_active = False
+
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            self.logger.error(f"Ошибка обновления рабочего набора символов: {e}")
+            raise
+        finally:
+            session.close()
+
+        by_tier = {tier: tier_counts[tier] for tier in sorted(t for t in tier_counts if t is not None)}
+        self.logger.info(f"Рабочий набор: {sum(by_tier.values())} из {len(tickers)} пар, по уровням {by_tier}")
+        return tier_counts
+
+    def refresh_if_stale(self, max_age_minutes: Optional[int] = None) -> bool:
+        """Повторное ранжирование, если последнее старше max_age_minutes"""
+        max_age_minutes = max_age_minutes or Config.UNIVERSE_REFRESH_MINUTES
+        session = self.db_manager.get_session()
+        try:
+            last_ranked = session.query(Symbol.ranked_at).order_by(Symbol.ranked_at.desc()).limit(1).scalar()
+        finally:
+            session.close()
+
+        if last_ranked and datetime.utcnow() - last_ranked < timedelta(minutes=max_age_minutes):
+            return False
+        self.refresh()
+        return True
+
+    def get_active_symbols(self, max_tier: Optional[int] = None) -> List[str]:
+        """Активные символы по убыванию оборота (пустой список, если ранжирования не было)"""
+        session = self.db_manager.get_session()
+        try:
+            query = session.query(Symbol.symbol).filter(Symbol.is_active == True, Symbol.tier != None)
+            if max_tier is not None:
+                query = query.filter(Symbol.tier <= max_tier)
+            return [row.symbol for row in query.order_by(Symbol.turnover_24h.desc()).all()]
+        finally:
+            session.close()
+
+    def symbols_due(self, timeframe: str, boundary: float) -> List[str]:
+        """
+        Символы, которые нужно обновить на границе закрытия свечи boundary (секунды UTC).
+        Уровень с интервалом M минут обновляется на тех границах, перед которыми
+        (в пределах одной свечи) прошла отметка, кратная M минутам: 5-минутные свечи
+        уровня с интервалом 60 загружаются раз в час, а дневные - на каждой границе,
+        так как свеча длиннее интервала
+        """
+        period = Config.INTERVAL_MINUTES.get(timeframe, 1) * 60
+        due_tiers = [tier for tier, (_, minutes) in enumerate(self.tiers, start=1)
+                     if self.is_due(boundary, period, minutes * 60)]
+        if not due_tiers:
+            return []
+
+        session = self.db_manager.get_session()
+        try:
+            rows = session.query(Symbol.symbol).filter(
+                Symbol.is_active == True, Symbol.tier.in_(due_tiers)
+            ).order_by(Symbol.turnover_24h.desc()).all()
+            return [row.symbol for row in rows]
+        finally:
+            session.close()
+
+    @staticmethod
+    def is_due(boundary: float, period: float, interval: float) -> bool:
+        """Есть ли отметка, кратная interval, в промежутке (boundary - period, boundary]"""
+        if interval <= period:
+            return True
+        return boundary // interval != (boundary - period) // interval
+
+    def _tier_for_rank(self, rank: int) -> Optional[int]:
+        """Уровень по месту в рейтинге (с нуля)"""
+        upper = 0
+        for tier, (size, _) in enumerate(self.tiers, start=1):
+            upper += size
+            if rank < upper:
+                return tier
+        return None
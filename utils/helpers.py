@@ -0,0 +1,125 @@
+# utils/helpers.py
+import struct
+import zlib
+import numpy as np
+
+# Формат сжатого окна свечей: сигнатура, версия, число свечей
+CANDLES_HEADER = struct.Struct('<4sBI')
+CANDLES_MAGIC = b'SMCK'
+CANDLES_VERSION = 1
+CANDLE_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+
+def build_sparse_table(values: np.ndarray, func=np.maximum) -> list:
+    """
+    Построение sparse table для запросов max/min на отрезках.
+    table[k][i] = func(values[i:i + 2**k])
+    """
+    table = [np.asarray(values, dtype=float)]
+    width = 1
+    while width * 2 <= len(values):
+        prev = table[-1]
+        table.append(func(prev[:-width], prev[width:]))
+        width *= 2
+    return table
+
+
+def range_query(table: list, starts: np.ndarray, ends: np.ndarray, func=np.maximum) -> np.ndarray:
+    """
+    Векторизованный запрос func(values[start:end]) для массива отрезков.
+    Для пустых отрезков возвращается NaN.
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+    lengths = ends - starts
+    result = np.full(len(starts), np.nan)
+
+    valid = lengths > 0
+    if not valid.any():
+        return result
+
+    s = starts[valid]
+    e = ends[valid]
+    k = np.floor(np.log2(lengths[valid])).astype(np.int64)
+
+    left = np.empty(len(s))
+    right = np.empty(len(s))
+    for level in np.unique(k):
+        mask = k == level
+        row = table[level]
+        left[mask] = row[s[mask]]
+        right[mask] = row[e[mask] - (1 << level)]
+
+    result[valid] = func(left, right)
+    return result
+
+
+def first_index_at_or_above(table: list, starts: np.ndarray, thresholds: np.ndarray) -> np.ndarray:
+    """
+    Для каждого start находит первый индекс i >= start, где values[i] >= threshold.
+    table - sparse table максимумов. Если индекс не найден, возвращается len(values).
+    """
+    n = len(table[0])
+    pos = np.clip(np.asarray(starts, dtype=np.int64), 0, n)
+    thresholds = np.asarray(thresholds, dtype=float)
+    missing = np.isnan(thresholds)
+
+    # Двоичный подъем: сдвигаемся, пока весь пропускаемый отрезок ниже порога
+    for level in range(len(table) - 1, -1, -1):
+        width = 1 << level
+        can_jump = pos + width <= n
+        if not can_jump.any():
+            continue
+        row = table[level]
+        idx = np.minimum(pos, len(row) - 1)
+        jump = can_jump & (row[idx] < thresholds)
+        pos = pos + jump * width
+
+    pos[missing] = n
+    return pos
+
+
+def first_index_at_or_below(table: list, starts: np.ndarray, thresholds: np.ndarray) -> np.ndarray:
+    """
+    Для каждого start находит первый индекс i >= start, где values[i] <= threshold.
+    table - sparse table минимумов. Если индекс не найден, возвращается len(values).
+    """
+    negated = [-row for row in table]
+    return first_index_at_or_above(negated, starts, -np.asarray(thresholds, dtype=float))
+
+
+def pack_candles(timestamps, open_, high, low, close, volume) -> bytes:
+    """
+    Сжатие окна свечей в поколоночный двоичный вид.
+    Время (секунды UTC) хранится разностями, байты каждой колонки
+    перегруппированы по разрядам (shuffle) - так zlib сжимает соседние
+    близкие значения в несколько раз лучше, чем построчные данные
+    """
+    times = np.asarray(timestamps, dtype='datetime64[s]').astype(np.int64)
+    columns = np.empty((len(CANDLE_COLUMNS) + 1, len(times)), dtype=np.int64)
+    columns[0] = np.diff(times, prepend=np.int64(0))
+    for row, values in enumerate((open_, high, low, close, volume), start=1):
+        columns[row] = np.asarray(values, dtype=np.float64).view(np.int64)
+
+    shuffled = columns.view(np.uint8).reshape(len(columns), len(times), 8).transpose(0, 2, 1)
+    header = CANDLES_HEADER.pack(CANDLES_MAGIC, CANDLES_VERSION, len(times))
+    return header + zlib.compress(shuffled.tobytes(), 6)
+
+
+def unpack_candles(data: bytes) -> dict:
+    """
+    Обратное преобразование pack_candles: словарь массивов
+    timestamp (datetime64[s]), open, high, low, close, volume
+    """
+    magic, version, count = CANDLES_HEADER.unpack_from(data)
+    if magic != CANDLES_MAGIC or version != CANDLES_VERSION:
+        raise ValueError(f"Неизвестный формат окна свечей: {magic!r} v{version}")
+
+    raw = np.frombuffer(zlib.decompress(data[CANDLES_HEADER.size:]), dtype=np.uint8)
+    columns = raw.reshape(len(CANDLE_COLUMNS) + 1, 8, count).transpose(0, 2, 1).copy().view(np.int64)
+    columns = columns.reshape(len(CANDLE_COLUMNS) + 1, count)
+
+    candles = {'timestamp': np.cumsum(columns[0]).astype('datetime64[s]')}
+    for row, name in enumerate(CANDLE_COLUMNS, start=1):
+        candles[name] = columns[row].view(np.float64)
+    return candles
@@ -0,0 +1,94 @@
+# utils/import_report.py
+"""
+Отчет о времени импорта модулей при старте приложения
+
+Использование:
+    python -m utils.import_report [--module main] [--limit 15] [--budget-ms 300]
+
+Модуль импортируется в отдельном процессе с -X importtime. Отчет показывает
+самые долгие импорты и тяжелые библиотеки, попавшие в путь запуска окна:
+они должны загружаться лениво, уже после показа списка блоков.
+Код возврата 1 - в пути запуска есть тяжелая библиотека или превышен бюджет.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List
+
+# Библиотеки, которые не должны импортироваться до показа окна
+HEAVY_MODULES = ('numpy', 'pandas', 'sqlalchemy', 'requests', 'dotenv')
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_imports(module: str = 'main') -> List[Dict]:
+    """
+    Импорт модуля в чистом процессе. Возвращает записи
+    {'name', 'self_ms', 'cumulative_ms'} в порядке вывода -X importtime
+    """
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=PROJECT_ROOT, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Не удалось импортировать {module}: {completed.stderr.strip().splitlines()[-1]}")
+
+    records = []
+    for line in completed.stderr.splitlines():
+        # Импорты запуска интерпретатора (site и .pth-файлы) к модулю не относятся
+        if line.endswith('| site'):
+            records = []
+            continue
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        records.append({
+            'name': name.strip(),
+            'self_ms': int(self_us) / 1000,
+            'cumulative_ms': int(cumulative_us) / 1000
+        })
+    return records
+
+
+def build_report(module: str = 'main', limit: int = 15) -> Dict:
+    """Итоговое время импорта модуля, самые долгие импорты и тяжелые библиотеки в пути запуска"""
+    records = measure_imports(module)
+    total = next((record['cumulative_ms'] for record in records if record['name'] == module), 0.0)
+    top_level = {record['name'].split('.')[0] for record in records}
+    return {
+        'module': module,
+        'total_ms': total,
+        'slowest': sorted(records, key=lambda record: record['self_ms'], reverse=True)[:limit],
+        'heavy': [name for name in HEAVY_MODULES if name in top_level],
+    }
+
+
+def print_report(report: Dict):
+    print(f"Импорт {report['module']}: {report['total_ms']:.1f} мс")
+    print(f"{'собств., мс':>12} {'всего, мс':>10}  модуль")
+    for record in report['slowest']:
+        print(f"{record['self_ms']:>12.1f} {record['cumulative_ms']:>10.1f}  {record['name']}")
+    if report['heavy']:
+        print(f"Тяжелые библиотеки в пути запуска: {', '.join(report['heavy'])}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Время импорта модулей при старте")
+    parser.add_argument('--module', default='main', help="импортируемый модуль")
+    parser.add_argument('--limit', type=int, default=15, help="сколько самых долгих импортов показать")
+    parser.add_argument('--budget-ms', type=float, help="допустимое время импорта модуля")
+    args = parser.parse_args(argv)
+
+    report = build_report(args.module, args.limit)
+    print_report(report)
+
+    over_budget = args.budget_ms is not None and report['total_ms'] > args.budget_ms
+    if over_budget:
+        print(f"Превышен бюджет: {report['total_ms']:.1f} > {args.budget_ms:.1f} мс")
+    return 1 if report['heavy'] or over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
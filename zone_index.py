@@ -0,0 +1,229 @@
+# zone_index.py
+import logging
+import random
+import threading
+from typing import Callable, Dict, List, Optional
+
+class _Node:
+    __slots__ = ('key', 'low', 'high', 'payload', 'priority', 'max_high', 'left', 'right')
+
+    def __init__(self, key, low, high, payload):
+        self.key = key
+        self.low = low
+        self.high = high
+        self.payload = payload
+        self.priority = random.random()
+        self.max_high = high
+        self.left = None
+        self.right = None
+
+    def update(self):
+        self.max_high = self.high
+        if self.left and self.left.max_high > self.max_high:
+            self.max_high = self.left.max_high
+        if self.right and self.right.max_high > self.max_high:
+            self.max_high = self.right.max_high
+
+
+class IntervalTree:
+    """
+    Дерево интервалов [low, high] на основе декартова дерева (treap).
+    Ключ - (low, id), в каждом узле хранится максимум high по поддереву.
+    Вставка и удаление - O(log n), поиск пересечений - O(log n + k).
+    """
+
+    def __init__(self):
+        self.root = None
+        self._keys = {}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, item_id):
+        return item_id in self._keys
+
+    def insert(self, item_id, low: float, high: float, payload=None):
+        """Добавление интервала (существующий с тем же id заменяется)"""
+        if item_id in self._keys:
+            self.remove(item_id)
+
+        key = (low, item_id)
+        node = _Node(key, low, high, payload)
+        left, right = self._split(self.root, key)
+        self.root = self._merge(self._merge(left, node), right)
+        self._keys[item_id] = key
+
+    def remove(self, item_id) -> bool:
+        """Удаление интервала по id"""
+        key = self._keys.pop(item_id, None)
+        if key is None:
+            return False
+
+        left, rest = self._split(self.root, key)
+        _, right = self._split(rest, key, inclusive=True)
+        self.root = self._merge(left, right)
+        return True
+
+    def overlap(self, low: float, high: float) -> list:
+        """Все интервалы, пересекающиеся с [low, high]"""
+        result = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node is None or node.max_high < low:
+                continue
+            stack.append(node.left)
+            # В правом поддереве low только больше - дальше искать бессмысленно
+            if node.low <= high:
+                if node.high >= low:
+                    result.append(node.payload)
+                stack.append(node.right)
+        return result
+
+    def stab(self, point: float) -> list:
+        """Все интервалы, содержащие точку"""
+        return self.overlap(point, point)
+
+    def _split(self, node, key, inclusive=False):
+        """Разделение на ключи < key (<= key при inclusive) и остальные"""
+        if node is None:
+            return None, None
+        goes_left = node.key <= key if inclusive else node.key < key
+        if goes_left:
+            left, right = self._split(node.right, key, inclusive)
+            node.right = left
+            node.update()
+            return node, right
+        left, right = self._split(node.left, key, inclusive)
+        node.left = right
+        node.update()
+        return left, node
+
+    def _merge(self, left, right):
+        if left is None:
+            return right
+        if right is None:
+            return left
+        if left.priority > right.priority:
+            left.right = self._merge(left.right, right)
+            left.update()
+            return left
+        right.left = self._merge(left, right.left)
+        right.update()
+        return right
+
+
+class ZoneProximityMonitor:
+    """
+    Индекс активных зон ордер-блоков по символам для обработки ценовых тиков.
+    На каждый тик определяет зоны, которых цена касается (TOUCH)
+    или к которым приближается (APPROACH), и вызывает подписчиков.
+    """
+
+    def __init__(self, proximity_pct: float = 0.5):
+        self.proximity_pct = proximity_pct
+        self.trees: Dict[str, IntervalTree] = {}
+        self.callbacks: List[Callable] = []
+        self._block_symbols: Dict[int, str] = {}
+        self._alerted: Dict[str, Dict[int, str]] = {}
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def __len__(self):
+        return len(self._block_symbols)
+
+    def add_callback(self, callback: Callable):
+        """Подписка на события: callback(event: dict)"""
+        self.callbacks.append(callback)
+
+    def add_blocks(self, blocks: list):
+        """Добавление подтвержденных активных блоков в индекс"""
+        with self._lock:
+            for block in blocks:
+                if not block.get('is_confirmed', True) or block.get('status', 'ACTIVE') != 'ACTIVE':
+                    continue
+                if block.get('imbalance_low') is None or block.get('imbalance_high') is None:
+                    continue
+
+                symbol = block['symbol']
+                tree = self.trees.setdefault(symbol, IntervalTree())
+                tree.insert(block['id'], block['imbalance_low'], block['imbalance_high'], block)
+                self._block_symbols[block['id']] = symbol
+
+    def retire_blocks(self, block_ids: list) -> int:
+        """Удаление отработанных блоков из индекса"""
+        removed = 0
+        with self._lock:
+            for block_id in block_ids:
+                symbol = self._block_symbols.pop(block_id, None)
+                if symbol is None:
+                    continue
+                self.trees[symbol].remove(block_id)
+                self._alerted.get(symbol, {}).pop(block_id, None)
+                removed += 1
+        return removed
+
+    def rebuild(self, blocks: list):
+        """Полная перестройка индекса"""
+        with self._lock:
+            self.trees = {}
+            self._block_symbols = {}
+            self._alerted = {}
+        self.add_blocks(blocks)
+
+    def zones_at(self, symbol: str, price: float) -> list:
+        """Зоны, в которые попадает цена"""
+        with self._lock:
+            tree = self.trees.get(symbol)
+            return tree.stab(price) if tree else []
+
+    def zones_near(self, symbol: str, price: float, proximity_pct: Optional[float] = None) -> list:
+        """Зоны на расстоянии не более proximity_pct процентов от цены"""
+        if proximity_pct is None:
+            proximity_pct = self.proximity_pct
+        margin = price * proximity_pct / 100
+
+        with self._lock:
+            tree = self.trees.get(symbol)
+            return tree.overlap(price - margin, price + margin) if tree else []
+
+    def on_price(self, symbol: str, price: float) -> list:
+        """
+        Обработка нового тика. События генерируются только при смене
+        состояния зоны, чтобы не повторять оповещения на каждом тике.
+        """
+        zones = self.zones_near(symbol, price)
+        events = []
+
+        with self._lock:
+            previous = self._alerted.get(symbol, {})
+            current = {}
+            for block in zones:
+                if block['imbalance_low'] <= price <= block['imbalance_high']:
+                    state = 'TOUCH'
+                    distance = 0.0
+                else:
+                    state = 'APPROACH'
+                    edge = block['imbalance_low'] if price < block['imbalance_low'] else block['imbalance_high']
+                    distance = abs(price - edge) / price * 100
+
+                current[block['id']] = state
+                prev_state = previous.get(block['id'])
+                if prev_state is None or (state == 'TOUCH' and prev_state != 'TOUCH'):
+                    events.append({
+                        'type': state,
+                        'symbol': symbol,
+                        'price': price,
+                        'distance_pct': distance,
+                        'block': block
+                    })
+            self._alerted[symbol] = current
+
+        for event in events:
+            for callback in self.callbacks:
+                try:
+                    callback(event)
+                except Exception as e:
+                    self.logger.error(f"Ошибка обработчика события зоны: {e}")
+
+        return events